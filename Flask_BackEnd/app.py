@@ -34,6 +34,10 @@ def create_app():
     db.init_app(app)
     migrate = Migrate(app, db)
 
+    # CLI commands (flask check-nutrition-totals, ...)
+    from commands.cli import register_commands
+    register_commands(app)
+
     # Register blueprints buraya gelicek BP ler
 
     return app
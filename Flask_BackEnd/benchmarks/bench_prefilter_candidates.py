@@ -0,0 +1,121 @@
+#Benchmark: _prefilter_candidates eski Python döngüsü vs vectorized NumPy skorlama
+#Kullanım (Flask_BackEnd klasöründen): python benchmarks/bench_prefilter_candidates.py [--sizes 10000 50000 100000]
+#DB gerekmez, sentetik katalog üretilir. Sadece skorlama kısmı ölçülür (eski yol ayrıca her istekte Item.query.all() yapıyordu).
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.candidate_scoring_service import build_macro_arrays, score_candidates
+from services.item_service import calculate_item_calories
+
+
+def legacy_prefilter(all_items, original_item_id, original_item, limit=12):
+    # Old _prefilter_candidates loop (before vectorization), kept here as the reference
+    orig_protein = original_item['ItemProtein'] or 0
+    orig_carb = original_item['ItemCarb'] or 0
+    orig_fat = original_item['ItemFat'] or 0
+    orig_cal = calculate_item_calories(orig_protein, orig_carb, orig_fat)
+
+    macros = {'protein': orig_protein, 'carb': orig_carb, 'fat': orig_fat}
+    dominant_role = max(macros, key=macros.get)
+
+    scored = []
+    for db_item in all_items:
+        if str(db_item['ItemID']) == str(original_item_id):
+            continue
+
+        p = db_item['ItemProtein']
+        c = db_item['ItemCarb']
+        f = db_item['ItemFat']
+        cal = calculate_item_calories(p, c, f)
+
+        cal_diff = abs(cal - orig_cal)
+        cal_score = max(0, 40 - (cal_diff / orig_cal * 40)) if orig_cal > 0 else 20
+
+        macro_diff = abs(p - orig_protein) + abs(c - orig_carb) + abs(f - orig_fat)
+        macro_total = orig_protein + orig_carb + orig_fat
+        macro_score = max(0, 40 - (macro_diff / macro_total * 40)) if macro_total > 0 else 20
+
+        item_macros = {'protein': p, 'carb': c, 'fat': f}
+        item_role = max(item_macros, key=item_macros.get)
+        role_bonus = 20 if item_role == dominant_role else 0
+
+        total_score = cal_score + macro_score + role_bonus
+
+        scored.append({
+            'name': db_item['ItemName'],
+            'cal_per_100g': round(cal, 1),
+            'protein': round(p, 1),
+            'carb': round(c, 1),
+            'fat': round(f, 1),
+            'score': round(total_score, 1),
+        })
+
+    scored.sort(key=lambda x: x['score'], reverse=True)
+    return scored[:limit]
+
+
+def synthetic_catalog(size, seed=42):
+    rng = random.Random(seed)
+    entries = []
+    for i in range(1, size + 1):
+        protein = round(rng.uniform(0, 35), 1)
+        carb = round(rng.uniform(0, 80), 1)
+        fat = round(rng.uniform(0, 40), 1)
+        entries.append({
+            'ItemID': i,
+            'ItemName': f'Item {i}',
+            'ItemCategory': rng.choice(['Fruit', 'Meat', 'Grain', 'Vegetable', 'Dairy']),
+            'ItemProtein': protein,
+            'ItemCarb': carb,
+            'ItemFat': fat,
+            'ItemCalories': calculate_item_calories(protein, carb, fat),
+        })
+    return entries
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'items':>8} {'legacy ms':>10} {'numpy ms':>10} {'build ms':>10} {'speedup':>8} {'same top':>9}")
+    for size in args.sizes:
+        catalog = synthetic_catalog(size)
+        build_ms, arrays = timed(lambda: build_macro_arrays(catalog), 1)
+
+        originals = random.Random(size).sample(catalog, min(args.queries, size))
+        legacy_times, numpy_times, same = [], [], 0
+
+        for original in originals:
+            legacy_ms, legacy_top = timed(lambda: legacy_prefilter(catalog, original['ItemID'], original), args.repeat)
+            numpy_ms, numpy_top = timed(lambda: score_candidates(arrays, original['ItemID'], original), args.repeat)
+            legacy_times.append(legacy_ms)
+            numpy_times.append(numpy_ms)
+            same += [c['name'] for c in legacy_top] == [c['name'] for c in numpy_top]
+
+        legacy_ms = statistics.median(legacy_times)
+        numpy_ms = statistics.median(numpy_times)
+        print(f"{size:>8} {legacy_ms:>10.2f} {numpy_ms:>10.3f} {build_ms:>10.2f} {legacy_ms / numpy_ms:>7.1f}x {same:>4}/{len(originals)}")
+
+
+if __name__ == '__main__':
+    main()
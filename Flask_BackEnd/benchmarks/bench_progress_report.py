@@ -0,0 +1,71 @@
+#Benchmark: progress PDF report (matplotlib renderer), sayfa başına render süresi + sıralı vs process pool (paralel) uçtan uca süre
+#Kullanım (Flask_BackEnd klasöründen): python benchmarks/bench_progress_report.py [--years 1 3 5] [--processes 4] [--repeat 3]
+#DB gerekmez, sentetik ölçüm geçmişi üretilir (haftalık kilo / yağ oranı, günlük adherence).
+#Paralel yol için pypdf gerekir (pip install pypdf), yoksa sadece sıralı süreler raporlanır.
+#Vector renderer ile karşılaştırma (süre + RSS): benchmarks/bench_progress_report_renderers.py
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services import physical_details_service as pds
+from services import report_matplotlib_renderer as mpl_renderer
+from synthetic_progress import synthetic_history
+
+
+def timed(fn, repeat):
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 3, 5])
+    parser.add_argument('--processes', type=int, default=mpl_renderer.REPORT_RENDER_PROCESSES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--option', default='all', choices=['weekly', 'monthly', 'all'])
+    args = parser.parse_args()
+
+    client_info = {'Name': 'Benchmark Client', 'Sex': 'female', 'DOB': '1990-01-01'}
+    parallel = args.processes > 1 and mpl_renderer.PdfWriter is not None
+    if not parallel:
+        print("Parallel rendering unavailable (--processes <= 1 or pypdf not installed), sequential only\n")
+
+    if parallel:
+        # Process start-up is paid once per web process, not per report
+        mpl_renderer.REPORT_RENDER_PROCESSES = args.processes
+        t0 = time.perf_counter()
+        mpl_renderer.render_report_pdf(pds.build_report_pages(client_info, args.option, *synthetic_history(1)), processes=args.processes)
+        print(f"Pool warm-up ({args.processes} processes): {time.perf_counter() - t0:.2f}s\n")
+
+    for years in args.years:
+        history = synthetic_history(years)
+        pages = pds.build_report_pages(client_info, args.option, *history)
+        print(f"== {years} year(s): {len(history[0])} weight, {len(history[2])} adherence records, {len(pages)} pages ==")
+
+        for i, page in enumerate(pages):
+            label = 'cover' if page['kind'] == 'cover' else page['args']['title']
+            page_time, _ = timed(lambda: mpl_renderer.render_page_pdf(page), args.repeat)
+            print(f"  page {i + 1} ({label}): {page_time * 1000:.0f} ms")
+
+        seq_time, seq_buf = timed(lambda: mpl_renderer.render_report_pdf(pages, processes=1), args.repeat)
+        print(f"  sequential: {seq_time * 1000:.0f} ms ({len(seq_buf.getvalue()) // 1024} KB)")
+
+        if parallel:
+            par_time, par_buf = timed(lambda: mpl_renderer.render_report_pdf(pages, processes=args.processes), args.repeat)
+            print(f"  parallel:   {par_time * 1000:.0f} ms ({len(par_buf.getvalue()) // 1024} KB), speedup x{seq_time / par_time:.2f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#Benchmark: progress PDF report, matplotlib (varsayılan) vs vector renderer (opt-in) - import süresi, rapor süresi, RSS
+#Kullanım (Flask_BackEnd klasöründen): python benchmarks/bench_progress_report_renderers.py [--years 1 5] [--repeat 3] [--processes 1]
+#Her renderer ayrı bir Python process'inde ölçülür (temiz import + RSS), DB gerekmez, sentetik geçmiş synthetic_progress'ten.
+#RSS = ru_maxrss (peak, Linux'ta KB), matplotlib'in paralel render process'leri dahil değil (--processes 1 varsayılan).
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def worker(renderer, years, repeat, option, processes):
+    from synthetic_progress import synthetic_history
+    history = synthetic_history(years)
+    rss_start = _rss_mb()
+
+    t0 = time.perf_counter()
+    from services import physical_details_service as pds
+    import_time = time.perf_counter() - t0
+    rss_import = _rss_mb()
+
+    client_info = {'Name': 'Benchmark Client', 'Sex': 'female', 'DOB': '1990-01-01'}
+    pages = pds.build_report_pages(client_info, option, *history)
+
+    # First report includes the lazy matplotlib import of the legacy renderer
+    t0 = time.perf_counter()
+    buf = pds.render_report_pdf(pages, renderer=renderer, processes=processes)
+    first_time = time.perf_counter() - t0
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        buf = pds.render_report_pdf(pages, renderer=renderer, processes=processes)
+        times.append(time.perf_counter() - t0)
+
+    print(json.dumps({
+        'import': import_time,
+        'first': first_time,
+        'report': statistics.median(times),
+        'pages': len(pages),
+        'kb': len(buf.getvalue()) // 1024,
+        'rssStart': rss_start,
+        'rssImport': rss_import,
+        'rssPeak': _rss_mb(),
+        'matplotlibLoaded': 'matplotlib' in sys.modules,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--option', default='all', choices=['weekly', 'monthly', 'all'])
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--worker', choices=['vector', 'matplotlib'])
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.years[0], args.repeat, args.option, args.processes)
+        return
+
+    fmt = lambda v: '   n/a' if v is None else f'{v:6.0f}'
+    for years in args.years:
+        print(f"== {years} year(s), option={args.option} ==")
+        print("  renderer     import ms  first ms  report ms  PDF KB  RSS after import MB  RSS peak MB  matplotlib loaded")
+        for renderer in ('vector', 'matplotlib'):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', renderer, '--years', str(years),
+                 '--repeat', str(args.repeat), '--option', args.option, '--processes', str(args.processes)],
+                capture_output=True, text=True, check=True
+            ).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            print(f"  {renderer:<11}  {r['import'] * 1000:9.0f}  {r['first'] * 1000:8.0f}  {r['report'] * 1000:9.0f}"
+                  f"  {r['kb']:6d}  {fmt(r['rssImport']):>19}  {fmt(r['rssPeak']):>11}  {r['matplotlibLoaded']}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+#Progress report benchmark'ları için sentetik ölçüm geçmişi (haftalık kilo / yağ oranı, günlük kümülatif adherence).
+#Bilerek sadece stdlib import eder, renderer benchmark'ı import süresini / RSS'i temiz ölçebilsin.
+
+import random
+from datetime import date, timedelta
+
+
+def synthetic_history(years, seed=7):
+    rnd = random.Random(seed)
+    start = date.today() - timedelta(days=365 * years)
+
+    weight, bodyfat = 92.0, 31.0
+    weight_raw, bodyfat_raw = [], []
+    for week in range(52 * years):
+        d = (start + timedelta(weeks=week)).isoformat()
+        weight += rnd.uniform(-0.6, 0.4)
+        bodyfat += rnd.uniform(-0.25, 0.15)
+        weight_raw.append({'date': d, 'value': round(weight, 1)})
+        bodyfat_raw.append({'date': d, 'value': round(bodyfat, 1)})
+
+    success = total = 0
+    adherence_raw = []
+    for day in range(365 * years):
+        total += 6
+        success += rnd.randint(2, 6)
+        adherence_raw.append({'date': (start + timedelta(days=day)).isoformat(), 'value': round(success / total * 100, 2)})
+
+    return weight_raw, bodyfat_raw, adherence_raw
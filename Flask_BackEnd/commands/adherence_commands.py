@@ -0,0 +1,19 @@
+import click
+from flask.cli import with_appcontext
+from services.adherence_recompute_service import recompute_adherence
+
+
+@click.command('recompute-adherence')
+@click.option('--client-id', default=None, help='Only rebuild the snapshots of this client.')
+@click.option('--batch-size', default=1000, show_default=True, help='Clients per batch (one commit per batch).')
+@click.option('--dry-run', is_flag=True, help='Only report the clients whose snapshots differ.')
+@with_appcontext
+def recompute_adherence_command(client_id, batch_size, dry_run):
+    """
+    Rebuild ClientProgressSnapshot rows from MealItem.isFollowed x DailyMealPlan.PlanDate
+    """
+    report = recompute_adherence(client_id=client_id, batch_size=batch_size, dry_run=dry_run)
+
+    click.echo(f"Clients: {report['clients']}, changed: {report['changedClients']}")
+    verb = 'Would write' if dry_run else 'Written'
+    click.echo(f"{verb}: {report['snapshotsWritten']} snapshots (replacing {report['snapshotsDeleted']})")
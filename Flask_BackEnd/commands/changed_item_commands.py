@@ -0,0 +1,21 @@
+import click
+from flask.cli import with_appcontext
+from services.changed_item_migration_service import migrate_changed_items
+
+
+@click.command('migrate-changed-items')
+@click.option('--batch-size', default=1000, show_default=True, help='MealItem rows per chunk (one commit per chunk).')
+@click.option('--dry-run', is_flag=True, help='Only report what would be rewritten.')
+@with_appcontext
+def migrate_changed_items_command(batch_size, dry_run):
+    """
+    Rewrite MealItem.ChangedItem values into the canonical [{item_id, portion}] format
+    """
+    report = migrate_changed_items(batch_size=batch_size, dry_run=dry_run)
+
+    click.echo(f"Scanned: {report['scanned']}, already canonical: {report['alreadyCanonical']}")
+    click.echo(f"{'Would rewrite' if dry_run else 'Rewritten'}: {report['rewritten']}")
+    if report['unparseable']:
+        click.echo(f"⚠️ Unparseable values left untouched: {report['unparseable']}")
+    if report['unresolvedNames']:
+        click.echo(f"⚠️ Names not found in the Item table (kept by name): {report['unresolvedNames']}")
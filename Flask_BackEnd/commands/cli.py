@@ -0,0 +1,11 @@
+from commands.nutrition_commands import check_nutrition_totals_command
+from commands.changed_item_commands import migrate_changed_items_command
+from commands.adherence_commands import recompute_adherence_command
+
+# Flask CLI commands (flask <command>), registered in create_app
+
+
+def register_commands(app):
+    app.cli.add_command(check_nutrition_totals_command)
+    app.cli.add_command(migrate_changed_items_command)
+    app.cli.add_command(recompute_adherence_command)
@@ -0,0 +1,26 @@
+import click
+from flask.cli import with_appcontext
+from services.nutrition_totals_service import check_nutrition_totals
+
+
+@click.command('check-nutrition-totals')
+@click.option('--fix', is_flag=True, help='Store the recomputed totals for every drifted meal / plan.')
+@click.option('--client-id', default=None, help='Only check the plans of this client.')
+@click.option('--batch-size', default=500, show_default=True, help='Plans per batch.')
+@with_appcontext
+def check_nutrition_totals_command(fix, client_id, batch_size):
+    """
+    Compare stored Meal / DailyMealPlan totals with MealItem x Item (exit code 1 on drift without --fix)
+    """
+    report = check_nutrition_totals(fix=fix, client_id=client_id, batch_size=batch_size)
+
+    click.echo(f"Plans checked: {report['plansChecked']}, meals checked: {report['mealsChecked']}")
+    click.echo(f"Drifted plans: {report['driftedPlans']}, drifted meals: {report['driftedMeals']}")
+    for sample in report['samples']:
+        click.echo(f"  {sample}")
+
+    if report['fixed']:
+        click.echo("✅ Drifted totals fixed")
+    elif report['driftedPlans'] or report['driftedMeals']:
+        click.echo("⚠️ Drift found, run again with --fix to store the recomputed totals")
+        raise SystemExit(1)
@@ -0,0 +1,167 @@
+"""performance schema changes
+
+Existing databases were created before Flask-Migrate was used, so this is the first revision and
+every step checks the live schema first (safe to run on a database that already has some of the changes).
+Offline (--sql) mode can't inspect the database and emits every step.
+
+- DailyMealPlan / Meal: nullable TotalCalories, TotalProtein, TotalCarb, TotalFat
+  (materialized totals, NULL = computed at read time; flask check-nutrition-totals --fix fills old rows)
+- PlanTemplate: new table (plan templates, plan_template_service)
+- ClientMealPreference: duplicate (ClientID, MealName, ItemID) rows are merged into the oldest one
+  (counts summed, score = 50 + sum of the rows' score changes), then uq_client_meal_item is added
+  (preference_service upserts against it, falls back to read-modify-write until it exists)
+- ClientProgressSnapshot: duplicate (ClientID, ProgressDate) rows are collapsed into the oldest one with the
+  largest cumulative counts, then uq_client_progressdate is added (progress_snapshot_service upserts against it).
+  Duplicates were both incremented by every later feedback, exact counts: flask recompute-adherence
+
+Usage (Flask_BackEnd klasöründen): flask --app app:create_app db upgrade
+(MySQL script for a DBA: flask --app app:create_app db upgrade --sql)
+
+Revision ID: 2ed7b855b6eb
+Revises:
+Create Date: 2026-10-18 15:03:23.156115
+
+"""
+from alembic import op, context
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2ed7b855b6eb'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TOTAL_COLUMNS = ('TotalCalories', 'TotalProtein', 'TotalCarb', 'TotalFat')
+
+
+def _columns(table, offline=()):
+    # offline: what to assume in --sql mode (nothing exists before upgrade, everything before downgrade)
+    if context.is_offline_mode():
+        return set(offline)
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _tables(offline=()):
+    if context.is_offline_mode():
+        return set(offline)
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _unique_keys(table, offline=()):
+    if context.is_offline_mode():
+        return set(offline)
+    inspector = sa.inspect(op.get_bind())
+    names = {c['name'] for c in inspector.get_unique_constraints(table)}
+    return names | {i['name'] for i in inspector.get_indexes(table) if i.get('unique')}
+
+
+def _merge_duplicates(table, id_column, key_columns, merged_values):
+    """
+    Collapse rows with the same key_columns into the row with the smallest id_column.
+
+    Args:
+        key_columns (list): [(name, type), ...] of the future unique key
+        merged_values (list): [(name, type, SQL aggregate over the group), ...] written to the kept row
+    """
+    # Plain CREATE TABLE + INSERT .. SELECT (no CREATE TABLE .. AS SELECT, not allowed with MySQL GTID consistency)
+    merge_table = f'_merge_{table}'
+    op.create_table(
+        merge_table,
+        *[sa.Column(name, type_, nullable=False) for name, type_ in key_columns],
+        sa.Column('KeepID', sa.Integer(), nullable=False),
+        *[sa.Column(name, type_) for name, type_, _ in merged_values],
+    )
+
+    keys = ', '.join(name for name, _ in key_columns)
+    values = ', '.join(name for name, _, _ in merged_values)
+    aggregates = ', '.join(aggregate for _, _, aggregate in merged_values)
+    op.execute(
+        f'INSERT INTO {merge_table} ({keys}, KeepID, {values}) '
+        f'SELECT {keys}, MIN({id_column}), {aggregates} FROM {table} GROUP BY {keys} HAVING COUNT(*) > 1'
+    )
+
+    assignments = ', '.join(
+        f'{name} = (SELECT m.{name} FROM {merge_table} m WHERE m.KeepID = {table}.{id_column})'
+        for name, _, _ in merged_values
+    )
+    op.execute(f'UPDATE {table} SET {assignments} WHERE {id_column} IN (SELECT KeepID FROM {merge_table})')
+
+    same_key = ' AND '.join(f'm.{name} = {table}.{name}' for name, _ in key_columns)
+    op.execute(
+        f'DELETE FROM {table} WHERE {id_column} NOT IN (SELECT KeepID FROM {merge_table}) '
+        f'AND EXISTS (SELECT 1 FROM {merge_table} m WHERE {same_key})'
+    )
+    op.drop_table(merge_table)
+
+
+def upgrade():
+    # Materialized nutrition totals
+    for table in ('DailyMealPlan', 'Meal'):
+        existing = _columns(table)
+        for column in TOTAL_COLUMNS:
+            if column not in existing:
+                op.add_column(table, sa.Column(column, sa.Float(), nullable=True))
+
+    # Plan templates
+    if 'PlanTemplate' not in _tables():
+        op.create_table(
+            'PlanTemplate',
+            sa.Column('TemplateID', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('DietitianID', sa.String(length=36), nullable=False),
+            sa.Column('TemplateName', sa.String(length=64), nullable=False),
+            sa.Column('Meals', sa.JSON(), nullable=False),
+            sa.Column('CreatedAt', sa.TIMESTAMP(), nullable=True),
+            sa.ForeignKeyConstraint(['DietitianID'], ['Dietitian.DietitianID'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('TemplateID'),
+        )
+
+    # Preference upsert key
+    if 'uq_client_meal_item' not in _unique_keys('ClientMealPreference'):
+        _merge_duplicates(
+            'ClientMealPreference', 'PreferenceID',
+            [('ClientID', sa.String(36)), ('MealName', sa.String(20)), ('ItemID', sa.Integer())],
+            [
+                ('Score', sa.Integer(), 'CASE WHEN 50 + SUM(Score - 50) > 100 THEN 100 '
+                                        'WHEN 50 + SUM(Score - 50) < 0 THEN 0 ELSE 50 + SUM(Score - 50) END'),
+                ('SelectionCount', sa.Integer(), 'SUM(SelectionCount)'),
+                ('RejectionCount', sa.Integer(), 'SUM(RejectionCount)'),
+                ('ItemName', sa.String(100), 'MAX(ItemName)'),
+            ]
+        )
+        with op.batch_alter_table('ClientMealPreference') as batch_op:
+            batch_op.create_unique_constraint('uq_client_meal_item', ['ClientID', 'MealName', 'ItemID'])
+
+    # Adherence snapshot upsert key
+    if 'uq_client_progressdate' not in _unique_keys('ClientProgressSnapshot'):
+        _merge_duplicates(
+            'ClientProgressSnapshot', 'SnapshotID',
+            [('ClientID', sa.String(36)), ('ProgressDate', sa.Date())],
+            [
+                ('SuccessAmount', sa.Integer(), 'MAX(SuccessAmount)'),
+                ('Total', sa.Integer(), 'MAX(Total)'),
+            ]
+        )
+        with op.batch_alter_table('ClientProgressSnapshot') as batch_op:
+            batch_op.create_unique_constraint('uq_client_progressdate', ['ClientID', 'ProgressDate'])
+
+
+def downgrade():
+    # Merged duplicate rows are not restored
+    if 'uq_client_progressdate' in _unique_keys('ClientProgressSnapshot', offline=('uq_client_progressdate',)):
+        with op.batch_alter_table('ClientProgressSnapshot') as batch_op:
+            batch_op.drop_constraint('uq_client_progressdate', type_='unique')
+
+    if 'uq_client_meal_item' in _unique_keys('ClientMealPreference', offline=('uq_client_meal_item',)):
+        with op.batch_alter_table('ClientMealPreference') as batch_op:
+            batch_op.drop_constraint('uq_client_meal_item', type_='unique')
+
+    if 'PlanTemplate' in _tables(offline=('PlanTemplate',)):
+        op.drop_table('PlanTemplate')
+
+    for table in ('Meal', 'DailyMealPlan'):
+        existing = _columns(table, offline=TOTAL_COLUMNS)
+        with op.batch_alter_table(table) as batch_op:
+            for column in TOTAL_COLUMNS:
+                if column in existing:
+                    batch_op.drop_column(column)
@@ -90,6 +90,12 @@ class DailyMealPlan(db.Model):
     PlanDate = db.Column(db.Date, nullable=False)
     CreatedAt = db.Column(db.TIMESTAMP, default=datetime.utcnow)
 
+    # Daily totals of the planned items, written by meal_plan_writer_service (NULL = not computed yet)
+    TotalCalories = db.Column(db.Float)
+    TotalProtein = db.Column(db.Float)
+    TotalCarb = db.Column(db.Float)
+    TotalFat = db.Column(db.Float)
+
     __table_args__ = (
         db.UniqueConstraint('ClientID', 'PlanDate', name='uq_client_plandate'),
     )
@@ -106,6 +112,12 @@ class Meal(db.Model):
     MealStart = db.Column(db.Time)
     MealEnd = db.Column(db.Time)
     MealName = db.Column(db.String(30), nullable=False)
+
+    # Meal totals of the planned items, written by meal_plan_writer_service (NULL = not computed yet)
+    TotalCalories = db.Column(db.Float)
+    TotalProtein = db.Column(db.Float)
+    TotalCarb = db.Column(db.Float)
+    TotalFat = db.Column(db.Float)
     
     # Relationships
     meal_items = db.relationship('MealItem', backref='meal', lazy="selectin", cascade='all, delete-orphan')
@@ -166,9 +178,16 @@ class ClientProgressSnapshot(db.Model):
     ClientID = db.Column(db.String(36), db.ForeignKey('Client.ClientID', ondelete='CASCADE'), nullable=False)
     SuccessAmount = db.Column(db.Integer, nullable=False, default=0)
     Total = db.Column(db.Integer, nullable=False, default=0)
+    # Legacy, no longer written: the rate is derived from SuccessAmount / Total at read time
     AdherenceRate = db.Column(db.Numeric(5, 2))
     ProgressDate = db.Column(db.Date, nullable=False)
 
+    # One cumulative row per client and day, progress_snapshot_service upserts against it
+    # Old databases: the migration collapses existing duplicates, then adds the key (flask db upgrade).
+    __table_args__ = (
+        db.UniqueConstraint('ClientID', 'ProgressDate', name='uq_client_progressdate'),
+    )
+
 
 class ClientMealPreference(db.Model):
     __tablename__ = 'ClientMealPreference'
@@ -182,6 +201,12 @@ class ClientMealPreference(db.Model):
     SelectionCount = db.Column(db.Integer, nullable=False, default=0)
     RejectionCount = db.Column(db.Integer, nullable=False, default=0)
 
+    # One row per (client, meal, item), preference_service upserts against it.
+    # Old databases: the migration merges existing duplicates, then adds the key (flask db upgrade).
+    __table_args__ = (
+        db.UniqueConstraint('ClientID', 'MealName', 'ItemID', name='uq_client_meal_item'),
+    )
+
     def to_dict(self):
         return {
             'preference_id': self.PreferenceID,
@@ -193,3 +218,23 @@ class ClientMealPreference(db.Model):
             'selection_count': self.SelectionCount,
             'rejection_count': self.RejectionCount
         }
+
+
+class PlanTemplate(db.Model):
+    __tablename__ = 'PlanTemplate'
+
+    TemplateID = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    DietitianID = db.Column(db.String(36), db.ForeignKey('Dietitian.DietitianID', ondelete='CASCADE'), nullable=False)
+    TemplateName = db.Column(db.String(64), nullable=False)
+    # Same format as the "meals" of POST /meal-plans: [{title, time, items: [{name, amount, allowChange, ...}]}]
+    Meals = db.Column(db.JSON, nullable=False)
+    CreatedAt = db.Column(db.TIMESTAMP, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'template_id': self.TemplateID,
+            'dietitian_id': self.DietitianID,
+            'name': self.TemplateName,
+            'meals': self.Meals,
+            'created_at': self.CreatedAt.isoformat() if self.CreatedAt else None
+        }
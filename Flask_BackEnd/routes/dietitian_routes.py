@@ -1,7 +1,7 @@
 #Burası ise controller kısmıdır. Sadece metodlar bulunur, API/Endpoint kısmı burasıdır.Request alır,Service çağırır,Response döner.
 #Ne kadar az kod olursa o kadar iyidir, python backendde.
 
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify, send_file, url_for, Response
 from services.allServices import AuthService
 import jwt #Session yerine token, Web+Mobil için ideal,  pip install PyJWT (Backend terminali içerisinde yaz, genel klasöre yazma)
 from datetime import datetime, timedelta, date
@@ -15,14 +15,53 @@ from models.models import Client, PhysicalDetails, MedicalDetails
 from services.client_service import *
 from services.mealitem_service import *
 from services.meal_service import *
-from services.physical_details_service import get_progress_data, create_pdf_report
+from services.physical_details_service import get_progress_data, get_progress_metrics, progress_data_etag, PROGRESS_METRICS, PROGRESS_DURATIONS
+from services.report_job_service import submit_report_job, get_report_job, get_or_wait_report, report_path
 import services.client_service as client_service# web için, böyle importlamak lazim yoksa çalışmıyor.
 import services.meal_service as meal_service# web için, böyle importlamayınca çalışmıyor. (from ... import *) olmuyor.
-from services.preference_service import get_meal_fruit_recommendations, get_meal_fruit_recommendations_from_meal_id
+from services.preference_service import get_meal_fruit_recommendations, get_meal_fruit_recommendations_from_meal_id, get_fruit_recommendation_cache_stats
 from services.progress_snapshot_service import update_adherence_rate
+from services.item_catalog_service import get_item_catalog_stats
+from services.macro_index_service import find_similar_items, get_macro_index_stats
+from services.llm_cache_service import get_llm_cache_stats
+from services.suggestion_store_service import get_suggestion_store_stats
+from services.plan_template_service import save_plan_template, get_plan_templates, apply_plan_template
+from services.response_cache_service import conditional_cache, get_response_cache_stats
+from services.data_version_service import get_data_version_stats
+from services.item_catalog_service import get_item_catalog_fingerprint
 
 dietitian_bp = Blueprint('dietitian', __name__)
 
+MEAL_PLANS_DEFAULT_PAGE_SIZE = 30
+MEAL_PLANS_MAX_PAGE_SIZE = 100
+
+
+# Data versions of the polled mobile GET endpoints (@conditional_cache, response_cache_service)
+def _client_meals_versions(args):
+    return [('meals', args.get('client_id')), ('items', None)]
+
+
+def _client_plan_dates_versions(args):
+    return [('meals', args.get('client_id'))]
+
+
+def _fruit_recommendation_versions(args):
+    return [('preferences', args.get('client_id')), ('meals', args.get('client_id')), ('items', None)]
+
+
+def _items_versions(args):
+    return [('items', None)]
+
+
+def _catalog_fingerprint(args):
+    # Items inserted by another worker / outside the app (memory version backend can't see those)
+    return get_item_catalog_fingerprint()
+
+
+def _today_and_catalog(args):
+    # Plans are marked current / past relative to today, the default plan_date is today
+    return date.today().isoformat(), get_item_catalog_fingerprint()
+
 
 # Mobile and Web
 @dietitian_bp.route('/auth', methods=['POST'])
@@ -90,6 +129,7 @@ def login():
 
 
 @dietitian_bp.route('/fruit-recommendations', methods=['GET'])
+@conditional_cache(_fruit_recommendation_versions, extra=_catalog_fingerprint)
 def get_fruit_recommendations():
     """
     Returns fruit recommendations for a client in a given meal.
@@ -145,6 +185,7 @@ def get_fruit_recommendations():
 
 # Mobile
 @dietitian_bp.route('/meals', methods=['GET'])
+@conditional_cache(_client_meals_versions, extra=_today_and_catalog)
 def getMeals():
     """
     Get meal plan for a client on a specific date (today/given date [Past/Future])
@@ -188,6 +229,7 @@ def getMeals():
 
 # Mobile
 @dietitian_bp.route('/meals/available-dates', methods=['GET'])
+@conditional_cache(_client_plan_dates_versions)
 def getAvailableDates():
     """
     Get all available dates that have meal plans for a client
@@ -383,6 +425,7 @@ def give_Feedback():
 
 # Mobile (Çalışıyor) and Web (Eklenecek)
 @dietitian_bp.route('/dropdown_items', methods=['GET'])
+@conditional_cache(_items_versions, extra=_catalog_fingerprint)
 def get_dropdown_available_items():
     try:
         items_list = get_all_items()
@@ -413,8 +456,42 @@ def api_get_meal_plans():
         if not client_id:
             return jsonify({'error': 'Client ID required'}), 400
 
+        # Optional date window (YYYY-MM-DD, inclusive), without it the whole history is returned
+        try:
+            date_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+            date_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        # Paginated mode (limit / cursor / summary): {'plans': [...], 'nextCursor': ...}
+        # Without these params the old response (full list) is kept for compatibility
+        summary = request.args.get('summary', '').lower() in ('1', 'true', 'yes')
+        if 'limit' in request.args or 'cursor' in request.args or summary:
+            limit = request.args.get('limit', default=MEAL_PLANS_DEFAULT_PAGE_SIZE, type=int)
+            if not limit or limit < 1:
+                return jsonify({'error': 'limit must be a positive integer'}), 400
+            limit = min(limit, MEAL_PLANS_MAX_PAGE_SIZE)
+
+            try:
+                plans, next_cursor = get_client_meal_plans_page(
+                    client_id,
+                    limit=limit,
+                    cursor=request.args.get('cursor'),
+                    summary=summary,
+                    date_from=date_from,
+                    date_to=date_to
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+            return jsonify({
+                'plans': plans,
+                'nextCursor': next_cursor,
+                'hasMore': next_cursor is not None
+            }), 200
+
         # Call the function from the imported module
-        plans = get_client_meal_plans(client_id)
+        plans = get_client_meal_plans(client_id, date_from, date_to)
         return jsonify(plans), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -429,27 +506,78 @@ def api_create_meal_plan():  # <-- renamed to avoid conflict.
 
         
         duration_days = int(data.get('durationDays', 1))  # as default takes duration_days as 1.
-        base_date_str = data.get('date')
-        print(duration_days)
 
-        base_date = datetime.strptime(base_date_str, '%Y-%m-%d')
+        # Every day is created in one transaction (bulk path), either all days are written or none
+        success, message = create_meal_plans(data, duration_days)
+        if not success:
+            return jsonify({'error': f"Failed on date {data.get('date')}: {message}"}), 400
 
-        for i in range(duration_days): # loop for duration days and create that number of meals.
-            current_date = base_date + timedelta(days=i) # Calculate the new date for this specific loop
-            
-            daily_data = data.copy() # fresh copy
+        return jsonify({'message': f'Successfully created meal plans for {duration_days} days.'}), 200
 
-            daily_data['date'] = current_date.strftime('%Y-%m-%d') # format the date
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            success, message = create_meal_plan(daily_data) # create meal plan for this specific day
-            
-            # If any day fails then stop and return the error to the frontend
-            if not success:
-                return jsonify({'error': f"Failed on date {daily_data['date']}: {message}"}), 400
-        
-        # If the loop finishes without failing, return a single success message
-        return jsonify({'message': f'Successfully created meal plans for {duration_days} days.'}), 200
+# Web
+@dietitian_bp.route('/plan-templates', methods=['POST'])
+def api_save_plan_template():
+    """
+    Save a plan template.
+
+    Expected JSON body:
+    - dietitian_id, name
+    - meals (same format as POST /meal-plans) OR client_id + date (copy an existing daily plan)
+    """
+    try:
+        data = request.get_json() or {}
+        success, message, template = save_plan_template(
+            data.get('dietitian_id'),
+            data.get('name'),
+            meals=data.get('meals'),
+            source_client_id=data.get('client_id'),
+            source_date=data.get('date')
+        )
+        if not success:
+            return jsonify({'error': message}), 400
+        return jsonify({'message': message, 'template': template}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Web
+@dietitian_bp.route('/plan-templates', methods=['GET'])
+def api_get_plan_templates():
+    try:
+        dietitian_id = request.args.get('dietitian_id')
+        if not dietitian_id:
+            return jsonify({'error': 'dietitian_id is required'}), 400
+        return jsonify(get_plan_templates(dietitian_id)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
+# Web
+@dietitian_bp.route('/plan-templates/<int:template_id>/apply', methods=['POST'])
+def api_apply_plan_template(template_id):
+    """
+    Apply a template to several clients and a date range in one transaction.
+
+    Expected JSON body:
+    - client_ids: list of client IDs
+    - start_date: YYYY-MM-DD
+    - end_date (YYYY-MM-DD, inclusive) or durationDays
+    - overwrite: replace existing plans (default true), otherwise those dates are skipped
+    """
+    try:
+        data = request.get_json() or {}
+        success, message, results = apply_plan_template(
+            template_id,
+            data.get('client_ids'),
+            data.get('start_date'),
+            end_date=data.get('end_date'),
+            duration_days=data.get('durationDays'),
+            overwrite=data.get('overwrite', True)
+        )
+        if not success:
+            return jsonify({'error': message}), 404 if message == "Template not found" else 400
+        return jsonify({'message': message, 'results': results}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -577,7 +705,13 @@ def get_client_progress_data():
         if not all([client_id, metric, duration]):
             return jsonify({'error': 'client_id, metric and duration are required'}), 400
 
-        success, message, data = get_progress_data(client_id, metric, duration)
+        # Optional (YYYY-MM-DD): only the points from this date on, the app asks for the range it shows
+        try:
+            since = datetime.strptime(request.args['since'], '%Y-%m-%d').date() if request.args.get('since') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        success, message, data = get_progress_data(client_id, metric, duration, since=since)
 
         if success:
             return jsonify({'success': True, 'data': data}), 200
@@ -589,16 +723,122 @@ def get_client_progress_data():
         return jsonify({'error': 'Server error'}), 500
 
 
+# Mobile (Progress Tab, every graph in one request)
+@dietitian_bp.route('/progress-data/combined', methods=['GET'])
+def get_client_progress_data_combined():
+    """
+    ?client_id=...&metrics=weight,bodyfat,adherence&durations=weekly,monthly[&since=YYYY-MM-DD]
+    Response: {'success': True, 'data': {metric: {duration: [{'date', 'value'}, ...]}}}, ETag / If-None-Match -> 304
+    """
+    try:
+        client_id = request.args.get('client_id')
+        metrics = [m for m in request.args.get('metrics', 'weight,bodyfat,adherence').split(',') if m]
+        durations = [d for d in request.args.get('durations', 'weekly,monthly').split(',') if d]
+
+        if not client_id:
+            return jsonify({'error': 'client_id is required'}), 400
+        if not metrics or any(m not in PROGRESS_METRICS for m in metrics):
+            return jsonify({'success': False, 'error': f"metrics must be a subset of {', '.join(PROGRESS_METRICS)}"}), 400
+        if not durations or any(d not in PROGRESS_DURATIONS for d in durations):
+            return jsonify({'success': False, 'error': f"durations must be a subset of {', '.join(PROGRESS_DURATIONS)}"}), 400
+
+        try:
+            since = datetime.strptime(request.args['since'], '%Y-%m-%d').date() if request.args.get('since') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        # Computed before the data: if the data changes in between, the next request simply gets a new ETag
+        etag = progress_data_etag(client_id, metrics, durations, since)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            success, message, data = get_progress_metrics(client_id, metrics, durations, since=since)
+            if not success:
+                return jsonify({'success': False, 'error': message}), 400
+            response = jsonify({'success': True, 'data': data})
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    except Exception as e:
+        print(f"Error in get_client_progress_data_combined: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
+
+
 # Web (Progress PDF Report)
 @dietitian_bp.route('/clients/progress-report', methods=['GET'])
 def get_progress_report():
     try:
         client_id = request.args.get('client_id')
         option = request.args.get('option', 'all')  # 'weekly' or 'monthly' or 'all' if option is not exists in json format, the default is all.
-        buf, error = create_pdf_report(client_id, option)
-        if error:
-            return jsonify({'error': error}), 404
-        return send_file(buf, mimetype='application/pdf',
+        # Cached on disk by (client, option, data fingerprint), only rendered when the data changed.
+        # Rendered by the report job, a report not ready within REPORT_SYNC_TIMEOUT_SECONDS answers 202 + job URLs
+        success, message, job = get_or_wait_report(client_id, option)
+        if not success:
+            return jsonify({'error': message}), 404
+        if job['status'] != 'done':
+            job['statusUrl'] = url_for('dietitian.get_progress_report_job', job_id=job['jobId'])
+            job['downloadUrl'] = url_for('dietitian.download_progress_report', job_id=job['jobId'])
+            return jsonify({'message': message, **job}), 202
+        return send_file(report_path(job['jobId']), mimetype='application/pdf',
+                         as_attachment=True,
+                         download_name=f'progress_report_{client_id}.pdf')
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+# Web (Progress PDF Report, background job)
+@dietitian_bp.route('/clients/progress-report/jobs', methods=['POST'])
+def create_progress_report_job():
+    """
+    Start generating a progress report in the background.
+
+    Expected JSON body:
+    - client_id
+    - option: 'weekly' | 'monthly' | 'all' (default)
+    """
+    try:
+        data = request.get_json() or {}
+        client_id = data.get('client_id')
+        if not client_id:
+            return jsonify({'error': 'client_id is required'}), 400
+
+        success, message, job = submit_report_job(client_id, data.get('option', 'all'))
+        if not success:
+            return jsonify({'error': message}), 404
+
+        job['statusUrl'] = url_for('dietitian.get_progress_report_job', job_id=job['jobId'])
+        job['downloadUrl'] = url_for('dietitian.download_progress_report', job_id=job['jobId'])
+        return jsonify({'message': message, **job}), 200 if job['status'] == 'done' else 202
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@dietitian_bp.route('/clients/progress-report/jobs/<job_id>', methods=['GET'])
+def get_progress_report_job(job_id):
+    try:
+        job = get_report_job(job_id)
+        if not job:
+            return jsonify({'error': 'Report job not found'}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dietitian_bp.route('/clients/progress-report/jobs/<job_id>/download', methods=['GET'])
+def download_progress_report(job_id):
+    try:
+        job = get_report_job(job_id)
+        if not job:
+            return jsonify({'error': 'Report job not found'}), 404
+        if job['status'] == 'failed':
+            return jsonify({'error': job['error'] or 'Report generation failed'}), 500
+        if job['status'] != 'done':
+            return jsonify({'error': 'Report is not ready yet', 'status': job['status']}), 409
+
+        # Streamed from the file on disk
+        client_id = job_id.rsplit('_', 2)[0]
+        return send_file(report_path(job_id), mimetype='application/pdf',
                          as_attachment=True,
                          download_name=f'progress_report_{client_id}.pdf')
     except Exception as e:
@@ -607,6 +847,7 @@ def get_progress_report():
 
 # to get items from database and use them when addin a meal to client.
 @dietitian_bp.route('/items', methods=['GET'])
+@conditional_cache(_items_versions, extra=_catalog_fingerprint)
 def get_available_items():
     try:
         # Call the service function
@@ -616,6 +857,49 @@ def get_available_items():
         return jsonify({'error': str(e)}), 500
 
 
+# Web (Meal Planner): "foods similar to X" by per-100g macros
+@dietitian_bp.route('/items/<item_id>/similar', methods=['GET'])
+def get_similar_items(item_id):
+    """
+    Query params:
+    - k (optional, default 10, max 50)
+    - category (optional): only items of this category
+    - role (optional): dominant macro, 'protein' | 'carb' | 'fat'
+    """
+    try:
+        k = request.args.get('k', default=10, type=int)
+        category = request.args.get('category')
+        role = request.args.get('role')
+
+        success, message, items = find_similar_items(item_id, k=min(k or 0, 50), category=category, role=role)
+
+        if success:
+            return jsonify({'success': True, 'item_id': item_id, 'similar': items}), 200
+
+        return jsonify({'success': False, 'error': message}), 404 if message == "Item not found" else 400
+
+    except Exception as e:
+        print(f"Error in get_similar_items: {str(e)}")
+        return jsonify({'error': 'Server error'}), 500
+
+
+# Monitoring: in-process cache counters (per worker)
+@dietitian_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    try:
+        return jsonify({
+            'itemCatalog': get_item_catalog_stats(),
+            'macroIndex': get_macro_index_stats(),
+            'llmAlternatives': get_llm_cache_stats(),
+            'suggestionStore': get_suggestion_store_stats(),
+            'fruitRecommendations': get_fruit_recommendation_cache_stats(),
+            'responseCache': get_response_cache_stats(),
+            'dataVersions': get_data_version_stats()
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 from flask import jsonify 
 from models.models import ClientMealPreference # Table model
 
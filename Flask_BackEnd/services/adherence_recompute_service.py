@@ -0,0 +1,122 @@
+from models.models import Client, ClientProgressSnapshot, DailyMealPlan, Meal, MealItem
+from db_config import db
+from sqlalchemy import func, case, insert, delete
+from itertools import groupby
+
+# ClientProgressSnapshot'ları MealItem.isFollowed geçmişinden yeniden kurar (flask recompute-adherence).
+# Canlı yol (progress_snapshot_service) sadece ileriye doğru sayaç artırır, bozuk / eksik satırı düzeltemez.
+# Danışanlar ClientID keyset'i ile batch batch işlenir, her batch için:
+#   1 grouped aggregate (ClientID, PlanDate -> success, total), Python'da kümülatif toplam,
+#   1 sorgu mevcut snapshot'lar, sadece farklı olan danışanların satırları silinip tek executemany ile yazılır,
+#   batch başına bir commit.
+# Gün = DailyMealPlan.PlanDate (feedback'in verildiği gün değil), isFollowed NULL olan item'lar sayılmaz.
+
+
+def _aggregate_feedback(client_ids):
+    """
+    Returns:
+        dict: {client_id: [(plan_date, success, total), ...]} ordered by date, only days with feedback
+    """
+    rows = db.session.query(
+        DailyMealPlan.ClientID,
+        DailyMealPlan.PlanDate,
+        func.sum(case((MealItem.isFollowed.is_(True), 1), else_=0)),
+        func.count(MealItem.isFollowed),
+    ).join(Meal, Meal.MealPlanID == DailyMealPlan.MealPlanID)\
+        .join(MealItem, MealItem.MealID == Meal.MealID)\
+        .filter(DailyMealPlan.ClientID.in_(client_ids), MealItem.isFollowed.isnot(None))\
+        .group_by(DailyMealPlan.ClientID, DailyMealPlan.PlanDate)\
+        .order_by(DailyMealPlan.ClientID.asc(), DailyMealPlan.PlanDate.asc()).all()
+
+    return {
+        client_id: [(plan_date, int(success or 0), int(total or 0)) for _, plan_date, success, total in days]
+        for client_id, days in groupby(rows, key=lambda r: r[0])
+    }
+
+
+def _cumulative_snapshots(days):
+    """
+    Daily counts -> cumulative {date: (success, total)}, the format ClientProgressSnapshot stores
+    """
+    snapshots = {}
+    success_sum = total_sum = 0
+    for plan_date, success, total in days:
+        success_sum += success
+        total_sum += total
+        snapshots[plan_date] = (success_sum, total_sum)
+    return snapshots
+
+
+def recompute_adherence(client_id=None, batch_size=1000, dry_run=False):
+    """
+    Rebuild the cumulative adherence snapshots of one client or of every client.
+
+    Args:
+        client_id (str, optional): only this client
+        batch_size (int): clients per batch (one aggregate query and one commit per batch)
+        dry_run (bool): only report the clients whose snapshots differ
+
+    Returns:
+        dict: {'clients', 'changedClients', 'snapshotsWritten', 'snapshotsDeleted'}
+    """
+    report = {
+        'clients': 0,
+        'changedClients': 0,
+        'snapshotsWritten': 0,
+        'snapshotsDeleted': 0,
+    }
+
+    last_client_id = ''
+    while True:
+        if client_id:
+            if last_client_id:
+                break
+            client_ids = [client_id]
+        else:
+            client_ids = [c for (c,) in db.session.query(Client.ClientID)
+                          .filter(Client.ClientID > last_client_id)
+                          .order_by(Client.ClientID.asc()).limit(batch_size).all()]
+        if not client_ids:
+            break
+        last_client_id = client_ids[-1]
+
+        computed = {c: _cumulative_snapshots(days) for c, days in _aggregate_feedback(client_ids).items()}
+
+        existing = {}
+        for c, progress_date, success, total in db.session.query(
+            ClientProgressSnapshot.ClientID,
+            ClientProgressSnapshot.ProgressDate,
+            ClientProgressSnapshot.SuccessAmount,
+            ClientProgressSnapshot.Total,
+        ).filter(ClientProgressSnapshot.ClientID.in_(client_ids)).all():
+            existing.setdefault(c, {})[progress_date] = (int(success or 0), int(total or 0))
+
+        changed = [c for c in client_ids if computed.get(c, {}) != existing.get(c, {})]
+
+        report['clients'] += len(client_ids)
+        report['changedClients'] += len(changed)
+        report['snapshotsDeleted'] += sum(len(existing.get(c, {})) for c in changed)
+        rows = [
+            {'ClientID': c, 'ProgressDate': progress_date, 'SuccessAmount': success, 'Total': total}
+            for c in changed
+            for progress_date, (success, total) in computed.get(c, {}).items()
+        ]
+        report['snapshotsWritten'] += len(rows)
+
+        if dry_run or not changed:
+            continue
+
+        try:
+            db.session.execute(
+                delete(ClientProgressSnapshot).where(ClientProgressSnapshot.ClientID.in_(changed)),
+                execution_options={'synchronize_session': False}
+            )
+            if rows:
+                db.session.execute(insert(ClientProgressSnapshot), rows)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error recomputing adherence (clients {client_ids[0]}..{client_ids[-1]}): {e}")
+            raise
+
+    return report
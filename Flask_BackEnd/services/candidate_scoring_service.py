@@ -0,0 +1,142 @@
+from services.item_catalog_service import get_catalog_items, get_item_catalog_version
+import threading
+import numpy as np
+
+# Vectorized scoring for _prefilter_candidates (LLM alternative prefiltering).
+# Catalogun protein/carb/fat/kcal değerleri NumPy dizilerinde tutulur, sadece katalog değişince yeniden oluşturulur.
+# Puanlama eski Python döngüsüyle birebir aynı: kalori benzerliği (max 40) + makro L1 mesafesi (max 40) + aynı baskın makro (+20)
+
+CALORIE_SCORE_MAX = 40
+MACRO_SCORE_MAX = 40
+ROLE_BONUS = 20
+ROLES = ('protein', 'carb', 'fat')  # argmax order, ties pick the first one like max(dict, key=...)
+
+_lock = threading.Lock()
+_arrays_cache = {
+    'version': None,
+    'arrays': None,
+}
+
+
+def build_macro_arrays(entries):
+    """
+    Build per-100g macro arrays from catalog entries (item_catalog_service format)
+
+    Returns:
+        dict: ids, names, protein, carb, fat, kcal, role (index into ROLES)
+    """
+    protein = np.fromiter((e['ItemProtein'] for e in entries), dtype=np.float64, count=len(entries))
+    carb = np.fromiter((e['ItemCarb'] for e in entries), dtype=np.float64, count=len(entries))
+    fat = np.fromiter((e['ItemFat'] for e in entries), dtype=np.float64, count=len(entries))
+
+    return {
+        'ids': np.fromiter((e['ItemID'] for e in entries), dtype=np.int64, count=len(entries)),
+        'names': [e['ItemName'] for e in entries],
+        'categories': [e.get('ItemCategory') for e in entries],
+        'protein': protein,
+        'carb': carb,
+        'fat': fat,
+        'kcal': protein * 4 + carb * 4 + fat * 9,
+        'role': np.argmax(np.stack([protein, carb, fat], axis=1), axis=1) if len(entries) else np.empty(0, dtype=np.int64),
+    }
+
+
+def get_catalog_macro_arrays():
+    """
+    Macro arrays of the current Item catalog, rebuilt only when the catalog version changes
+    """
+    version = get_item_catalog_version()
+    arrays = _arrays_cache['arrays']
+
+    if arrays is not None and _arrays_cache['version'] == version:
+        return arrays
+
+    with _lock:
+        if _arrays_cache['arrays'] is None or _arrays_cache['version'] != version:
+            _arrays_cache['arrays'] = build_macro_arrays(get_catalog_items())
+            _arrays_cache['version'] = version
+        return _arrays_cache['arrays']
+
+
+def dominant_role(protein, carb, fat):
+    """
+    Dominant macro of an item: 'protein' | 'carb' | 'fat'
+    """
+    macros = {'protein': protein, 'carb': carb, 'fat': fat}
+    return max(macros, key=macros.get)
+
+
+def score_candidates(arrays, original_item_id, original_item, limit=12):
+    """
+    Score every catalog item against the original item and return the top `limit`.
+    Result format and order is the same as the old loop in _prefilter_candidates
+    (score rounded to 1 decimal, ties keep catalog order).
+
+    Returns:
+        list: [{'name', 'cal_per_100g', 'protein', 'carb', 'fat', 'score'}, ...] best first
+    """
+    if arrays['ids'].size == 0 or limit <= 0:
+        return []
+
+    orig_protein = original_item['ItemProtein'] or 0
+    orig_carb = original_item['ItemCarb'] or 0
+    orig_fat = original_item['ItemFat'] or 0
+    orig_cal = orig_protein * 4 + orig_carb * 4 + orig_fat * 9
+    orig_role = ROLES.index(dominant_role(orig_protein, orig_carb, orig_fat))
+
+    # Skip the original item itself
+    try:
+        candidates = np.flatnonzero(arrays['ids'] != int(original_item_id))
+    except (TypeError, ValueError):
+        candidates = np.arange(arrays['ids'].size)
+
+    if candidates.size == 0:
+        return []
+
+    p = arrays['protein'][candidates]
+    c = arrays['carb'][candidates]
+    f = arrays['fat'][candidates]
+    cal = arrays['kcal'][candidates]
+
+    # Calorie similarity (closer = better, max 40 points)
+    if orig_cal > 0:
+        cal_score = np.maximum(0, CALORIE_SCORE_MAX - (np.abs(cal - orig_cal) / orig_cal * CALORIE_SCORE_MAX))
+    else:
+        cal_score = np.full(candidates.size, 20.0)
+
+    # Macro similarity, L1 distance (closer = better, max 40 points)
+    macro_total = orig_protein + orig_carb + orig_fat
+    if macro_total > 0:
+        macro_diff = np.abs(p - orig_protein) + np.abs(c - orig_carb) + np.abs(f - orig_fat)
+        macro_score = np.maximum(0, MACRO_SCORE_MAX - (macro_diff / macro_total * MACRO_SCORE_MAX))
+    else:
+        macro_score = np.full(candidates.size, 20.0)
+
+    # Food role bonus (same dominant macro = +20 points)
+    role_bonus = np.where(arrays['role'][candidates] == orig_role, ROLE_BONUS, 0)
+
+    scores = np.round(cal_score + macro_score + role_bonus, 1)
+
+    # Top N without sorting the whole catalog; every item tied with the N-th score is kept
+    # so the final stable sort picks the same items as a full sort would
+    k = min(limit, candidates.size)
+    if k < candidates.size:
+        top = np.argpartition(-scores, k - 1)[:k]
+        pool = np.flatnonzero(scores >= scores[top].min())
+    else:
+        pool = np.arange(candidates.size)
+
+    order = pool[np.lexsort((pool, -scores[pool]))][:k]
+
+    result = []
+    for i in order:
+        idx = candidates[i]
+        result.append({
+            'name': arrays['names'][idx],
+            'cal_per_100g': round(float(arrays['kcal'][idx]), 1),
+            'protein': round(float(arrays['protein'][idx]), 1),
+            'carb': round(float(arrays['carb'][idx]), 1),
+            'fat': round(float(arrays['fat'][idx]), 1),
+            'score': float(scores[i]),
+        })
+    return result
@@ -0,0 +1,209 @@
+from services.item_catalog_service import get_catalog_item, resolve_item_names
+import json
+import re
+
+# MealItem.ChangedItem codec: tek yerde parse / encode / display.
+# DB'de üç format birikmişti:
+#   1) [{"item_id": "9", "name": "Kiwi", "portion": 100}, ...]   (list of objects)
+#   2) {"item_id": "9", "name": "Kiwi", "portion": 100}          (single object)
+#   3) "Kiwi - 100g, Banana - 80"                                 (legacy string, web + LLM feedback)
+# Canonical (yeni yazılan ve migrate edilen) format:
+#   [{"item_id": 9, "portion": 100}, ...]
+# İsim çözülemezse veri kaybolmasın diye {"item_id": null, "name": "...", "portion": 100} olarak saklanır.
+# Bu kalıba uymayan serbest metin ("Muz, 120g") olduğu gibi {"item_id": null, "name": "Muz, 120g", "portion": null}.
+# Eski satırlar için: flask migrate-changed-items
+
+# "Name - 100g" fragments; the name is lazy so names with commas ("Hindi eti (derisiz), kemiksiz - 100") survive.
+# The portion is the first " - <number>" after the name, the LLM shape "Kiwi - 100 - 61 - 1.1 - 14.7 - 0.5"
+# (name - portion - kcal - protein - carb - fat) carries 4 more numbers that are ignored here.
+# Only '.' is a decimal separator: ',' separates the fragments ("Elma - 1,5" is not a portion of 1.5).
+_LEGACY_FRAGMENT = re.compile(
+    r'\s*,?\s*(?P<name>.+?)\s*-\s*(?P<portion>\d+(?:\.\d+)?)\s*(?:g|gr|gram|grams)?'
+    r'(?:\s*-\s*\d+(?:\.\d+)?){0,4}?\s*(?=,|$)',
+    re.IGNORECASE
+)
+
+
+def _to_portion(value):
+    try:
+        return int(float(re.sub(r'\s*(g|gr|gram|grams)$', '', str(value).strip().lower()).replace(',', '.')))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_item_id(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_changed_item(value):
+    """
+    Parse any ChangedItem format (stored value or request payload) without resolving names.
+
+    Returns:
+        list: [{'item_id': int or None, 'name': str or None, 'portion': int or None}, ...]
+              (portion is None only for free text that is not "Name - 100g")
+    """
+    if value in (None, '', [], {}):
+        return []
+
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return []
+        if text.startswith('[') or text.startswith('{'):
+            try:
+                return parse_changed_item(json.loads(text))
+            except ValueError:
+                pass
+
+        entries = []
+        unmatched = text.replace('"', '')
+        for match in _LEGACY_FRAGMENT.finditer(text.replace('"', '')):
+            portion = _to_portion(match.group('portion'))
+            if portion is not None:
+                entries.append({'item_id': None, 'name': match.group('name').strip(), 'portion': portion})
+                unmatched = unmatched.replace(match.group(0), '', 1)
+
+        # Free text that is not (only) "Name - 100g" fragments ("Muz, 120g") is kept as-is, never dropped
+        if not entries or unmatched.strip(' ,'):
+            return [{'item_id': None, 'name': text, 'portion': None}]
+        return entries
+
+    if isinstance(value, dict):
+        value = [value]
+
+    entries = []
+    if isinstance(value, list):
+        for raw in value:
+            if not isinstance(raw, dict):
+                continue
+
+            portion = _to_portion(raw.get('portion'))
+            item_id = _to_item_id(raw.get('item_id'))
+            name = str(raw.get('name') or '').strip() or None
+
+            # Portion may only be missing on free-text entries (name without item_id)
+            if (item_id is None and not name) or (portion is None and item_id is not None):
+                continue
+            entries.append({'item_id': item_id, 'name': name, 'portion': portion})
+    return entries
+
+
+def resolve_entries(entries_list):
+    """
+    Attach catalog items to parsed entries of many ChangedItem values, names are resolved in one batch.
+
+    Args:
+        entries_list (list): list of parse_changed_item results
+
+    Returns:
+        list: same structure, every entry gets 'item' (catalog entry or None), 'item_id' and 'name' filled when known
+    """
+    by_name = resolve_item_names(
+        e['name'] for entries in entries_list for e in entries if e['item_id'] is None
+    )
+
+    resolved_list = []
+    for entries in entries_list:
+        resolved = []
+        for e in entries:
+            item = get_catalog_item(e['item_id']) if e['item_id'] is not None else by_name.get(e['name'])
+            resolved.append({
+                'item_id': item['ItemID'] if item else e['item_id'],
+                'name': item['ItemName'] if item else e['name'],
+                'portion': e['portion'],
+                'item': item,
+            })
+        resolved_list.append(resolved)
+    return resolved_list
+
+
+def decode_changed_item(value):
+    """
+    Parse + resolve a single ChangedItem value
+
+    Returns:
+        list: [{'item_id', 'name', 'portion', 'item'}, ...]
+    """
+    return resolve_entries([parse_changed_item(value)])[0]
+
+
+def to_canonical(resolved_entries):
+    """
+    Canonical storage form of resolved entries: [{'item_id': 9, 'portion': 100}, ...] or None
+    """
+    canonical = []
+    for e in resolved_entries:
+        if e['item_id'] is not None and e['portion'] is not None:
+            canonical.append({'item_id': e['item_id'], 'portion': e['portion']})
+        elif e['name']:
+            canonical.append({'item_id': None, 'name': e['name'], 'portion': e['portion']})
+    return canonical or None
+
+
+def encode_changed_item(value):
+    """
+    Any accepted ChangedItem input -> canonical storage form (None if nothing usable)
+    """
+    return to_canonical(decode_changed_item(value))
+
+
+def is_canonical(value):
+    return isinstance(value, list) and all(
+        isinstance(e, dict) and set(e) <= {'item_id', 'portion', 'name'}
+        and (isinstance(e.get('item_id'), int) or (e.get('item_id') is None and 'name' in e))
+        and (isinstance(e.get('portion'), int) or (e.get('portion') is None and e.get('item_id') is None))
+        and ('name' not in e or e.get('item_id') is None)
+        for e in value
+    )
+
+
+def format_display(entries):
+    """
+    Human readable form of resolved entries used by the API responses: "Kiwi - 100, Banana - 80" (None if empty).
+    Same string the old format_changed_item_for_db stored.
+    """
+    parts = [e['name'] if e['portion'] is None else f"{e['name']} - {e['portion']}" for e in entries if e['name']]
+    return ", ".join(parts) if parts else None
+
+
+def changed_item_display(value):
+    return format_display(decode_changed_item(value))
+
+
+def changed_item_nutrition(entry):
+    """
+    Nutrition of a resolved entry's portion
+
+    Returns:
+        tuple: (kcal, protein, carb, fat) or None if the item is unknown
+    """
+    item = entry['item']
+    if not item or entry['portion'] is None:
+        return None
+
+    ratio = entry['portion'] / 100.0
+    protein = item['ItemProtein'] * ratio
+    carb = item['ItemCarb'] * ratio
+    fat = item['ItemFat'] * ratio
+    return (protein * 4 + carb * 4 + fat * 9, protein, carb, fat)
+
+
+def format_mobile(entries):
+    """
+    Mobile format of resolved entries: "name,portion,kcal,protein,carb,fat;..." (unknown items are skipped, None if empty)
+    """
+    parts = []
+    for e in entries:
+        nutrition = changed_item_nutrition(e)
+        if not nutrition:
+            continue
+        kcal, protein, carb, fat = nutrition
+        parts.append(
+            f"{e['name']},{e['portion']},{round(kcal)},"
+            f"{round(protein, 1)},{round(carb, 1)},{round(fat, 1)}"
+        )
+    return ';'.join(parts) if parts else None
@@ -0,0 +1,65 @@
+from models.models import MealItem
+from db_config import db
+from sqlalchemy import or_, and_
+from services.changed_item_codec import parse_changed_item, resolve_entries, to_canonical, is_canonical
+
+
+def migrate_changed_items(batch_size=1000, dry_run=False):
+    """
+    Rewrite every MealItem.ChangedItem into the canonical [{item_id, portion}] form, chunk by chunk
+    (keyset over MealID, ItemID, one commit per chunk). Values that cannot be parsed are left untouched.
+
+    Returns:
+        dict: {'scanned', 'rewritten', 'alreadyCanonical', 'unparseable', 'unresolvedNames'}
+    """
+    report = {
+        'scanned': 0,
+        'rewritten': 0,
+        'alreadyCanonical': 0,
+        'unparseable': 0,
+        'unresolvedNames': 0,
+    }
+
+    last_key = (0, 0)
+    while True:
+        rows = db.session.query(MealItem.MealID, MealItem.ItemID, MealItem.ChangedItem)\
+            .filter(MealItem.ChangedItem.isnot(None))\
+            .filter(or_(
+                MealItem.MealID > last_key[0],
+                and_(MealItem.MealID == last_key[0], MealItem.ItemID > last_key[1])
+            ))\
+            .order_by(MealItem.MealID.asc(), MealItem.ItemID.asc())\
+            .limit(batch_size).all()
+
+        if not rows:
+            break
+        last_key = (rows[-1].MealID, rows[-1].ItemID)
+
+        # JSON null values come back as None
+        rows = [r for r in rows if r.ChangedItem not in (None, '', [], {})]
+        report['scanned'] += len(rows)
+
+        # Names of the whole chunk are resolved at once
+        resolved_list = resolve_entries([parse_changed_item(r.ChangedItem) for r in rows])
+
+        updates = []
+        for row, resolved in zip(rows, resolved_list):
+            if is_canonical(row.ChangedItem) and all(e['item_id'] is not None for e in row.ChangedItem):
+                report['alreadyCanonical'] += 1
+                continue
+
+            canonical = to_canonical(resolved)
+            if canonical is None:
+                report['unparseable'] += 1
+                continue
+
+            report['unresolvedNames'] += sum(1 for e in canonical if e['item_id'] is None)
+            if canonical != row.ChangedItem:
+                updates.append({'MealID': row.MealID, 'ItemID': row.ItemID, 'ChangedItem': canonical})
+
+        report['rewritten'] += len(updates)
+        if updates and not dry_run:
+            db.session.bulk_update_mappings(MealItem, updates)
+            db.session.commit()
+
+    return report
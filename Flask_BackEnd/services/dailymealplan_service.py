@@ -1,6 +1,7 @@
 from models.models import DailyMealPlan
 from db_config import db
 from services.meal_service import get_meals_by_clientid_and_date
+from services.nutrition_totals_service import get_stored_totals
 from datetime import datetime, date
 
 
@@ -24,11 +25,15 @@ def get_daily_meal_plan(client_id, plan_date):
         # Get all meals for this plan using meal_service
         meals = get_meals_by_clientid_and_date(client_id, plan_date)
         
-        # Calculate daily totals from all meals
-        daily_total_calories = sum(meal['totalCalories'] for meal in meals)
-        daily_total_protein = sum(meal['totalProtein'] for meal in meals)
-        daily_total_carb = sum(meal['totalCarb'] for meal in meals)
-        daily_total_fat = sum(meal['totalFat'] for meal in meals)
+        # Daily totals stored on the plan, calculated from all meals for plans created before that
+        stored_totals = get_stored_totals(meal_plan)
+        if stored_totals:
+            daily_total_calories, daily_total_protein, daily_total_carb, daily_total_fat = stored_totals
+        else:
+            daily_total_calories = sum(meal['totalCalories'] for meal in meals)
+            daily_total_protein = sum(meal['totalProtein'] for meal in meals)
+            daily_total_carb = sum(meal['totalCarb'] for meal in meals)
+            daily_total_fat = sum(meal['totalFat'] for meal in meals)
         
         # Determine if this is current, past, or future plan
         today = date.today()
@@ -0,0 +1,146 @@
+import sqlite3
+import threading
+import uuid
+import os
+
+# Veri versiyon damgaları: "bu veri değişti mi?" sorusunun ucuz cevabı (HTTP ETag'leri, response_cache_service).
+# Yazan servisler commit'ten SONRA ilgili scope'u artırır:
+#   'meals:<client_id>'        plan oluşturma / template uygulama, feedback (manuel + LLM)
+#   'preferences:<client_id>'  tercih skorları (manuel değişiklikten öğrenme)
+#   'items'                    Item tablosu (invalidate_item_catalog)
+# Backend seçimi DATA_VERSION_BACKEND ile:
+#   - 'sqlite' (default): paylaşılan SQLite dosyası, her gunicorn worker'ı diğerlerinin yazdıklarını görür
+#   - 'memory': process içi sayaçlar, sadece tek worker için (diğer worker'lar eski ETag/body'yi sunmaya devam eder)
+# Epoch: memory'de process başına rastgele, sqlite'ta dosyada saklı. Restart sonrası sayaçlar sıfırdan başlasa da
+# eski ETag'ler yeni verilerle eşleşmez.
+
+DATA_VERSION_BACKEND = os.getenv('DATA_VERSION_BACKEND', 'sqlite').lower()
+DATA_VERSION_PATH = os.getenv('DATA_VERSION_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'data_versions.sqlite3'
+)
+
+
+def data_version_name(scope, key=None):
+    return scope if key is None else f"{scope}:{key}"
+
+
+class MemoryDataVersions:
+    """
+    In-process counters: name -> version
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, names):
+        with self._lock:
+            return tuple(self._versions.get(name, 0) for name in names)
+
+    def bump_many(self, names):
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def size(self):
+        return len(self._versions)
+
+
+class SQLiteDataVersions:
+    """
+    Shared SQLite file, same versions for every worker process
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self.epoch = None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS data_version (
+                    name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            """)
+            # Epoch row is written once per file, every worker reads the same one
+            conn.execute("INSERT OR IGNORE INTO data_version (name, version) VALUES ('__epoch__', ?)",
+                         (uuid.uuid4().int & 0x7FFFFFFF,))
+            conn.commit()
+            self.epoch = conn.execute("SELECT version FROM data_version WHERE name = '__epoch__'").fetchone()[0]
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, names):
+        names = list(names)
+        conn = self._connection()
+        rows = dict(conn.execute(
+            f"SELECT name, version FROM data_version WHERE name IN ({','.join('?' * len(names))})",
+            names
+        ).fetchall()) if names else {}
+        return tuple(rows.get(name, 0) for name in names)
+
+    def bump_many(self, names):
+        conn = self._connection()
+        conn.executemany(
+            """
+            INSERT INTO data_version (name, version) VALUES (?, 1)
+            ON CONFLICT(name) DO UPDATE SET version = version + 1
+            """,
+            [(name,) for name in names]
+        )
+        conn.commit()
+
+    def size(self):
+        return self._connection().execute("SELECT COUNT(*) - 1 FROM data_version").fetchone()[0]
+
+
+def _create_versions():
+    if DATA_VERSION_BACKEND == 'memory':
+        return MemoryDataVersions()
+    if DATA_VERSION_BACKEND != 'sqlite':
+        print(f"Unknown DATA_VERSION_BACKEND '{DATA_VERSION_BACKEND}', using sqlite")
+    return SQLiteDataVersions(DATA_VERSION_PATH)
+
+
+_versions = _create_versions()
+
+
+def get_data_versions(names):
+    """
+    Current versions of the given names, one lookup for all of them
+
+    Returns:
+        tuple: (epoch, (version, ...)), raises if the backend is unavailable
+    """
+    versions = _versions.get_many(names)
+    return _versions.epoch, versions
+
+
+def bump_data_version(scope, *keys):
+    """
+    Mark `scope` (for each key, or the whole scope without keys) as changed. Call after the commit.
+    Errors are only logged: the write itself already succeeded.
+    """
+    names = [data_version_name(scope, key) for key in keys] if keys else [scope]
+    try:
+        _versions.bump_many(names)
+    except Exception as e:
+        print(f"Error in bump_data_version({names}): {str(e)}")
+
+
+def get_data_version_stats():
+    try:
+        size = _versions.size()
+    except Exception:
+        size = None
+    return {
+        'backend': 'sqlite' if isinstance(_versions, SQLiteDataVersions) else 'memory',
+        'names': size,
+    }
@@ -0,0 +1,321 @@
+from models.models import Item
+from db_config import db
+from services.item_service import calculate_item_calories
+from services.data_version_service import bump_data_version
+from sqlalchemy import func
+import threading
+import time
+import os
+
+# Process-wide, read-mostly copy of the Item table.
+# Item katalogu küçük ve nadiren değişiyor, bu yüzden her istekte satır satır SELECT atmak yerine
+# bütün tabloyu bir kez belleğe alıyoruz. create_meal_plan yeni item eklediğinde invalidate ediliyor.
+# Diğer worker'ların eklediği item'lar için (gunicorn vb.) COUNT/MAX parmak izi belli aralıklarla kontrol edilir.
+
+CATALOG_CHECK_INTERVAL_SECONDS = float(os.getenv('ITEM_CATALOG_CHECK_INTERVAL', 30))
+# resolve_item_names: names checked against the DB and not found are remembered until the next rebuild / invalidation
+# (free-text ChangedItem values would otherwise hit the DB on every /meals and plan history read)
+MISSING_NAMES_MAX = int(os.getenv('ITEM_CATALOG_MISSING_NAMES_MAX', 10000))
+
+_lock = threading.Lock()
+
+_catalog = {
+    'loaded': False,
+    'version': 0,
+    'fingerprint': None,
+    'checked_at': 0.0,
+    'items': [],            # entries in ItemID order
+    'by_id': {},
+    'by_name': {},
+    'by_folded_name': {},
+    'missing_names': set(),  # names known not to be in the Item table (this catalog version)
+}
+
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'rebuilds': 0,
+    'invalidations': 0,
+    'bulkLookups': 0,
+    'bulkDbQueries': 0,
+    'knownMissingNames': 0,
+}
+
+# Turkish-aware folding: "İ".casefold() is "i̇" (i + combining dot) and "I" would not match "ı",
+# so all of İ / I / ı are mapped to plain "i" before casefold ("HİNDİ ETİ" == "Hindi eti" == "hındı etı")
+_TURKISH_FOLD = str.maketrans({'İ': 'i', 'I': 'i', 'ı': 'i'})
+
+
+def fold_item_name(name):
+    """
+    Case-folded key used for case-insensitive name lookups (replaces Item.ItemName.ilike(name))
+    """
+    if name is None:
+        return None
+    return str(name).strip().translate(_TURKISH_FOLD).casefold()
+
+
+def _build_entry(row):
+    """
+    Build a catalog entry with precomputed per-100g kcal and macros.
+    Same keys as item_service.get_item_by_id + ItemCalories.
+    """
+    protein = float(row.ItemProtein) if row.ItemProtein else 0
+    carb = float(row.ItemCarb) if row.ItemCarb else 0
+    fat = float(row.ItemFat) if row.ItemFat else 0
+
+    return {
+        'ItemID': row.ItemID,
+        'ItemName': row.ItemName,
+        'ItemProtein': protein,
+        'ItemCarb': carb,
+        'ItemFat': fat,
+        'ItemCategory': row.ItemCategory,
+        'ItemCalories': calculate_item_calories(protein, carb, fat),
+    }
+
+
+def _read_fingerprint():
+    # Items are only ever inserted, so (count, max id) changes whenever the table changes
+    count, max_id = db.session.query(func.count(Item.ItemID), func.max(Item.ItemID)).one()
+    return (count, max_id)
+
+
+def _rebuild_locked():
+    # Column query on purpose: loading Item ORM objects would also selectin-load
+    # every MealItem and ClientMealPreference row attached to each item.
+    rows = db.session.query(
+        Item.ItemID,
+        Item.ItemName,
+        Item.ItemCategory,
+        Item.ItemProtein,
+        Item.ItemCarb,
+        Item.ItemFat,
+    ).order_by(Item.ItemID.asc()).all()
+
+    items = []
+    by_id = {}
+    by_name = {}
+    by_folded_name = {}
+
+    for row in rows:
+        entry = _build_entry(row)
+        items.append(entry)
+        by_id[entry['ItemID']] = entry
+        by_name[entry['ItemName']] = entry
+        # First match wins, same as .first() on an ilike query ordered by ItemID
+        by_folded_name.setdefault(fold_item_name(entry['ItemName']), entry)
+
+    _catalog['items'] = items
+    _catalog['by_id'] = by_id
+    _catalog['by_name'] = by_name
+    _catalog['by_folded_name'] = by_folded_name
+    _catalog['missing_names'] = set()
+    _catalog['fingerprint'] = (len(items), items[-1]['ItemID'] if items else None)
+    _catalog['checked_at'] = time.monotonic()
+    _catalog['loaded'] = True
+    _catalog['version'] += 1
+    _stats['rebuilds'] += 1
+
+
+def _ensure_fresh(force_check=False):
+    """
+    Load the catalog if needed. Every CATALOG_CHECK_INTERVAL_SECONDS (or when forced)
+    compare the table fingerprint to catch items inserted by other worker processes.
+    """
+    now = time.monotonic()
+
+    if _catalog['loaded'] and not force_check and now - _catalog['checked_at'] < CATALOG_CHECK_INTERVAL_SECONDS:
+        return
+
+    with _lock:
+        if not _catalog['loaded']:
+            _rebuild_locked()
+            return
+
+        if not force_check and time.monotonic() - _catalog['checked_at'] < CATALOG_CHECK_INTERVAL_SECONDS:
+            return  # another thread already checked
+
+        if _read_fingerprint() != _catalog['fingerprint']:
+            _rebuild_locked()
+        else:
+            _catalog['checked_at'] = time.monotonic()
+
+
+def _normalize_item_id(item_id):
+    # IDs come both as int (DB) and str (JSON bodies, query params)
+    try:
+        return int(item_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_catalog_items():
+    """
+    Get all catalog entries (ItemID order)
+
+    Returns:
+        list: catalog entries, must be treated as read-only
+    """
+    _ensure_fresh()
+    return _catalog['items']
+
+
+def get_catalog_item(item_id):
+    """
+    Get a catalog entry by ItemID
+
+    Returns:
+        dict: catalog entry (read-only) or None if not found
+    """
+    key = _normalize_item_id(item_id)
+    if key is None:
+        _stats['misses'] += 1
+        return None
+
+    _ensure_fresh()
+    entry = _catalog['by_id'].get(key)
+
+    if entry is None:
+        # Real ItemIDs come from DB rows, a miss usually means another worker inserted it
+        _ensure_fresh(force_check=True)
+        entry = _catalog['by_id'].get(key)
+
+    if entry is None:
+        _stats['misses'] += 1
+    else:
+        _stats['hits'] += 1
+    return entry
+
+
+def get_catalog_item_by_name(name, case_insensitive=False):
+    """
+    Get a catalog entry by ItemName.
+    case_insensitive=False -> Item.query.filter_by(ItemName=name)
+    case_insensitive=True  -> Item.query.filter(Item.ItemName.ilike(name))
+
+    Returns:
+        dict: catalog entry (read-only) or None if not found
+    """
+    if not name:
+        _stats['misses'] += 1
+        return None
+
+    _ensure_fresh()
+
+    if case_insensitive:
+        entry = _catalog['by_folded_name'].get(fold_item_name(name))
+    else:
+        entry = _catalog['by_name'].get(name)
+
+    if entry is None:
+        _stats['misses'] += 1
+    else:
+        _stats['hits'] += 1
+    return entry
+
+
+def _lookup_name(name, case_insensitive):
+    entry = _catalog['by_name'].get(name)
+    if entry is None and case_insensitive:
+        entry = _catalog['by_folded_name'].get(fold_item_name(name))
+    return entry
+
+
+def resolve_item_names(names, case_insensitive=True):
+    """
+    Resolve many item names at once.
+    Exact ItemName first, then (case_insensitive=True) the Turkish-aware folded name,
+    same result as filter_by(ItemName=name).first() followed by ilike(name).first().
+    Names missing from the catalog are checked with ONE `ItemName IN (...)` query
+    (items inserted by another worker), the catalog is reloaded if any of them exists.
+
+    Returns:
+        dict: {name: catalog entry or None} for every non-empty name
+    """
+    names = {name for name in names if name}
+    if not names:
+        return {}
+
+    _ensure_fresh()
+    _stats['bulkLookups'] += 1
+
+    resolved = {name: _lookup_name(name, case_insensitive) for name in names}
+    missing_names = _catalog['missing_names']
+    missing = [name for name, entry in resolved.items() if entry is None and name not in missing_names]
+    _stats['knownMissingNames'] += sum(1 for name, entry in resolved.items() if entry is None and name in missing_names)
+
+    if missing:
+        _stats['bulkDbQueries'] += 1
+        # Uses the unique index on ItemName (no ilike)
+        found = db.session.query(Item.ItemID).filter(Item.ItemName.in_(missing)).first()
+        if found:
+            with _lock:
+                _rebuild_locked()
+            for name in missing:
+                resolved[name] = _lookup_name(name, case_insensitive)
+
+        with _lock:
+            # Same catalog version only (a rebuild in between starts a new set), bounded
+            if _catalog['missing_names'] is missing_names or found:
+                if len(_catalog['missing_names']) > MISSING_NAMES_MAX:
+                    _catalog['missing_names'] = set()
+                _catalog['missing_names'].update(name for name in missing if resolved[name] is None)
+
+    for entry in resolved.values():
+        if entry is None:
+            _stats['misses'] += 1
+        else:
+            _stats['hits'] += 1
+    return resolved
+
+
+def invalidate_item_catalog():
+    """
+    Drop the cached catalog, next access reloads it. Call after inserting/updating Item rows.
+    """
+    with _lock:
+        _catalog['loaded'] = False
+        _catalog['missing_names'] = set()
+        _catalog['version'] += 1
+        _stats['invalidations'] += 1
+    bump_data_version('items')
+
+
+def get_item_catalog_version():
+    """
+    Version number, bumped on every rebuild/invalidation (derived caches compare against it)
+    """
+    _ensure_fresh()
+    return _catalog['version']
+
+
+def get_item_catalog_fingerprint():
+    """
+    (count, max ItemID) of the loaded catalog, the same in every worker process (unlike the version number)
+    """
+    _ensure_fresh()
+    return _catalog['fingerprint']
+
+
+def get_item_catalog_stats():
+    """
+    Hit/miss counters of the catalog cache
+
+    Returns:
+        dict: counters + current size/version
+    """
+    lookups = _stats['hits'] + _stats['misses']
+    return {
+        'hits': _stats['hits'],
+        'misses': _stats['misses'],
+        'hitRatio': round(_stats['hits'] / lookups, 4) if lookups else None,
+        'rebuilds': _stats['rebuilds'],
+        'invalidations': _stats['invalidations'],
+        'bulkLookups': _stats['bulkLookups'],
+        'bulkDbQueries': _stats['bulkDbQueries'],
+        'knownMissingNames': _stats['knownMissingNames'],
+        'missingNames': len(_catalog['missing_names']),
+        'size': len(_catalog['items']) if _catalog['loaded'] else 0,
+        'version': _catalog['version'],
+    }
@@ -9,18 +9,22 @@ def get_item_by_id(item_id):
         dict: Item details or None if not found
     """
     try:
-        item = Item.query.filter_by(ItemID=item_id).first()
+        # Served from the in-process Item catalog (no SELECT per item)
+        # Local import: item_catalog_service imports the calorie helpers from this module
+        from services.item_catalog_service import get_catalog_item
+
+        item = get_catalog_item(item_id)
         
         if not item:
             return None
             
         return {
-            'ItemID': item.ItemID,
-            'ItemName': item.ItemName,
-            'ItemProtein': float(item.ItemProtein) if item.ItemProtein else 0,
-            'ItemCarb': float(item.ItemCarb) if item.ItemCarb else 0,
-            'ItemFat': float(item.ItemFat) if item.ItemFat else 0,
-            'ItemCategory': item.ItemCategory
+            'ItemID': item['ItemID'],
+            'ItemName': item['ItemName'],
+            'ItemProtein': item['ItemProtein'],
+            'ItemCarb': item['ItemCarb'],
+            'ItemFat': item['ItemFat'],
+            'ItemCategory': item['ItemCategory']
         }
     except Exception as e:
         print(f"Error in get_item_by_id: {str(e)}")
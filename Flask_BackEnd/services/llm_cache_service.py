@@ -0,0 +1,191 @@
+import sqlite3
+import threading
+import hashlib
+import json
+import time
+import os
+
+# Persistent cache for LLM meal alternatives (/alternative), SQLite on disk.
+# Aynı item + porsiyon + medikal bilgi + plan hedefi + aday listesi => aynı prompt, tekrar OpenAI'a gitmeye gerek yok.
+# Key: bu girdilerin normalize edilmiş hash'i. TTL ile süresi dolar, LLM_CACHE_MAX_ENTRIES aşılınca en eski erişilen (LRU) silinir.
+# SQLite dosyası tüm worker'lar arasında paylaşılır (gunicorn vb.).
+
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', '1') not in ('0', 'false', 'False')
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'llm_cache.sqlite3'
+)
+LLM_CACHE_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 10000))
+
+_local = threading.local()
+_stats_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'misses': 0,
+    'stores': 0,
+    'evictions': 0,
+    'apiCalls': 0,
+    'apiLatencyMsTotal': 0.0,
+    'savedLatencyMsTotal': 0.0,
+}
+
+
+def _connection():
+    # One connection per thread, sqlite3 connections must not be shared between threads
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_PATH, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                cache_key TEXT PRIMARY KEY,
+                responses TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                api_latency_ms REAL NOT NULL DEFAULT 0,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def _normalize(value):
+    # Whitespace and case differences must not create a different key
+    if isinstance(value, str):
+        return ' '.join(value.split()).casefold()
+    if isinstance(value, float):
+        return round(value, 1)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def make_cache_key(inputs):
+    """
+    Normalized SHA-256 of the prompt inputs (item, portion, medical text, plan goal, candidates, model, static prompt)
+
+    Returns:
+        str: hex digest
+    """
+    payload = json.dumps(_normalize(inputs), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def get_cached_responses(cache_key):
+    """
+    Get cached LLM responses for a key (expired entries are deleted)
+
+    Returns:
+        tuple: (responses: list or None, api_latency_ms: float)
+    """
+    if not LLM_CACHE_ENABLED:
+        return None, 0.0
+
+    try:
+        conn = _connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT responses, created_at, api_latency_ms FROM llm_cache WHERE cache_key = ?",
+            (cache_key,)
+        ).fetchone()
+
+        if row and now - row[1] <= LLM_CACHE_TTL_SECONDS:
+            conn.execute(
+                "UPDATE llm_cache SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (now, cache_key)
+            )
+            conn.commit()
+            return json.loads(row[0]), row[2]
+
+        if row:
+            conn.execute("DELETE FROM llm_cache WHERE cache_key = ?", (cache_key,))
+            conn.commit()
+
+        return None, 0.0
+
+    except Exception as e:
+        print(f"Error in get_cached_responses: {str(e)}")
+        return None, 0.0
+
+
+def store_responses(cache_key, responses, api_latency_ms):
+    """
+    Save (replace) the responses list of a key, then apply LRU eviction
+    """
+    if not LLM_CACHE_ENABLED:
+        return
+
+    try:
+        conn = _connection()
+        now = time.time()
+        conn.execute(
+            """
+            INSERT INTO llm_cache (cache_key, responses, created_at, last_access, api_latency_ms)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(cache_key) DO UPDATE SET
+                responses = excluded.responses,
+                last_access = excluded.last_access,
+                api_latency_ms = excluded.api_latency_ms
+            """,
+            (cache_key, json.dumps(responses, ensure_ascii=False), now, now, api_latency_ms)
+        )
+
+        # LRU eviction: keep only the most recently accessed LLM_CACHE_MAX_ENTRIES entries
+        evicted = conn.execute(
+            """
+            DELETE FROM llm_cache WHERE cache_key IN (
+                SELECT cache_key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (LLM_CACHE_MAX_ENTRIES,)
+        ).rowcount
+        conn.commit()
+
+        with _stats_lock:
+            _stats['stores'] += 1
+            _stats['evictions'] += max(evicted, 0)
+
+    except Exception as e:
+        print(f"Error in store_responses: {str(e)}")
+
+
+def record_cache_hit(api_latency_ms, lookup_ms):
+    with _stats_lock:
+        _stats['hits'] += 1
+        _stats['savedLatencyMsTotal'] += max(api_latency_ms - lookup_ms, 0)
+
+
+def record_cache_miss():
+    with _stats_lock:
+        _stats['misses'] += 1
+
+
+def record_api_call(latency_ms):
+    with _stats_lock:
+        _stats['apiCalls'] += 1
+        _stats['apiLatencyMsTotal'] += latency_ms
+
+
+def get_llm_cache_stats():
+    """
+    Hit ratio and saved latency of the LLM cache (this worker)
+    """
+    with _stats_lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            'enabled': LLM_CACHE_ENABLED,
+            'hits': _stats['hits'],
+            'misses': _stats['misses'],
+            'hitRatio': round(_stats['hits'] / lookups, 4) if lookups else None,
+            'stores': _stats['stores'],
+            'evictions': _stats['evictions'],
+            'apiCalls': _stats['apiCalls'],
+            'avgApiLatencyMs': round(_stats['apiLatencyMsTotal'] / _stats['apiCalls'], 1) if _stats['apiCalls'] else None,
+            'savedLatencyMs': round(_stats['savedLatencyMsTotal'], 1),
+        }
@@ -0,0 +1,231 @@
+from services.candidate_scoring_service import get_catalog_macro_arrays, ROLES
+import threading
+import os
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree  # pip install scipy
+except ImportError:  # scipy yoksa brute force (NumPy) ile aynı sonuç, sadece daha yavaş
+    cKDTree = None
+
+# Nearest-neighbour index over per-100g macro vectors (protein, carb, fat), "foods similar to X".
+# Aynı vektörler _prefilter_candidates tarafından da kullanılıyor (candidate_scoring_service).
+# Katalog sadece ItemID sırasıyla büyüdüğü için yeni item'lar küçük bir "delta" listesine eklenir
+# ve brute force aranır, delta büyüyünce KD-tree baştan kurulur.
+# category / role filtresi: ağacın satırları NumPy mask ile süzülür ve (category, role) başına ayrı bir
+# KD-tree ilk kullanımda kurulur (rebuild'e kadar cache'li). Böylece nadir bir kategori için de tek bir k-NN sorgusu,
+# tüm ağaçtan çekip Python'da filtreleme yok.
+
+DELTA_REBUILD_THRESHOLD = int(os.getenv('MACRO_INDEX_DELTA_REBUILD', 256))
+
+_lock = threading.Lock()
+_index = {
+    'arrays': None,         # catalog arrays the index was built from
+    'vectors': None,        # (n, 3) float array
+    'categories': None,     # normalized (strip + lower) ItemCategory per row
+    'tree': None,           # cKDTree over rows [0, tree_size)
+    'tree_size': 0,         # rows after tree_size are in the delta (brute force)
+    'partitions': {},       # (category, role index) -> (rows of [0, tree_size), cKDTree over them)
+    'rebuilds': 0,
+    'incremental_updates': 0,
+}
+
+
+def _macro_vectors(arrays):
+    return np.column_stack([arrays['protein'], arrays['carb'], arrays['fat']]) if arrays['ids'].size else np.empty((0, 3))
+
+
+def _normalized_categories(arrays):
+    return np.array([(c or '').strip().lower() for c in arrays['categories']], dtype=object)
+
+
+def _rebuild_locked(arrays):
+    vectors = _macro_vectors(arrays)
+    _index['arrays'] = arrays
+    _index['vectors'] = vectors
+    _index['categories'] = _normalized_categories(arrays)
+    _index['tree'] = cKDTree(vectors) if cKDTree is not None and len(vectors) else None
+    _index['tree_size'] = len(vectors)
+    _index['partitions'] = {}
+    _index['rebuilds'] += 1
+
+
+def _is_append_only(old_ids, new_ids):
+    # Items are only inserted (ItemID order), so old catalog must be a prefix of the new one
+    return new_ids.size >= old_ids.size and np.array_equal(new_ids[:old_ids.size], old_ids)
+
+
+def _sync_index():
+    """
+    Bring the index up to date with the catalog arrays.
+    New items go to the delta, full rebuild when the delta is too big or the catalog was not just appended to.
+    """
+    arrays = get_catalog_macro_arrays()
+    if _index['arrays'] is arrays:
+        return
+
+    with _lock:
+        if _index['arrays'] is arrays:
+            return
+
+        if _index['arrays'] is None or not _is_append_only(_index['arrays']['ids'], arrays['ids']):
+            _rebuild_locked(arrays)
+            return
+
+        delta_size = arrays['ids'].size - _index['tree_size']
+        if delta_size > DELTA_REBUILD_THRESHOLD:
+            _rebuild_locked(arrays)
+            return
+
+        # Incremental: keep the tree (and the partitions, they only cover tree rows), only new rows are added
+        _index['vectors'] = _macro_vectors(arrays)
+        _index['categories'] = _normalized_categories(arrays)
+        _index['arrays'] = arrays
+        _index['incremental_updates'] += 1
+
+
+def _filter_mask(index, start, stop, category, role_idx):
+    """
+    Boolean mask of rows [start, stop) passing the category / role filters
+    """
+    mask = np.ones(stop - start, dtype=bool)
+    if category is not None:
+        mask &= index['categories'][start:stop] == category
+    if role_idx is not None:
+        mask &= index['arrays']['role'][start:stop] == role_idx
+    return mask
+
+
+def _partition(index, category, role_idx):
+    """
+    Rows of the tree passing the filters and a KD-tree over them, built on first use.
+    Unfiltered queries use the main tree.
+
+    Returns:
+        tuple: (rows array or None for all tree rows, cKDTree or None if empty)
+    """
+    if category is None and role_idx is None:
+        return None, index['tree']
+
+    key = (category, role_idx)
+    partition = index['partitions'].get(key)
+    if partition is None:
+        rows = np.flatnonzero(_filter_mask(index, 0, index['tree_size'], category, role_idx))
+        partition = (rows, cKDTree(index['vectors'][rows]) if rows.size else None)
+        with _lock:
+            # Only if the index was not rebuilt in the meantime
+            if index['partitions'] is _index['partitions']:
+                index['partitions'][key] = partition
+    return partition
+
+
+def _query_tree(tree, rows, point, k, exclude_row):
+    # One k-NN query over an already filtered tree, k + 1 in case the origin item is in it
+    size = tree.n
+    distances, positions = tree.query(point, k=min(size, k + 1))
+    found = []
+    for d, position in zip(np.atleast_1d(distances), np.atleast_1d(positions)):
+        if position >= size:
+            continue
+        row = int(rows[position]) if rows is not None else int(position)
+        if row != exclude_row:
+            found.append((float(d), row))
+    return found[:k]
+
+
+def _query_brute_force(vectors, point, rows, k):
+    if rows.size == 0:
+        return []
+    distances = np.sqrt(((vectors[rows] - point) ** 2).sum(axis=1))
+    order = np.argsort(distances, kind='stable')[:k]
+    return [(float(distances[i]), int(rows[i])) for i in order]
+
+
+def find_similar_items(item_id, k=10, category=None, role=None):
+    """
+    Find the k items whose per-100g macros (protein, carb, fat) are closest to the given item.
+
+    Args:
+        category (str, optional): only items of this ItemCategory (case-insensitive)
+        role (str, optional): only items whose dominant macro is 'protein' | 'carb' | 'fat'
+
+    Returns:
+        tuple: (success: bool, message: str, items: list)
+    """
+    try:
+        if k is None or k < 1:
+            return False, "k must be a positive integer", []
+
+        role_idx = None
+        if role:
+            role = role.strip().lower()
+            if role not in ROLES:
+                return False, f"Invalid role: {role} (protein, carb or fat)", []
+            role_idx = ROLES.index(role)
+
+        category = category.strip().lower() if category else None
+
+        _sync_index()
+        index = dict(_index)  # consistent snapshot, a rebuild replaces the entries
+        arrays = index['arrays']
+        vectors = index['vectors']
+        tree_size = index['tree_size'] if index['tree'] is not None else 0
+
+        try:
+            matches = np.flatnonzero(arrays['ids'] == int(item_id))
+        except (TypeError, ValueError):
+            matches = np.empty(0, dtype=np.int64)
+
+        if matches.size == 0:
+            return False, "Item not found", []
+
+        origin_row = int(matches[0])
+        point = vectors[origin_row]
+
+        found = []
+        if tree_size:
+            rows, tree = _partition(index, category, role_idx)
+            if tree is not None:
+                found.extend(_query_tree(tree, rows, point, k, origin_row))
+
+        # Rows not in the tree (delta, or everything when scipy is not installed), filtered with a mask
+        rest = np.arange(tree_size, arrays['ids'].size)
+        rest = rest[_filter_mask(index, tree_size, arrays['ids'].size, category, role_idx)]
+        found.extend(_query_brute_force(vectors, point, rest[rest != origin_row], k))
+        found.sort(key=lambda x: (x[0], x[1]))
+
+        similar = []
+        for distance, row in found[:k]:
+            similar.append({
+                'item_id': int(arrays['ids'][row]),
+                'item_name': arrays['names'][row],
+                'item_category': arrays['categories'][row],
+                'cal_per_100g': round(float(arrays['kcal'][row]), 1),
+                'protein': round(float(arrays['protein'][row]), 1),
+                'carb': round(float(arrays['carb'][row]), 1),
+                'fat': round(float(arrays['fat'][row]), 1),
+                'role': ROLES[int(arrays['role'][row])],
+                'distance': round(distance, 3),
+            })
+
+        return True, "Similar items fetched successfully", similar
+
+    except Exception as e:
+        print(f"Error in find_similar_items: {str(e)}")
+        return False, f"Server error: {str(e)}", []
+
+
+def get_macro_index_stats():
+    """
+    Size and rebuild counters of the macro index
+    """
+    size = _index['arrays']['ids'].size if _index['arrays'] is not None else 0
+    return {
+        'backend': 'kdtree' if cKDTree is not None else 'brute_force',
+        'size': int(size),
+        'treeSize': _index['tree_size'] if _index['tree'] is not None else 0,
+        'deltaSize': int(size - _index['tree_size']) if _index['tree'] is not None else int(size),
+        'partitions': len(_index['partitions']),
+        'rebuilds': _index['rebuilds'],
+        'incrementalUpdates': _index['incremental_updates'],
+    }
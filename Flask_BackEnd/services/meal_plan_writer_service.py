@@ -0,0 +1,287 @@
+from models.models import DailyMealPlan, Meal, MealItem, Item
+from db_config import db
+from sqlalchemy import insert, update, delete, select
+from datetime import datetime, date
+from services.item_catalog_service import resolve_item_names, fold_item_name
+from services.nutrition_totals_service import portion_nutrition, add_totals, empty_totals, TOTAL_FIELDS
+
+# Bulk write path for meal plans (create_meal_plan, the durationDays loop of POST /meal-plans, plan templates).
+# Eskiden her Meal ve her yeni Item için ayrı flush + item başına isim sorgusu vardı (6 öğün / 30 item ~ onlarca round trip).
+# Şimdi sabit sayıda statement:
+#   1 isim çözümleme (katalog + misses için tek IN), yeni item'lar tek executemany,
+#   mevcut planlar için hedefli DELETE (MealItem + Meal, plan satırı yeniden kullanılır),
+#   planlar / öğünler / meal item'lar birer executemany.
+# ID'ler: dialect destekliyorsa INSERT .. RETURNING (sort_by_parameter_order), MySQL'de geri SELECT.
+# Commit çağıran tarafta (tek transaction).
+
+
+def parse_plan_date(value):
+    """
+    'YYYY-MM-DD' (or date / datetime) -> date
+
+    Raises:
+        ValueError: if the value is not a valid date
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value).strip(), '%Y-%m-%d').date()
+
+
+def _parse_meal_time(value):
+    # "08:00" / "08:00:00" -> time, anything else is passed through unchanged like before
+    for fmt in ('%H:%M', '%H:%M:%S'):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except (TypeError, ValueError):
+            continue
+    return value
+
+
+def parse_meal_time_range(time_range):
+    """
+    "08:00 - 09:00" -> (time(8, 0), time(9, 0)), (None, None) if missing
+    """
+    if not time_range:
+        return None, None
+    times = time_range.split('-')
+    if len(times) != 2:
+        return None, None
+    return _parse_meal_time(times[0].strip()), _parse_meal_time(times[1].strip())
+
+
+def _supports_returning(model):
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect
+    return bool(dialect.insert_returning and dialect.insert_executemany_returning_sort_by_parameter_order)
+
+
+def _insert_many_returning_ids(model, id_column, rows, select_back):
+    """
+    Insert rows with one executemany and return their generated IDs in the same order.
+    select_back() must return the IDs of exactly these rows in insertion (auto-increment) order,
+    it is used when the dialect has no RETURNING (MySQL).
+    """
+    if not rows:
+        return []
+
+    if _supports_returning(model):
+        result = db.session.execute(
+            insert(model).returning(id_column, sort_by_parameter_order=True),
+            rows
+        )
+        return [row[0] for row in result]
+
+    db.session.execute(insert(model), rows)
+    return select_back()
+
+
+def resolve_or_create_items(meals_data):
+    """
+    Resolve every item name of the plan at once, missing items are inserted in one batch.
+
+    Returns:
+        tuple: (items: dict {folded name: (ItemID, protein, carb, fat)}, inserted: bool)
+    """
+    names = [i.get('name') for m in meals_data for i in m.get('items', []) if i.get('name')]
+    known = resolve_item_names(names)
+
+    items = {}
+    new_rows = {}
+    for m in meals_data:
+        for i in m.get('items', []):
+            name = i.get('name')
+            if not name:
+                continue
+            key = fold_item_name(name)
+            entry = known.get(name)
+            if entry:
+                items.setdefault(key, (entry['ItemID'], entry['ItemProtein'], entry['ItemCarb'], entry['ItemFat']))
+            elif key not in items and key not in new_rows:
+                # Same name twice in one plan creates a single row (first spelling wins)
+                new_rows[key] = {
+                    'ItemName': name,
+                    'ItemProtein': i.get('protein'),
+                    'ItemCarb': i.get('carbs'),
+                    'ItemFat': i.get('fat'),
+                }
+
+    if new_rows:
+        rows = list(new_rows.values())
+
+        def select_item_ids():
+            inserted = {
+                fold_item_name(name): item_id
+                for item_id, name in db.session.execute(
+                    select(Item.ItemID, Item.ItemName).where(Item.ItemName.in_([r['ItemName'] for r in rows]))
+                ).all()
+            }
+            return [inserted[fold_item_name(r['ItemName'])] for r in rows]
+
+        ids = _insert_many_returning_ids(Item, Item.ItemID, rows, select_item_ids)
+        for row, item_id in zip(rows, ids):
+            items[fold_item_name(row['ItemName'])] = (item_id, row['ItemProtein'], row['ItemCarb'], row['ItemFat'])
+
+    return items, bool(new_rows)
+
+
+def write_meal_plans(client_id, plan_dates, meals_data):
+    """
+    Create (or overwrite) the same meal plan for a client on several dates, no commit.
+
+    Args:
+        plan_dates (list): date objects (parse_plan_date)
+        meals_data (list): [{'title', 'time': "08:00 - 09:00", 'items': [{'name', 'amount', 'protein', 'carbs', 'fat', 'allowChange'}]}]
+
+    Returns:
+        dict: {'planIds': {date: MealPlanID}, 'overwritten': [date, ...], 'insertedItems': bool}
+    """
+    result = write_meal_plans_for_clients({client_id: plan_dates}, meals_data)
+    return {
+        'planIds': {d: plan_id for (_, d), plan_id in result['planIds'].items()},
+        'overwritten': [d for _, d in result['overwritten']],
+        'insertedItems': result['insertedItems'],
+    }
+
+
+def write_meal_plans_for_clients(targets, meals_data):
+    """
+    Create (or overwrite) the same meal plan for several clients and dates with one batch per table, no commit.
+
+    Args:
+        targets (dict): {client_id: [date, ...]}
+        meals_data (list): same format as write_meal_plans
+
+    Returns:
+        dict: {'planIds': {(client_id, date): MealPlanID}, 'overwritten': [(client_id, date), ...], 'insertedItems': bool}
+    """
+    pairs = list(dict.fromkeys((client_id, d) for client_id, dates in targets.items() for d in dates))
+    if not pairs:
+        return {'planIds': {}, 'overwritten': [], 'insertedItems': False}
+
+    items, inserted_items = resolve_or_create_items(meals_data)
+
+    # Totals are the same for every client / date, computed once
+    meal_rows_template = []
+    plan_totals = empty_totals()
+    for m in meals_data:
+        start_time, end_time = parse_meal_time_range(m.get('time'))
+        meal_totals = empty_totals()
+        meal_items = []
+        for i in m.get('items', []):
+            item_id, protein, carb, fat = items[fold_item_name(i['name'])]
+            meal_totals = add_totals(meal_totals, portion_nutrition(protein, carb, fat, i.get('amount')))
+            meal_items.append({
+                'ItemID': item_id,
+                'ConsumeAmount': i.get('amount'),
+                'canChange': i.get('allowChange', False),
+            })
+        plan_totals = add_totals(plan_totals, meal_totals)
+        meal_rows_template.append({
+            'MealName': m.get('title'),
+            'MealStart': start_time,
+            'MealEnd': end_time,
+            'totals': meal_totals,
+            'items': meal_items,
+        })
+
+    client_ids = list({client_id for client_id, _ in pairs})
+    all_dates = list({d for _, d in pairs})
+    wanted = set(pairs)
+
+    def select_plan_ids():
+        # ClientID IN x PlanDate IN may return a few rows outside the targets, filtered here
+        return {
+            (client_id, d): plan_id
+            for client_id, d, plan_id in db.session.execute(
+                select(DailyMealPlan.ClientID, DailyMealPlan.PlanDate, DailyMealPlan.MealPlanID)
+                .where(DailyMealPlan.ClientID.in_(client_ids), DailyMealPlan.PlanDate.in_(all_dates))
+            ).all()
+            if (client_id, d) in wanted
+        }
+
+    # A. Existing plans of the targets: empty them (targeted delete), the plan row is reused
+    existing = select_plan_ids()
+
+    if existing:
+        existing_ids = list(existing.values())
+        db.session.execute(
+            delete(MealItem).where(MealItem.MealID.in_(
+                select(Meal.MealID).where(Meal.MealPlanID.in_(existing_ids)).scalar_subquery()
+            )),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.execute(
+            delete(Meal).where(Meal.MealPlanID.in_(existing_ids)),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.execute(update(DailyMealPlan), [
+            {'MealPlanID': plan_id, **dict(zip(TOTAL_FIELDS, plan_totals))} for plan_id in existing_ids
+        ])
+
+    # B. New plans, one executemany
+    new_pairs = [pair for pair in pairs if pair not in existing]
+
+    def select_new_plan_ids():
+        ids_by_pair = select_plan_ids()
+        return [ids_by_pair[pair] for pair in new_pairs]
+
+    created_at = datetime.utcnow()
+    new_ids = _insert_many_returning_ids(
+        DailyMealPlan, DailyMealPlan.MealPlanID,
+        [
+            {'ClientID': client_id, 'PlanDate': d, 'CreatedAt': created_at, **dict(zip(TOTAL_FIELDS, plan_totals))}
+            for client_id, d in new_pairs
+        ],
+        select_new_plan_ids
+    )
+    plan_ids = {**existing, **dict(zip(new_pairs, new_ids))}
+    ordered_plans = [(client_id, plan_ids[(client_id, d)]) for client_id, d in pairs]
+    ordered_plan_ids = [plan_id for _, plan_id in ordered_plans]
+
+    # C. Meals of every plan, one executemany
+    meal_rows = [
+        {
+            'MealPlanID': plan_id,
+            'MealName': m['MealName'],
+            'MealStart': m['MealStart'],
+            'MealEnd': m['MealEnd'],
+            **dict(zip(TOTAL_FIELDS, m['totals'])),
+        }
+        for plan_id in ordered_plan_ids
+        for m in meal_rows_template
+    ]
+
+    def select_meal_ids():
+        # The plans were empty, so their meals are exactly the rows just inserted (auto-increment order)
+        rows = db.session.execute(
+            select(Meal.MealPlanID, Meal.MealID)
+            .where(Meal.MealPlanID.in_(ordered_plan_ids))
+            .order_by(Meal.MealID.asc())
+        ).all()
+        ids_by_plan = {}
+        for plan_id, meal_id in rows:
+            ids_by_plan.setdefault(plan_id, []).append(meal_id)
+        return [meal_id for plan_id in ordered_plan_ids for meal_id in ids_by_plan.get(plan_id, [])]
+
+    meal_ids = iter(_insert_many_returning_ids(Meal, Meal.MealID, meal_rows, select_meal_ids))
+
+    # D. Meal items, one executemany
+    meal_item_rows = []
+    for client_id, _ in ordered_plans:
+        for meal_row in meal_rows_template:
+            meal_id = next(meal_ids)
+            for mi in meal_row['items']:
+                meal_item_rows.append({
+                    'MealID': meal_id,
+                    'ItemID': mi['ItemID'],
+                    'ClientID': client_id,
+                    'ConsumeAmount': mi['ConsumeAmount'],
+                    'canChange': mi['canChange'],
+                    'isFollowed': None,
+                    'isLLM': False,
+                })
+    if meal_item_rows:
+        db.session.execute(insert(MealItem), meal_item_rows)
+
+    return {'planIds': plan_ids, 'overwritten': list(existing), 'insertedItems': inserted_items}
@@ -1,81 +1,43 @@
 import uuid
-from datetime import datetime
+import base64
+from datetime import datetime, timedelta
 from models.models import DailyMealPlan, Meal, MealItem, Item
 from db_config import db
+from sqlalchemy import func, or_, and_
 from services.item_service import calculate_portion_calories, calculate_item_calories
+from services.item_catalog_service import invalidate_item_catalog
+from services.data_version_service import bump_data_version
+from services.meal_plan_writer_service import write_meal_plans, parse_plan_date
+from services.changed_item_codec import parse_changed_item, resolve_entries, format_display, format_mobile, changed_item_nutrition
+from services.nutrition_totals_service import get_stored_totals
 
 # --- Function 1: Create Logic ---
-def create_meal_plan(data):
+def create_meal_plans(data, duration_days=1):
+    """
+    Create (or overwrite) the plan in `data` for `duration_days` consecutive days starting at data['date'].
+    Single transaction, constant number of statements (meal_plan_writer_service).
+
+    Returns:
+        tuple: (success: bool, message: str)
+    """
     try:
         client_id = data.get('client_id')
-        plan_date_str = data.get('date')
         meals_data = data.get('meals', [])
 
-        # A. Check/Overwrite existing plan
-        existing_plan = DailyMealPlan.query.filter_by(ClientID=client_id, PlanDate=plan_date_str).first()
-        if existing_plan:
-            db.session.delete(existing_plan)
-            db.session.flush()
-
-        # B. Create Plan
-        new_plan = DailyMealPlan(
-            ClientID=client_id,
-            PlanDate=plan_date_str 
-        )
-        db.session.add(new_plan)
-        db.session.flush()
-
-        # C. Loop Meals
-        for m in meals_data:
-            start_time = None
-            end_time = None
-            if m.get('time'):
-                times = m['time'].split('-')
-                if len(times) == 2:
-                    start_time = times[0].strip()
-                    end_time = times[1].strip()
-
-            new_meal = Meal(
-                MealPlanID=new_plan.MealPlanID,
-                MealName=m.get('title'),
-                MealStart=start_time,
-                MealEnd=end_time
-            )
-            db.session.add(new_meal)
-            db.session.flush()
-
-            # D. Loop Items
-            for i in m.get('items', []):
-                # Find or Create Item
-                existing_item = Item.query.filter_by(ItemName=i['name']).first()
-                item_id = None
-                
-                if existing_item:
-                    item_id = existing_item.ItemID
-                else:
-                    new_item = Item(
-                        ItemName=i['name'],
-                        # ItemCalories removed as per your request
-                        ItemProtein=i.get('protein'),
-                        ItemCarb=i.get('carbs'),
-                        ItemFat=i.get('fat')
-                    )
-                    db.session.add(new_item)
-                    db.session.flush() 
-
-                # Link Item
-                new_meal_item = MealItem(
-                    MealID=new_meal.MealID,
-                    ItemID=item_id,
-                    ClientID=client_id,
-                    ConsumeAmount=i.get('amount'),
-                    canChange=i.get('allowChange', False),
-                    isFollowed=None,
-                    isLLM=False
-                )
-                db.session.add(new_meal_item)
+        try:
+            base_date = parse_plan_date(data.get('date'))
+        except ValueError:
+            return False, f"Invalid date: {data.get('date')}"
 
+        plan_dates = [base_date + timedelta(days=i) for i in range(max(int(duration_days), 1))]
+        result = write_meal_plans(client_id, plan_dates, meals_data)
         db.session.commit()
+        bump_data_version('meals', client_id)
+
+        # New items are in the Item table now, cached catalog is outdated
+        if result['insertedItems']:
+            invalidate_item_catalog()
+
         return True, "Meal Plan Created Successfully"
 
     except Exception as e:
@@ -83,129 +45,284 @@ def create_meal_plan(data):
         print(f"Error creating meal plan: {e}")
         return False, str(e)
 
+
+def create_meal_plan(data):
+    return create_meal_plans(data, 1)
+
 # --- Function 2: Get Logic ---
-def get_client_meal_plans(client_id):
-    try:
-        # Get all plans for this client, newest first
-        plans = DailyMealPlan.query.filter_by(ClientID=client_id)\
-            .order_by(DailyMealPlan.PlanDate.desc()).all()
-        
-        history = []
-
-        for p in plans:
-            meals = Meal.query.filter_by(MealPlanID=p.MealPlanID).all()
-            daily_total_cals = 0
-            meals_data = []
-
-            for m in meals:
-                # Join with Item table to get macros
-                meal_items = db.session.query(MealItem, Item)\
-                    .join(Item, MealItem.ItemID == Item.ItemID)\
-                    .filter(MealItem.MealID == m.MealID).all()
-                
-                items_data = []
-                meal_cals = 0
-
-                for mi, item in meal_items:
-                    # Calculate Calories: (4*Pro + 4*Carb + 9*Fat) * ratio
-                    base_cals = (4 * (item.ItemProtein or 0)) + \
-                                (4 * (item.ItemCarb or 0)) + \
-                                (9 * (item.ItemFat or 0))
-                    
-                    ratio = mi.ConsumeAmount / 100.0
-                    actual_cals = base_cals * ratio
-                    meal_cals += actual_cals
+def _plan_window_filter(query, client_id, date_from=None, date_to=None):
+    query = query.filter(DailyMealPlan.ClientID == client_id)
+    if date_from:
+        query = query.filter(DailyMealPlan.PlanDate >= date_from)
+    if date_to:
+        query = query.filter(DailyMealPlan.PlanDate <= date_to)
+    return query
+
+
+def _build_plan_history(plans, plan_scope):
+    """
+    Build the web history JSON for the given plan rows (MealPlanID, PlanDate, TotalCalories).
+    plan_scope(query) restricts a query joined with DailyMealPlan to the same plans,
+    so meals and meal items are loaded with one query each.
+    """
+    meals = plan_scope(
+        db.session.query(Meal.MealID, Meal.MealPlanID, Meal.MealName, Meal.MealStart, Meal.MealEnd)
+        .join(DailyMealPlan, Meal.MealPlanID == DailyMealPlan.MealPlanID)
+    ).order_by(Meal.MealID.asc()).all()
+
+    # Join with Item table to get macros
+    meal_items = plan_scope(
+        db.session.query(
+            MealItem.MealID,
+            MealItem.ConsumeAmount,
+            MealItem.canChange,
+            MealItem.ChangedItem,
+            MealItem.isLLM,
+            Item.ItemName,
+            Item.ItemProtein,
+            Item.ItemCarb,
+            Item.ItemFat,
+        )
+        .join(Item, MealItem.ItemID == Item.ItemID)
+        .join(Meal, MealItem.MealID == Meal.MealID)
+        .join(DailyMealPlan, Meal.MealPlanID == DailyMealPlan.MealPlanID)
+    ).all()
 
-#--------------------------------------------------------------------
-                    # --- NEW CODE: Calculate Macros for ChangedItem SPECIFICALLY FOR WEB SIDE, MOBILE SIDE WILL NOT USE IT.---
-                    # --- FIXED: Handle multiple changed items ---
-                    new_kcal, new_pro, new_carb, new_fat = 0, 0, 0, 0
+    meals_by_plan = {}
+    for m in meals:
+        meals_by_plan.setdefault(m.MealPlanID, []).append(m)
+
+    # Every ChangedItem of these plans is parsed and its names resolved in one batch (changed_item_codec)
+    changed_entries = resolve_entries([parse_changed_item(mi.ChangedItem) for mi in meal_items])
+
+    items_by_meal = {}
+    for mi, entries in zip(meal_items, changed_entries):
+        items_by_meal.setdefault(mi.MealID, []).append((mi, entries))
+
+    history = []
 
-                    if mi.ChangedItem:
-                        clean_changed = str(mi.ChangedItem).replace('"', '').strip()
+    for p in plans:
+        daily_total_cals = 0
+        meals_data = []
 
-                        # Split multiple items
-                        changed_items = clean_changed.split(",")
+        for m in meals_by_plan.get(p.MealPlanID, []):
+            items_data = []
+            meal_cals = 0
 
-                        for changed in changed_items:
-                            if '-' not in changed:
-                                continue
+            for mi, changed in items_by_meal.get(m.MealID, []):
+                # Calculate Calories: (4*Pro + 4*Carb + 9*Fat) * ratio
+                base_cals = (4 * (mi.ItemProtein or 0)) + \
+                            (4 * (mi.ItemCarb or 0)) + \
+                            (9 * (mi.ItemFat or 0))
+                
+                ratio = mi.ConsumeAmount / 100.0
+                actual_cals = base_cals * ratio
+                meal_cals += actual_cals
 
-                            parts = changed.split('-')
-                            if len(parts) != 2:
-                                continue
+#--------------------------------------------------------------------
+                # --- NEW CODE: Calculate Macros for ChangedItem SPECIFICALLY FOR WEB SIDE, MOBILE SIDE WILL NOT USE IT.---
+                # --- FIXED: Handle multiple changed items ---
+                new_kcal, new_pro, new_carb, new_fat = 0, 0, 0, 0
 
-                            new_item_name = parts[0].strip()
+                if mi.ChangedItem:
+                    for entry in changed:
+                        nutrition = changed_item_nutrition(entry)
+
+                        if nutrition:
+                            kcal, pro, carb, fat = nutrition
+
+                            # 🔥 ADD to totals
+                            new_pro += pro
+                            new_carb += carb
+                            new_fat += fat
+                            new_kcal += kcal
+
+                    # Round at the end
+                    new_pro = round(new_pro)
+                    new_carb = round(new_carb)
+                    new_fat = round(new_fat)
+                    new_kcal = round(new_kcal)
+#------------------------------------------
 
-                            try:
-                                new_item_amount = float(parts[1].strip())
+                items_data.append({
+                    'name': mi.ItemName,
+                    'amount': mi.ConsumeAmount,
+                    'calories': round(actual_cals),
+                    'protein': round((mi.ItemProtein or 0) * ratio),
+                    'carbs': round((mi.ItemCarb or 0) * ratio),
+                    'fat': round((mi.ItemFat or 0) * ratio),
+                    'allowChange': mi.canChange,
+                    'changedItem': format_display(changed),  # ----- ADDED THIS FOR GIVING FEEDBACK TO DIETITIAN ON WEB
+                    'isLLM': mi.isLLM,               # ----- ADDED THIS FOR GIVING FEEDBACK TO DIETITIAN ON WEB
+                    'newKcal': new_kcal,    # ----- SOME ADDITONAL FIELDS FOR WEB
+                    'newProtein': new_pro,  # ----- SOME ADDITONAL FIELDS FOR WEB
+                    'newCarbs': new_carb,   # ----- SOME ADDITONAL FIELDS FOR WEB
+                    'newFat': new_fat       # ----- SOME ADDITONAL FIELDS FOR WEB
+                })
 
-                                new_db_item = Item.query.filter(Item.ItemName.ilike(new_item_name)).first()
+            daily_total_cals += meal_cals
 
-                                if new_db_item:
-                                    ratio = new_item_amount / 100.0
+            meals_data.append({
+                'title': m.MealName,
+                'time': f"{m.MealStart} - {m.MealEnd}" if m.MealStart else "Flexible",
+                'items': items_data
+            })
 
-                                    pro = (new_db_item.ItemProtein or 0) * ratio
-                                    carb = (new_db_item.ItemCarb or 0) * ratio
-                                    fat = (new_db_item.ItemFat or 0) * ratio
+        # Stored daily total if materialized, otherwise the sum computed above
+        if p.TotalCalories is not None:
+            daily_total_cals = p.TotalCalories
 
-                                    kcal = (4 * pro) + (4 * carb) + (9 * fat)
+        history.append({
+            'id': p.MealPlanID,
+            'date': p.PlanDate.strftime('%Y-%m-%d') if p.PlanDate else "Unknown Date",
+            'status': 'Active', 
+            'avgCalories': round(daily_total_cals),
+            'goal': 'General', 
+            'meals': meals_data
+        })
 
-                                    # 🔥 ADD to totals
-                                    new_pro += pro
-                                    new_carb += carb
-                                    new_fat += fat
-                                    new_kcal += kcal
+    return history
 
-                            except Exception as e:
-                                print(f"Error parsing modified item: {e}")
 
-                        # Round at the end
-                        new_pro = round(new_pro)
-                        new_carb = round(new_carb)
-                        new_fat = round(new_fat)
-                        new_kcal = round(new_kcal)
-#------------------------------------------
+def get_client_meal_plans(client_id, date_from=None, date_to=None):
+    """
+    Get the plan history of a client for the web dashboard (newest first).
+    Batched: 3 queries in total (plans, meals, meal items + items) no matter how many plans,
+    replacement items in ChangedItem are resolved from the in-process Item catalog.
 
-                    items_data.append({
-                        'name': item.ItemName,
-                        'amount': mi.ConsumeAmount,
-                        'calories': round(actual_cals),
-                        'protein': round((item.ItemProtein or 0) * ratio),
-                        'carbs': round((item.ItemCarb or 0) * ratio),
-                        'fat': round((item.ItemFat or 0) * ratio),
-                        'allowChange': mi.canChange,
-                        'changedItem': mi.ChangedItem,  # ----- ADDED THIS FOR GIVING FEEDBACK TO DIETITIAN ON WEB
-                        'isLLM': mi.isLLM,               # ----- ADDED THIS FOR GIVING FEEDBACK TO DIETITIAN ON WEB
-                        'newKcal': new_kcal,    # ----- SOME ADDITONAL FIELDS FOR WEB
-                        'newProtein': new_pro,  # ----- SOME ADDITONAL FIELDS FOR WEB
-                        'newCarbs': new_carb,   # ----- SOME ADDITONAL FIELDS FOR WEB
-                        'newFat': new_fat       # ----- SOME ADDITONAL FIELDS FOR WEB
-                    })
-
-                daily_total_cals += meal_cals
-
-                meals_data.append({
-                    'title': m.MealName,
-                    'time': f"{m.MealStart} - {m.MealEnd}" if m.MealStart else "Flexible",
-                    'items': items_data
-                })
+    date_from / date_to (optional, inclusive) limit the history to a date window.
+    """
+    try:
+        # Column queries on purpose: DailyMealPlan/Meal ORM objects selectin-load their children
+        plans = _plan_window_filter(
+            db.session.query(DailyMealPlan.MealPlanID, DailyMealPlan.PlanDate, DailyMealPlan.TotalCalories),
+            client_id, date_from, date_to
+        ).order_by(DailyMealPlan.PlanDate.desc()).all()
 
-            history.append({
-                'id': p.MealPlanID,
-                'date': p.PlanDate.strftime('%Y-%m-%d') if p.PlanDate else "Unknown Date",
-                'status': 'Active', 
-                'avgCalories': round(daily_total_cals),
-                'goal': 'General', 
-                'meals': meals_data
-            })
+        if not plans:
+            return []
 
-        return history
+        return _build_plan_history(
+            plans,
+            lambda query: _plan_window_filter(query, client_id, date_from, date_to)
+        )
 
     except Exception as e:
         print(f"Error fetching plans: {e}")
         return []
 
+
+def encode_plan_cursor(plan_date, meal_plan_id):
+    """
+    Opaque keyset cursor for (PlanDate, MealPlanID) -> "MjAyNi0wMy0wMXwxMg"
+    """
+    raw = f"{plan_date.isoformat()}|{meal_plan_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_plan_cursor(cursor):
+    """
+    Reverse of encode_plan_cursor.
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        plan_date_str, meal_plan_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.strptime(plan_date_str, '%Y-%m-%d').date(), int(meal_plan_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def get_client_meal_plans_page(client_id, limit, cursor=None, summary=False, date_from=None, date_to=None):
+    """
+    Keyset paginated plan history, newest first, ordered by (PlanDate, MealPlanID).
+    Only the plans of the requested page are loaded in detail.
+
+    summary=True returns only id, date, avgCalories and mealCount per plan (single aggregate query).
+
+    Returns:
+        tuple: (plans: list, next_cursor: str or None)
+
+    Raises:
+        ValueError: if the cursor is malformed
+    """
+    query = _plan_window_filter(
+        db.session.query(DailyMealPlan.MealPlanID, DailyMealPlan.PlanDate, DailyMealPlan.TotalCalories),
+        client_id, date_from, date_to
+    )
+
+    if cursor:
+        cursor_date, cursor_id = decode_plan_cursor(cursor)
+        query = query.filter(or_(
+            DailyMealPlan.PlanDate < cursor_date,
+            and_(DailyMealPlan.PlanDate == cursor_date, DailyMealPlan.MealPlanID < cursor_id)
+        ))
+
+    # One extra row tells us whether there is a next page
+    plans = query.order_by(
+        DailyMealPlan.PlanDate.desc(),
+        DailyMealPlan.MealPlanID.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(plans) > limit:
+        plans = plans[:limit]
+        next_cursor = encode_plan_cursor(plans[-1].PlanDate, plans[-1].MealPlanID)
+
+    if not plans:
+        return [], None
+
+    plan_ids = [p.MealPlanID for p in plans]
+
+    if summary:
+        return _build_plan_summaries(plans, plan_ids), next_cursor
+
+    history = _build_plan_history(
+        plans,
+        lambda q: q.filter(DailyMealPlan.MealPlanID.in_(plan_ids))
+    )
+    return history, next_cursor
+
+
+def _build_plan_summaries(plans, plan_ids):
+    meal_counts = dict(
+        db.session.query(Meal.MealPlanID, func.count(Meal.MealID))
+        .filter(Meal.MealPlanID.in_(plan_ids))
+        .group_by(Meal.MealPlanID).all()
+    )
+
+    # Stored TotalCalories is used directly, only plans without it are summed in SQL
+    missing_ids = [p.MealPlanID for p in plans if p.TotalCalories is None]
+    computed_kcal = {}
+    if missing_ids:
+        # (4*Pro + 4*Carb + 9*Fat) * ConsumeAmount / 100, summed per plan in SQL
+        kcal_expr = (
+            4 * func.coalesce(Item.ItemProtein, 0) +
+            4 * func.coalesce(Item.ItemCarb, 0) +
+            9 * func.coalesce(Item.ItemFat, 0)
+        ) * MealItem.ConsumeAmount / 100.0
+
+        computed_kcal = dict(
+            db.session.query(Meal.MealPlanID, func.sum(kcal_expr))
+            .join(MealItem, MealItem.MealID == Meal.MealID)
+            .join(Item, MealItem.ItemID == Item.ItemID)
+            .filter(Meal.MealPlanID.in_(missing_ids))
+            .group_by(Meal.MealPlanID).all()
+        )
+
+    summaries = []
+    for p in plans:
+        kcal = p.TotalCalories if p.TotalCalories is not None else computed_kcal.get(p.MealPlanID, 0)
+        summaries.append({
+            'id': p.MealPlanID,
+            'date': p.PlanDate.strftime('%Y-%m-%d') if p.PlanDate else "Unknown Date",
+            'avgCalories': round(float(kcal or 0)),
+            'mealCount': meal_counts.get(p.MealPlanID, 0),
+        })
+    return summaries
+
 # MOBILE
 def get_meals_by_clientid_and_date(client_id, plan_date):
     try:
@@ -227,8 +344,11 @@ def get_meals_by_clientid_and_date(client_id, plan_date):
             total_protein = 0
             total_carb = 0
             total_fat = 0
+
+            # Replacement names of the whole meal resolved at once
+            changed_entries = resolve_entries([parse_changed_item(mi.ChangedItem) for mi, _ in meal_items])
             
-            for mi, item in meal_items:
+            for (mi, item), changed in zip(meal_items, changed_entries):
                 # Use helper function for ORIGINAL item
 
                 actual_100g_cals = calculate_item_calories(
@@ -247,123 +367,8 @@ def get_meals_by_clientid_and_date(client_id, plan_date):
                 scaled_carb = (item.ItemCarb or 0) * ratio
                 scaled_fat = (item.ItemFat or 0) * ratio
                 
-                # Parse changedItem from database
-                # Supports:
-                # 1) new JSON/list format: [{"item_id": "...", "name": "...", "portion": 100}]
-                # 2) single JSON/object format: {"item_id": "...", "name": "...", "portion": 100}
-                # 3) legacy string format: "Banana - 100g, Apple - 80g"
-                changed_item_parsed = None
-                if mi.ChangedItem:
-                    parsed_items = []
-
-                    # NEW FORMAT: list of objects
-                    if isinstance(mi.ChangedItem, list):
-                        for changed in mi.ChangedItem:
-                            changed_name = changed.get('name')
-                            changed_portion = changed.get('portion')
-
-                            if not changed_name or changed_portion is None:
-                                continue
-
-                            try:
-                                changed_portion = int(changed_portion)
-                            except (ValueError, TypeError):
-                                continue
-
-                            changed_item_obj = Item.query.filter_by(ItemName=changed_name).first()
-                            if changed_item_obj:
-                                changed_100g_cals = calculate_item_calories(
-                                    changed_item_obj.ItemProtein or 0,
-                                    changed_item_obj.ItemCarb or 0,
-                                    changed_item_obj.ItemFat or 0,
-                                )
-                                changed_cals = calculate_portion_calories(
-                                    changed_100g_cals,
-                                    changed_portion
-                                )
-
-                                changed_ratio = changed_portion / 100.0
-                                changed_protein = (changed_item_obj.ItemProtein or 0) * changed_ratio
-                                changed_carb = (changed_item_obj.ItemCarb or 0) * changed_ratio
-                                changed_fat = (changed_item_obj.ItemFat or 0) * changed_ratio
-
-                                parsed_items.append(
-                                    f"{changed_name},{changed_portion},{round(changed_cals)},"
-                                    f"{round(changed_protein, 1)},{round(changed_carb, 1)},{round(changed_fat, 1)}"
-                                )
-
-                    # NEW FORMAT: single object
-                    elif isinstance(mi.ChangedItem, dict):
-                        changed_name = mi.ChangedItem.get('name')
-                        changed_portion = mi.ChangedItem.get('portion')
-
-                        if changed_name and changed_portion is not None:
-                            try:
-                                changed_portion = int(changed_portion)
-                            except (ValueError, TypeError):
-                                changed_portion = None
-
-                            if changed_portion is not None:
-                                changed_item_obj = Item.query.filter_by(ItemName=changed_name).first()
-                                if changed_item_obj:
-                                    changed_100g_cals = calculate_item_calories(
-                                        changed_item_obj.ItemProtein or 0,
-                                        changed_item_obj.ItemCarb or 0,
-                                        changed_item_obj.ItemFat or 0,
-                                    )
-                                    changed_cals = calculate_portion_calories(
-                                        changed_100g_cals,
-                                        changed_portion
-                                    )
-
-                                    changed_ratio = changed_portion / 100.0
-                                    changed_protein = (changed_item_obj.ItemProtein or 0) * changed_ratio
-                                    changed_carb = (changed_item_obj.ItemCarb or 0) * changed_ratio
-                                    changed_fat = (changed_item_obj.ItemFat or 0) * changed_ratio
-
-                                    parsed_items.append(
-                                        f"{changed_name},{changed_portion},{round(changed_cals)},"
-                                        f"{round(changed_protein, 1)},{round(changed_carb, 1)},{round(changed_fat, 1)}"
-                                    )
-
-                    # LEGACY FORMAT: string
-                    elif isinstance(mi.ChangedItem, str):
-                        items_list = mi.ChangedItem.split(', ')
-                        for item_str in items_list:
-                            parts = item_str.split(' - ')
-                            if len(parts) == 2:
-                                changed_name = parts[0].strip()
-                                changed_portion_str = parts[1].strip().replace('g', '')
-
-                                try:
-                                    changed_portion = int(changed_portion_str)
-                                except ValueError:
-                                    continue
-
-                                changed_item_obj = Item.query.filter_by(ItemName=changed_name).first()
-                                if changed_item_obj:
-                                    changed_100g_cals = calculate_item_calories(
-                                        changed_item_obj.ItemProtein or 0,
-                                        changed_item_obj.ItemCarb or 0,
-                                        changed_item_obj.ItemFat or 0,
-                                    )
-                                    changed_cals = calculate_portion_calories(
-                                        changed_100g_cals,
-                                        changed_portion
-                                    )
-
-                                    changed_ratio = changed_portion / 100.0
-                                    changed_protein = (changed_item_obj.ItemProtein or 0) * changed_ratio
-                                    changed_carb = (changed_item_obj.ItemCarb or 0) * changed_ratio
-                                    changed_fat = (changed_item_obj.ItemFat or 0) * changed_ratio
-
-                                    parsed_items.append(
-                                        f"{changed_name},{changed_portion},{round(changed_cals)},"
-                                        f"{round(changed_protein, 1)},{round(changed_carb, 1)},{round(changed_fat, 1)}"
-                                    )
-
-                    if parsed_items:
-                        changed_item_parsed = ';'.join(parsed_items)
+                # changedItem -> "name,portion,kcal,protein,carb,fat;..." (any stored format, changed_item_codec)
+                changed_item_parsed = format_mobile(changed)
                 
                 # ORIGINAL item ALWAYS contributes to totals
                 # Changed items are SEPARATE in the "changedItem" and shown in UI only
@@ -390,6 +395,11 @@ def get_meals_by_clientid_and_date(client_id, plan_date):
             
             # Check if meal is completed
             is_completed = all(mi.isFollowed is not None for mi, _ in meal_items) if meal_items else False
+
+            # Stored meal totals (nutrition_totals_service), the sums above are the fallback for old rows
+            stored_totals = get_stored_totals(m)
+            if stored_totals:
+                total_calories, total_protein, total_carb, total_fat = stored_totals
             
             meals_data.append({
                 'mealID': m.MealID,
@@ -1,9 +1,21 @@
 from models.models import MealItem, Meal, DailyMealPlan, Item, Client, PhysicalDetails, MedicalDetails
 from db_config import db
 from services.item_service import get_item_by_id, calculate_item_calories, calculate_portion_calories
+from services.item_catalog_service import get_catalog_items
+from services.nutrition_totals_service import get_stored_totals
+from services.changed_item_codec import decode_changed_item, to_canonical, changed_item_display
+from services.candidate_scoring_service import get_catalog_macro_arrays, score_candidates
 from services.preference_service import update_preference_after_manual_replacement
+from services.suggestion_store_service import get_suggested_names, mark_suggested, normalize_food_name
+from services.prompt_context_service import load_prompt_context
+from services.offline_recommender_service import recommend_offline, is_offline_provider_forced
+from services.llm_cache_service import make_cache_key, get_cached_responses, store_responses, record_cache_hit, record_cache_miss, record_api_call
+from services.data_version_service import bump_data_version
 from datetime import date, datetime
 import traceback
+import hashlib
+import asyncio
+import time
 
 import openai #pip install openai python-dotenv
 import os
@@ -11,6 +23,12 @@ import json
 
 openai.api_key = os.getenv('OPENAI_API_KEY') # Get the API key from environment variable (.env)
 
+LLM_MODEL = "gpt-4.1-nano"
+LLM_CACHE_MAX_RESPONSES_PER_KEY = 10  # distinct suggestions kept per cache key
+LLM_ALTERNATIVE_COUNT = int(os.getenv('LLM_ALTERNATIVE_COUNT', 3))  # concurrent completions per /alternative request
+LLM_ALTERNATIVE_TIMEOUT_SECONDS = float(os.getenv('LLM_ALTERNATIVE_TIMEOUT_SECONDS', 6))  # per completion, then fallback
+LLM_SYSTEM_MESSAGE = "You are a helpful dietitian assistant. Always respond in valid JSON format."
+
 STATIC_ALTERNATIVE_PROMPT = """
 You are a dietitian support assistant.
 The information provided has been prepared by a dietitian.
@@ -66,8 +84,6 @@ JSON FORMAT:
 }
 """
 
-previous_requested_itemList = []
-
 def format_changed_item_for_db(changed_item):
     """
     Frontend'den gelen changed_item'i DB formatına çevirir.
@@ -78,56 +94,10 @@ def format_changed_item_for_db(changed_item):
     3) "Kiwi - 100g"
     4) "Kiwi - 100g, Banana - 80g"
     
-    DB'ye yazılacak format:
-    "Kiwi - 100g, Banana - 80g"
+    DB'ye yazılacak format (canonical, changed_item_codec):
+    [{"item_id": 9, "portion": 100}, {"item_id": 4, "portion": 80}]
     """
-    if not changed_item:
-        return None
-
-    # String geldiyse önce JSON mı diye dene
-    if isinstance(changed_item, str):
-        changed_item = changed_item.strip()
-
-        # Zaten eski doğru string formatındaysa aynen bırak
-        if " - " in changed_item and "[" not in changed_item and "{" not in changed_item:
-            return changed_item
-
-        # JSON string olabilir
-        try:
-            changed_item = json.loads(changed_item)
-        except Exception:
-            return changed_item  # saçma bir şey geldiyse bozmayalım
-
-    # Tek obje geldiyse listeye çevir
-    if isinstance(changed_item, dict):
-        changed_item = [changed_item]
-
-    # Liste geldiyse DB stringine çevir
-    if isinstance(changed_item, list):
-        formatted_items = []
-
-        for item in changed_item:
-            if not isinstance(item, dict):
-                continue
-
-            name = str(item.get("name", "")).strip()
-            portion = item.get("portion")
-
-            if not name or portion in [None, ""]:
-                continue
-
-            try:
-                portion = int(float(portion))
-            except Exception:
-                continue
-
-            formatted_items.append(f"{name} - {portion}")
-
-        return ", ".join(formatted_items) if formatted_items else None
-
-    return None
-
-
+    return to_canonical(decode_changed_item(changed_item))
 
 
 def get_mealitems_by_clientid(client_id, plan_date=None):
@@ -193,7 +163,7 @@ def get_mealitems_by_clientid(client_id, plan_date=None):
                 'canChange': meal_item.canChange,
                 'isFollowed': meal_item.isFollowed,
                 'isCompleted': is_completed,
-                'changedItem': meal_item.ChangedItem,
+                'changedItem': changed_item_display(meal_item.ChangedItem),
                 'isLLM': meal_item.isLLM,
                 'planDate': daily_plan.PlanDate.isoformat(),
                 'mealStart': meal.MealStart.isoformat() if meal.MealStart else None,
@@ -281,9 +251,14 @@ def get_meal_items_by_mealid(meal_id):
                 'canChange': meal_item.canChange,
                 'isFollowed': meal_item.isFollowed,
                 'isLLM': meal_item.isLLM,
-                'changedItem': meal_item.ChangedItem,
+                'changedItem': changed_item_display(meal_item.ChangedItem),
             })
         
+        # Stored meal totals if materialized (nutrition_totals_service)
+        stored_totals = get_stored_totals(meal)
+        if stored_totals:
+            total_calories, total_protein, total_carb, total_fat = stored_totals
+
         # After all return the meal data (We will call iteration on meal_service to get meal details)
         return {
             'mealID': meal_id,
@@ -305,36 +280,13 @@ def get_meal_items_by_mealid(meal_id):
     
 
 def parse_changed_item_with_ids(changed_item_text):
-    if not changed_item_text:
-        return []
-
-    result = []
-    items_list = changed_item_text.split(', ')
-
-    for item_str in items_list:
-        parts = item_str.split(' - ')
-        if len(parts) != 2:
-            continue
-
-        name = parts[0].strip()
-        portion_str = parts[1].strip().replace('g', '')
-
-        try:
-            portion = int(portion_str)
-        except ValueError:
-            continue
-
-        db_item = Item.query.filter_by(ItemName=name).first()
-
-        result.append({
-            "item_id": db_item.ItemID if db_item else None,
-            "name": name,
-            "portion": portion
-        })
-
-    return result
-
-
+    """
+    Any ChangedItem format -> [{"item_id": 9, "name": "Kiwi", "portion": 100}, ...] (item_id None if unknown)
+    """
+    return [
+        {"item_id": e['item_id'], "name": e['name'], "portion": e['portion']}
+        for e in decode_changed_item(changed_item_text)
+    ]
 
 
 def give_feedback_on_mealitem_manually(client_id, meal_id, item_id, changedItem, is_followed):
@@ -369,50 +321,27 @@ def give_feedback_on_mealitem_manually(client_id, meal_id, item_id, changedItem,
         if not meal_item:
             return False, "Meal item not found", None
         
-        selected_item_id = None
-
-        # CASE 1: dict gelirse (doğru format)
-        if isinstance(changedItem, dict):
-            selected_item_id = changedItem.get("item_id")
-
-        # CASE 2: list gelirse (frontend bazen array gönderiyor)
-        elif isinstance(changedItem, list) and len(changedItem) > 0:
-            selected_item_id = changedItem[0].get("item_id")
-
-        # CASE 3: legacy string (senin şu anki bug)
-        elif isinstance(changedItem, str):
-            selected_item_ids = []
-
-            # Split multiple items
-            items = changedItem.split(",")
-
-            for item_str in items:
-                # Handle formats like "banana-100" OR "banana - 100g"
-                name_part = item_str.split("-")[0].strip()
-
-                selected_item = Item.query.filter_by(ItemName=name_part).first()
-                if selected_item:
-                    selected_item_ids.append(selected_item.ItemID)
-
-            # If only one item, keep old behavior
-            if len(selected_item_ids) == 1:
-                selected_item_id = selected_item_ids[0]
-            else:
-                selected_item_id = selected_item_ids  # 🔥 now supports multiple
-
-        
+        # Every input format (dict, list, legacy string) is parsed and resolved once (changed_item_codec)
+        changed_entries = decode_changed_item(changedItem)
+        selected_item_ids = [e['item_id'] for e in changed_entries if e['item_id'] is not None]
 
+        # If only one item, keep old behavior, multiple replacements are passed as a list
+        if len(selected_item_ids) == 1:
+            selected_item_id = selected_item_ids[0]
+        else:
+            selected_item_id = selected_item_ids or None
 
         # It will not be overwritten of an itemID so we can track what changed with what.
         # UI should be designed to show the previous and new item if changedItem is not null.
         # Update the meal item with manual feedback
-        formatted_changed_item = format_changed_item_for_db(changedItem)
+        formatted_changed_item = to_canonical(changed_entries)
         meal_item.isFollowed = is_followed
         meal_item.ChangedItem = formatted_changed_item
         meal_item.isLLM = 0
         
         # Commit changes to database
         db.session.commit()
+        bump_data_version('meals', client_id)
         
         preference_message = None
 
@@ -461,7 +390,7 @@ def give_feedback_on_mealitem_manually(client_id, meal_id, item_id, changedItem,
             'canChange': meal_item.canChange,
             'isFollowed': meal_item.isFollowed,
             'isCompleted': True,  # Now it's completed since we gave feedback
-            'changedItem': meal_item.ChangedItem,
+            'changedItem': changed_item_display(meal_item.ChangedItem),
             'isLLM': meal_item.isLLM,
             'protein': round(item['ItemProtein'] * (meal_item.ConsumeAmount / 100), 1),
             'carb': round(item['ItemCarb'] * (meal_item.ConsumeAmount / 100), 1),
@@ -519,15 +448,18 @@ def give_feedback_on_mealitem_via_LLM(client_id, meal_id, item_id, accepted_item
         if not recommended_food or 'name' not in recommended_food or 'portion' not in recommended_food:
             return False, "Invalid recommended_food format"
         
-        # Create a formatted string with both name and portion
-        changed_item_text = f"{recommended_food.get('name', 'Unknown')} - {recommended_food.get('portion', 'Unknown portion')}"
+        # Canonical [{item_id, portion}] form (changed_item_codec)
+        changed_item = format_changed_item_for_db(recommended_food)
+        if not changed_item:
+            return False, "Invalid recommended_food format"
         
-        meal_item.ChangedItem = changed_item_text
+        meal_item.ChangedItem = changed_item
         meal_item.isFollowed = 0
         meal_item.isLLM = 1
         
         # Commit changes to database
         db.session.commit()
+        bump_data_version('meals', client_id)
         
         return True, "LLM alternative successfully accepted and saved"
         
@@ -548,22 +480,17 @@ def get_all_items():
         list: List of items with their details
     """
     try:
-        items = Item.query.all()
+        items = get_catalog_items()
         items_list = []
         
         for item in items:
-            total_calories_per_100g = calculate_item_calories(
-                item.ItemProtein,
-                item.ItemCarb,
-                item.ItemFat
-            )
             items_list.append({
-                'ItemID': item.ItemID,
-                'ItemName': item.ItemName,
-                'ItemCalories': round(total_calories_per_100g, 0),
-                'ItemProtein': item.ItemProtein,
-                'ItemCarb': item.ItemCarb,
-                'ItemFat': item.ItemFat,
+                'ItemID': item['ItemID'],
+                'ItemName': item['ItemName'],
+                'ItemCalories': round(item['ItemCalories'], 0),
+                'ItemProtein': item['ItemProtein'],
+                'ItemCarb': item['ItemCarb'],
+                'ItemFat': item['ItemFat'],
             })
         
         return items_list
@@ -640,68 +567,18 @@ def _prefilter_candidates(original_item_id, original_item, limit=12):
     Prefilter DB items to find the most nutritionally similar candidates.
     Scores items by calorie + macro similarity to the original, same food role preferred.
     Returns top N candidates sorted by similarity score (best first).
+    Scoring is vectorized over the cached catalog arrays (see candidate_scoring_service).
     """
     try:
-        all_items = Item.query.all()
-        if not all_items:
-            return []
-
-        # Original item macros per 100g
-        orig_protein = original_item['ItemProtein'] or 0
-        orig_carb = original_item['ItemCarb'] or 0
-        orig_fat = original_item['ItemFat'] or 0
-        orig_cal = calculate_item_calories(orig_protein, orig_carb, orig_fat)
-
-        # Determine dominant macro role of original (protein/carb/fat source)
-        macros = {'protein': orig_protein, 'carb': orig_carb, 'fat': orig_fat}
-        dominant_role = max(macros, key=macros.get)
-
-        scored = []
-        for db_item in all_items:
-            # Skip the original item itself
-            if str(db_item.ItemID) == str(original_item_id):
-                continue
-
-            p = db_item.ItemProtein or 0
-            c = db_item.ItemCarb or 0
-            f = db_item.ItemFat or 0
-            cal = calculate_item_calories(p, c, f)
-
-            # Calorie similarity (closer = better, max 40 points)
-            cal_diff = abs(cal - orig_cal)
-            cal_score = max(0, 40 - (cal_diff / orig_cal * 40)) if orig_cal > 0 else 20
-
-            # Macro similarity (closer = better, max 40 points)
-            macro_diff = abs(p - orig_protein) + abs(c - orig_carb) + abs(f - orig_fat)
-            macro_total = orig_protein + orig_carb + orig_fat
-            macro_score = max(0, 40 - (macro_diff / macro_total * 40)) if macro_total > 0 else 20
-
-            # Food role bonus (same dominant macro = +20 points)
-            item_macros = {'protein': p, 'carb': c, 'fat': f}
-            item_role = max(item_macros, key=item_macros.get)
-            role_bonus = 20 if item_role == dominant_role else 0
-
-            total_score = cal_score + macro_score + role_bonus
-
-            scored.append({
-                'name': db_item.ItemName,
-                'cal_per_100g': round(cal, 1),
-                'protein': round(p, 1),
-                'carb': round(c, 1),
-                'fat': round(f, 1),
-                'score': round(total_score, 1),
-            })
-
-        # Sort by score descending, take top N
-        scored.sort(key=lambda x: x['score'], reverse=True)
-        return scored[:limit]
+        arrays = get_catalog_macro_arrays()
+        return score_candidates(arrays, original_item_id, original_item, limit=limit)
 
     except Exception as e:
         print(f"Error in _prefilter_candidates: {str(e)}")
         return []
 
 
-def build_dynamic_prompt(client_id, meal_id, item_id):
+def build_prompt_inputs(client_id, meal_id, item_id):
     # Find the mealItem from DB which is gonna be changed  and get the details (Macros and calories)
     # Get the client's medical details, alternative items should not conflict with medical issues
     # Understand the plan goal of the client: Get last updated physical details of the client,  calculate TDEE, Find the current meal plan's nutritional info (calories) of that client and Understand the plan (Losing weight, gaining weight, maintaining weight)
@@ -709,154 +586,124 @@ def build_dynamic_prompt(client_id, meal_id, item_id):
 
 
     """
-    Build a dynamic prompt based on client's medical details, meal plan goals, and item details
+    Collect everything the dynamic prompt depends on: item, portion, medical text, plan goal and candidates.
+    The same inputs always produce the same prompt, so they are also the LLM cache key.
 
+    Returns:
+        dict: prompt inputs (+ 'context': PromptContext) or None if something is missing
     """
     try:
-        
-        # 1. Find the meal item and get its details
-        meal_item = MealItem.query.filter_by(MealID=meal_id, ItemID=item_id).first()
-        if not meal_item:
-            print(f"Meal item not found: MealID={meal_id}, ItemID={item_id}")
+        # 1-6. Meal item, item, medical + physical details, client and the day's total kcal in one query
+        context = load_prompt_context(client_id, meal_id, item_id)
+        if not context:
             return None
-        
-        # Get item details
-        item = get_item_by_id(item_id)
-        if not item:
-            print(f"Item not found: ItemID={item_id}")
-            return None
-        
+
         # Calculate macros for this portion
-        protein = round(item['ItemProtein'] * (meal_item.ConsumeAmount / 100), 1)
-        carb = round(item['ItemCarb'] * (meal_item.ConsumeAmount / 100), 1)
-        fat = round(item['ItemFat'] * (meal_item.ConsumeAmount / 100), 1)
-        
-        total_calories_per_100g = calculate_item_calories(
-            item['ItemProtein'],
-            item['ItemCarb'],
-            item['ItemFat'] # get all itemsdaki problem burada da olabilir
-        )
-        portion_calories = round(calculate_portion_calories(total_calories_per_100g, meal_item.ConsumeAmount), 0)
-        
-        # 2. Get client's medical details
-        medical_details = MedicalDetails.query.filter_by(ClientID=client_id).first()
-        medical_info = medical_details.MedicalData if medical_details and medical_details.MedicalData else "Bilinen hastalık yok"
-        
-        # 3. Get client's physical details
-        physical_details = PhysicalDetails.query.filter_by(ClientID=client_id).order_by(
-            PhysicalDetails.MeasurementDate.desc()
-        ).first()
-        
-        if not physical_details:
-            print(f"Physical details not found for client: {client_id}")
-            return None
-        
-        # 4. Get client info for age calculation
-        client = Client.query.filter_by(ClientID=client_id).first()
-        if not client:
-            print(f"Client not found: {client_id}")
-            return None
-        
-        # Calculate age and taking into account of the day/month
-        today = date.today()
-        
-        if isinstance(client.DOB, str):
-            # If DOB is string, parse it
-            try:
-                dob = datetime.strptime(client.DOB, '%Y-%m-%d').date()
-            except ValueError:
-                try:
-                    dob = datetime.strptime(client.DOB, '%d/%m/%Y').date()
-                except ValueError:
-                    print(f"❌ Invalid DOB format: {client.DOB}")
-                    dob = today  # Fallback
-        else:
-            dob = client.DOB
-        
-        age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+        protein, carb, fat = context.portion_macros
+        portion_calories = context.portion_calories
+
         # 5. Calculate TDEE using the helper function
-        tdee = calculate_tdee(
-            sex=client.Sex,
-            age=age,
-            weight=float(physical_details.Weight),
-            height=float(physical_details.Height),
-            bodyfat_percentage=float(physical_details.BodyFat) if physical_details.BodyFat else None,
-            activity_status=physical_details.ActivityStatus if physical_details.ActivityStatus else 'Sedentary'
+        context.tdee = calculate_tdee(
+            sex=context.sex,
+            age=context.age(),
+            weight=context.weight,
+            height=context.height,
+            bodyfat_percentage=context.body_fat,
+            activity_status=context.activity_status if context.activity_status else 'Sedentary'
         )
-        
-        if not tdee:
+
+        if not context.tdee:
             print(f"TDEE calculation failed for client: {client_id}")
             return None
-        
-        # 6. Get daily meal plan total calories
-        daily_plan = db.session.query(DailyMealPlan).join(
-            Meal, DailyMealPlan.MealPlanID == Meal.MealPlanID
-        ).filter(Meal.MealID == meal_id).first()
-        
-        if not daily_plan:
-            print(f"Daily plan not found for meal: {meal_id}")
-            return None
-        
-        # Calculate total daily calories from the meal plan
-        all_meals = Meal.query.filter_by(MealPlanID=daily_plan.MealPlanID).all()
-        total_plan_calories = 0
-        
-        for meal in all_meals:
-            meal_items = MealItem.query.filter_by(MealID=meal.MealID).all()
-            for mi in meal_items:
-                mi_item = get_item_by_id(mi.ItemID)
-                if mi_item:
-                    mi_calories_per_100g = calculate_item_calories(
-                        mi_item['ItemProtein'],
-                        mi_item['ItemCarb'],
-                        mi_item['ItemFat']
-                    )
-                    total_plan_calories += calculate_portion_calories(mi_calories_per_100g, mi.ConsumeAmount)
-        
+
         # 7. Determine plan goal
-        calorie_difference = total_plan_calories - tdee
+        calorie_difference = context.plan_calories - context.tdee
         if calorie_difference < -200:
-            plan_goal = "Weight loss"
+            context.plan_goal = "Weight loss"
         elif calorie_difference > 200:
-            plan_goal = "Weight gain"
+            context.plan_goal = "Weight gain"
         else:
-            plan_goal = "Weight maintenance"
+            context.plan_goal = "Weight maintenance"
 
         # 8. Prefilter candidates from DB (RAG-style)
-        candidates = _prefilter_candidates(item_id, item, limit=12)
+        item = context.original_item
+        context.candidates = _prefilter_candidates(item_id, item, limit=12)
 
-        if candidates:
-            candidates_text = "CANDIDATE ITEMS FROM DATABASE (pick the best one from this list):\n"
-            for c in candidates:
-                candidates_text += f"- {c['name']}: {c['cal_per_100g']} kcal/100g, P:{c['protein']}g C:{c['carb']}g F:{c['fat']}g per 100g\n"
-        else:
-            candidates_text = "No prefiltered candidates available. Suggest any suitable food."
+        return {
+            'item_id': item['ItemID'],
+            'item_name': item['ItemName'],
+            'portion': context.portion,
+            'portion_calories': portion_calories,
+            'protein': protein,
+            'carb': carb,
+            'fat': fat,
+            'original_item': item,
+            'medical_info': context.medical_info,
+            'plan_goal': context.plan_goal,
+            'candidates': context.candidates,
+            'context': context,
+        }
+        
+    except Exception as e:
+        print(f"Error in build_prompt_inputs: {str(e)}")
+        traceback.print_exc()
+        return None
+
+
+def render_dynamic_prompt(inputs):
+    """
+    Render the dynamic part of the prompt from build_prompt_inputs output
+    """
+    candidates = inputs['candidates']
 
-        # 9. Build the dynamic prompt
-        dynamic_prompt = f"""
+    if candidates:
+        candidates_text = "CANDIDATE ITEMS FROM DATABASE (pick the best one from this list):\n"
+        for c in candidates:
+            candidates_text += f"- {c['name']}: {c['cal_per_100g']} kcal/100g, P:{c['protein']}g C:{c['carb']}g F:{c['fat']}g per 100g\n"
+    else:
+        candidates_text = "No prefiltered candidates available. Suggest any suitable food."
+
+    # 9. Build the dynamic prompt
+    dynamic_prompt = f"""
 Plan Goal:
-Person is working on {plan_goal}
+Person is working on {inputs['plan_goal']}
 
 Person's medical status:
-{medical_info}
+{inputs['medical_info']}
 
 Macro values of replacement meal:
-{portion_calories} kcal, {protein} g protein, {carb} g carbohydrates, {fat} g fat
+{inputs['portion_calories']} kcal, {inputs['protein']} g protein, {inputs['carb']} g carbohydrates, {inputs['fat']} g fat
 
 Meal to replace:
-{item['ItemName']} ({meal_item.ConsumeAmount}g)
+{inputs['item_name']} ({inputs['portion']}g)
 
 {candidates_text}
 
 Pick the single best alternative from the candidate list above. Adjust portion to match the original meal's calorie and macro profile as closely as possible.
 """
-        
-        return dynamic_prompt
-        
-    except Exception as e:
-        print(f"Error in build_dynamic_prompt: {str(e)}")
-        traceback.print_exc()
+    return dynamic_prompt
+
+
+def build_dynamic_prompt(client_id, meal_id, item_id):
+    """
+    Build a dynamic prompt based on client's medical details, meal plan goals, and item details
+
+    """
+    inputs = build_prompt_inputs(client_id, meal_id, item_id)
+    if not inputs:
         return None
+    return render_dynamic_prompt(inputs)
+
+
+def build_alternative_cache_key(inputs):
+    """
+    LLM cache key: normalized hash of the inputs the prompt depends on (+ model and static prompt)
+    """
+    return make_cache_key({
+        **inputs['context'].cache_fields(),
+        'model': LLM_MODEL,
+        'static_prompt': hashlib.sha256(STATIC_ALTERNATIVE_PROMPT.encode('utf-8')).hexdigest(),
+    })
 
 def build_alternative_prompt(client_id, meal_id, item_id): 
     # call build_dynamic_prompt to get the dynamic part
@@ -891,11 +738,11 @@ def generate_chatgpt_response(prompt):
     """
     try:
         response = openai.chat.completions.create(
-            model="gpt-4.1-nano",
+            model=LLM_MODEL,
             messages=[
                 {
                     "role": "system", 
-                    "content": "You are a helpful dietitian assistant. Always respond in valid JSON format."
+                    "content": LLM_SYSTEM_MESSAGE
                 },
                 {
                     "role": "user", 
@@ -912,6 +759,53 @@ def generate_chatgpt_response(prompt):
         print(f"Error in generate_chatgpt_response: {e}")
         raise
 
+
+async def _chat_completion_async(client, prompt):
+    response = await client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=[
+            {"role": "system", "content": LLM_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=300,
+        temperature=0.7,
+        response_format={"type": "json_object"}
+    )
+    return response.choices[0].message.content
+
+
+async def _gather_chat_completions(prompt, count, timeout):
+    # Separate requests instead of n=count: the answers come back independently,
+    # one slow completion does not delay (or fail) the others
+    async with openai.AsyncOpenAI(api_key=openai.api_key, timeout=timeout, max_retries=0) as client:
+        return await asyncio.gather(
+            *(asyncio.wait_for(_chat_completion_async(client, prompt), timeout) for _ in range(count)),
+            return_exceptions=True
+        )
+
+
+def generate_chatgpt_responses(prompt, count=None, timeout=None):
+    """
+    Request `count` completions of the same prompt concurrently (OpenAI async client).
+    Every completion is cut after `timeout` seconds, so the worker is never blocked longer than that.
+
+    Returns:
+        tuple: (responses: list of str, errors: list of Exception)
+    """
+    count = count or LLM_ALTERNATIVE_COUNT
+    timeout = timeout or LLM_ALTERNATIVE_TIMEOUT_SECONDS
+
+    results = asyncio.run(_gather_chat_completions(prompt, count, timeout))
+
+    responses, errors = [], []
+    for result in results:
+        if isinstance(result, BaseException):
+            print(f"Error in generate_chatgpt_responses: {type(result).__name__}: {result}")
+            errors.append(result)
+        elif result:
+            responses.append(result)
+    return responses, errors
+
 # Mobile LLM
 def extract_food_name(food_string: str) -> str:
     """
@@ -921,17 +815,195 @@ def extract_food_name(food_string: str) -> str:
     """
     return food_string.split(" - ")[0].strip().lower()
 
+def parse_alternative_response(response_text):
+    """
+    Parse the JSON answer of the LLM
+
+    Returns:
+        tuple: (status: str, recommended_food: str or None)
+
+    Raises:
+        ValueError: if the response is not valid JSON or has an invalid structure
+    """
+    # Remove markdown code blocks if present
+    cleaned_text = response_text.strip()
+    
+    if cleaned_text.startswith('```'):
+        # Split by newlines and remove first/last lines
+        lines = cleaned_text.split('\n')
+        # Remove first line (```json or ```)
+        lines = lines[1:]
+        # Remove last line if it's ```
+        if lines and lines[-1].strip() == '```':
+            lines = lines[:-1]
+        cleaned_text = '\n'.join(lines).strip()
+
+    llm_response = json.loads(cleaned_text)
+    
+    # Validate response structure
+    if 'status' not in llm_response:
+        raise ValueError("Geçersiz LLM yanıtı (status eksik)")
+
+    if llm_response['status'] == 'no_alternative':
+        return 'no_alternative', None
+
+    # If status is 'ok', validate recommended_food
+    if llm_response['status'] == 'ok':
+        if 'recommended_food' not in llm_response or not llm_response['recommended_food']:
+            raise ValueError("Geçersiz LLM yanıtı (recommended_food eksik)")
+        return 'ok', llm_response['recommended_food']
+
+    raise ValueError(f"Beklenmeyen status değeri: {llm_response['status']}")
+
+
+def _candidate_ranks(candidates):
+    # Prefiltered candidates are sorted best first, rank 0 = most similar
+    return {normalize_food_name(c['name']): rank for rank, c in enumerate(candidates or [])}
+
+
+def _is_valid_alternative(response_text, candidate_ranks):
+    """
+    Response parses and ('no_alternative' or the food is one of the candidates).
+    Without candidates any parseable food is accepted.
+    """
+    try:
+        status, recommended_food = parse_alternative_response(response_text)
+    except (json.JSONDecodeError, ValueError):
+        return False
+
+    if status == 'no_alternative' or not candidate_ranks:
+        return True
+    return normalize_food_name(extract_food_name(recommended_food)) in candidate_ranks
+
+
+def _is_cacheable_alternative(response_text, candidate_ranks):
+    """
+    Only 'ok' answers go to the LLM cache: a cached 'no_alternative' would be served as a hit
+    and keep the API / offline recommender from being asked again for the whole TTL.
+    """
+    if not _is_valid_alternative(response_text, candidate_ranks):
+        return False
+    return parse_alternative_response(response_text)[0] == 'ok'
+
+
+def _pick_unused_alternative(response_texts, previous_food_names, candidates=None):
+    """
+    Best usable answer among several LLM responses:
+    an 'ok' food from the candidate list that was not suggested before (previous_food_names,
+    from suggestion_store_service), best prefilter rank first. If there is none but a response
+    said 'no_alternative', that one is returned. Unparseable / off-list responses are skipped.
+
+    Returns:
+        tuple: (status, recommended_food) or None if no response is usable
+    """
+    candidate_ranks = _candidate_ranks(candidates)
+    best = None
+    best_rank = None
+    no_alternative = False
+
+    for position, response_text in enumerate(response_texts):
+        if not _is_valid_alternative(response_text, candidate_ranks):
+            continue
+
+        status, recommended_food = parse_alternative_response(response_text)
+        if status == 'no_alternative':
+            no_alternative = True
+            continue
+
+        food_name = normalize_food_name(extract_food_name(recommended_food))
+        if food_name in previous_food_names:
+            continue
+
+        rank = candidate_ranks.get(food_name, position) if candidate_ranks else position
+        if best_rank is None or rank < best_rank:
+            best, best_rank = recommended_food, rank
+
+    if best:
+        return 'ok', best
+    if no_alternative:
+        return 'no_alternative', None
+    return None
+
+
+def _alternative_result(client_id, meal_id, item_id, status, recommended_food):
+    if status == 'no_alternative':
+        return True, "Uygun alternatif bulunamadı", {
+            'status': 'no_alternative',
+            'recommended_food': None
+        }
+
+    # 🟢 Gerçekten yeni alternatifse kaydet (client + meal + item bazında)
+    mark_suggested(client_id, meal_id, item_id, extract_food_name(recommended_food))
+
+    # Gerçekten yeni alternatif olan yemeği frontende gönder
+    print(f"✅ Alternative found: {recommended_food}")
+    return True, "Alternatif başarıyla oluşturuldu", {
+        'status': 'ok',
+        'recommended_food': recommended_food
+    }
+
+
+def _offline_alternative(client_id, meal_id, item_id, inputs, previous_food_names, reason):
+    """
+    Local recommender answer (offline_recommender_service), None if no candidate is usable
+    """
+    if not inputs:
+        return None
+
+    recommended_food = recommend_offline(inputs, previous_food_names)
+    if not recommended_food:
+        return None
+
+    print(f"↩️ Offline recommender used ({reason})")
+    return _alternative_result(client_id, meal_id, item_id, 'ok', recommended_food)
+
+
 def get_alternative_mealitem(client_id, meal_id, item_id):
     """
     Get alternative meal item suggestion using LLM
+    Answers are cached by prompt fingerprint (llm_cache_service), the API is only called
+    when every cached suggestion for the same inputs was already shown.
+    On a miss LLM_ALTERNATIVE_COUNT completions are requested concurrently and the best unused
+    candidate is returned. On timeout, provider errors or without an API key the offline
+    recommender answers (ALTERNATIVE_PROVIDER=offline forces it).
     
     """
+    inputs = None
+    previous_food_names = set()
+
     try:
         # Build the full prompt
-        full_prompt = build_alternative_prompt(client_id, meal_id, item_id)
+        inputs = build_prompt_inputs(client_id, meal_id, item_id)
         
-        if not full_prompt:
+        if not inputs:
             return False, "Prompt oluşturulamadı", None
+
+        # Foods already shown for this client's meal item
+        previous_food_names = get_suggested_names(client_id, meal_id, item_id)
+
+        if is_offline_provider_forced():
+            offline = _offline_alternative(client_id, meal_id, item_id, inputs, previous_food_names, "ALTERNATIVE_PROVIDER=offline")
+            return offline or (False, "Yeni bir alternatif bulunamadı", {
+                'status': 'no_alternative',
+                'recommended_food': None
+            })
+
+        # Cache lookup
+        cache_key = build_alternative_cache_key(inputs)
+        lookup_start = time.perf_counter()
+        cached_responses, cached_latency_ms = get_cached_responses(cache_key)
+        cached_responses = cached_responses or []
+
+        print(f"🧾 Prompt context: {inputs['context'].log_summary()}")
+
+        # A cached 'no_alternative' (written by older versions) is a miss: ask the API / offline recommender again
+        picked = _pick_unused_alternative(cached_responses, previous_food_names, inputs['candidates'])
+        if picked and picked[0] == 'ok':
+            record_cache_hit(cached_latency_ms, (time.perf_counter() - lookup_start) * 1000)
+            print("⚡ Alternative served from cache")
+            return _alternative_result(client_id, meal_id, item_id, *picked)
+
+        record_cache_miss()
         
         print("🤖 Calling OpenAI API...")
         
@@ -939,93 +1011,67 @@ def get_alternative_mealitem(client_id, meal_id, item_id):
         openai.api_key = os.getenv('OPENAI_API_KEY')
         
         if not openai.api_key:
-            return False, "OpenAI API key bulunamadı", None
-        
-        # Call the helper function with your custom API
-        response_text = generate_chatgpt_response(full_prompt)
-        print(f"📥 LLM Raw Response: {response_text}")
-        
-        # Parse JSON response
-        try:
-            # Remove markdown code blocks if present
-            cleaned_text = response_text.strip()
-            
-            if cleaned_text.startswith('```'):
-                # Split by newlines and remove first/last lines
-                lines = cleaned_text.split('\n')
-                # Remove first line (```json or ```)
-                lines = lines[1:]
-                # Remove last line if it's ```
-                if lines and lines[-1].strip() == '```':
-                    lines = lines[:-1]
-                cleaned_text = '\n'.join(lines).strip()
-
-            llm_response = json.loads(response_text)
-            
-            # Validate response structure
-            if 'status' not in llm_response:
-                return False, "Geçersiz LLM yanıtı (status eksik)", None
-            
-            # Check status
-            if llm_response['status'] == 'no_alternative':
-                return True, "Uygun alternatif bulunamadı", {
-                    'status': 'no_alternative',
-                    'recommended_food': None
-                }
-            
-            # If status is 'ok', validate recommended_food
-            if llm_response['status'] == 'ok':
-                if 'recommended_food' not in llm_response or not llm_response['recommended_food']:
-                    return False, "Geçersiz LLM yanıtı (recommended_food eksik)", None
-                
-                # There is no error with status error and invalid recommended food format.
-                # Now we check if the name is exists in the previous suggested food list to make it suggest different type of foods
-                recommended_food = llm_response.get('recommended_food')
-                recommended_name = extract_food_name(recommended_food)
-                previous_food_names = {
-                    extract_food_name(item)
-                    for item in previous_requested_itemList
-                }
+            offline = _offline_alternative(client_id, meal_id, item_id, inputs, previous_food_names, "no API key")
+            return offline or (False, "OpenAI API key bulunamadı", None)
+
+        full_prompt = STATIC_ALTERNATIVE_PROMPT + "\n\n" + render_dynamic_prompt(inputs)
+        if previous_food_names:
+            full_prompt += "\nAlready suggested, do NOT suggest these again: " + ", ".join(sorted(previous_food_names)) + "\n"
+
+        # N completions at once, each one limited by LLM_ALTERNATIVE_TIMEOUT_SECONDS
+        api_start = time.perf_counter()
+        response_texts, errors = generate_chatgpt_responses(full_prompt)
+        api_latency_ms = (time.perf_counter() - api_start) * 1000
+        record_api_call(api_latency_ms)
+        print(f"📥 LLM Raw Responses ({len(response_texts)}/{len(response_texts) + len(errors)}): {response_texts}")
+
+        # Valid 'ok' answers are cached for the same inputs (distinct suggestions only)
+        candidate_ranks = _candidate_ranks(inputs['candidates'])
+        new_responses = [
+            text for text in dict.fromkeys(response_texts)
+            if text not in cached_responses and _is_cacheable_alternative(text, candidate_ranks)
+        ]
+        if new_responses:
+            kept_responses = [text for text in cached_responses if _is_cacheable_alternative(text, candidate_ranks)]
+            store_responses(
+                cache_key,
+                (kept_responses + new_responses)[-LLM_CACHE_MAX_RESPONSES_PER_KEY:],
+                api_latency_ms
+            )
 
-                # 🔴 Aynı item tekrar önerildiyse
-                # status no alternative döndür böylece frontendde hata gözüksün
-                if recommended_name in previous_food_names:
-                    print("⚠️ Same item suggested again, no new alternative found")
-                    # DEBUGGING print(f"📋 Previous requested items: {previous_requested_itemList}")
-                    return False, "Yeni bir alternatif bulunamadı", {
-                        'status': 'no_alternative',
-                        'recommended_food': None
-                    }
-
-                # 🟢 Gerçekten yeni alternatifse kaydet
-                previous_requested_itemList.append(recommended_food)
-
-                # Gerçekten yeni alternatif olan yemeği frontende gönder
-                print(f"✅ Alternative found: {recommended_food}")
-                # DEBUGGING print(f"📋 Previous requested items: {previous_requested_itemList}")
-                return True, "Alternatif başarıyla oluşturuldu", {
-                    'status': 'ok',
-                    'recommended_food': recommended_food
-                }
-                
-            
-            return False, f"Beklenmeyen status değeri: {llm_response['status']}", None
-            
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"❌ Error parsing LLM response: {e}")
-            print(f"Raw response: {response_text}")
-            return False, "LLM yanıtı işlenemedi", None
+        picked = _pick_unused_alternative(response_texts, previous_food_names, inputs['candidates'])
+        if picked:
+            return _alternative_result(client_id, meal_id, item_id, *picked)
+
+        # Timeout, API errors, off-list or already suggested answers: offline recommender
+        offline = _offline_alternative(client_id, meal_id, item_id, inputs, previous_food_names, "no usable LLM answer")
+        if offline:
+            return offline
+
+        if errors and all(isinstance(e, openai.RateLimitError) for e in errors) and not response_texts:
+            raise errors[0]
+        if errors and not response_texts:
+            return False, "AI servisi geçici olarak kullanılamıyor", None
+
+        # 🔴 Aynı item tekrar önerildiyse
+        # status no alternative döndür böylece frontendde hata gözüksün
+        print("⚠️ Same item suggested again, no new alternative found")
+        return False, "Yeni bir alternatif bulunamadı", {
+            'status': 'no_alternative',
+            'recommended_food': None
+        }
     
     except openai.RateLimitError:
         print("⚠️ OpenAI Rate limit exceeded")
-        return False, "API rate limit aşıldı. Lütfen daha sonra tekrar deneyin.", None
+        offline = _offline_alternative(client_id, meal_id, item_id, inputs, previous_food_names, "rate limit")
+        return offline or (False, "API rate limit aşıldı. Lütfen daha sonra tekrar deneyin.", None)
     
     except openai.APIError as e:
         print(f"❌ OpenAI API error: {e}")
-        return False, "AI servisi geçici olarak kullanılamıyor", None
+        offline = _offline_alternative(client_id, meal_id, item_id, inputs, previous_food_names, "API error")
+        return offline or (False, "AI servisi geçici olarak kullanılamıyor", None)
     
     except Exception as e:
         print(f"❌ Error in get_alternative_mealitem: {str(e)}")
-        import traceback
         traceback.print_exc()
-        return False, f"Server error: {str(e)}", None
\ No newline at end of file
+        return False, f"Server error: {str(e)}", None
@@ -0,0 +1,166 @@
+from models.models import DailyMealPlan, Meal, MealItem, Item
+from db_config import db
+from sqlalchemy import func
+
+# Materialized kcal / protein / carb / fat totals on Meal and DailyMealPlan (TotalCalories, TotalProtein, ...).
+# Toplamlar sadece plandaki ORİJİNAL item'lardan hesaplanır (ChangedItem toplamı değiştirmez, eskiden de öyleydi).
+# meal_plan_writer_service yazarken hesaplar (MealItem'ları ekleyen / silen tek yer, feedback sadece ChangedItem'ı değiştirir).
+# Okuma tarafı saklanan değeri kullanır, NULL ise (eski kayıtlar) eskisi gibi hesaplar.
+# Drift kontrolü: flask check-nutrition-totals [--fix]
+# Kolonlar: migrations/versions/2ed7b855b6eb_performance_schema_changes.py (flask db upgrade)
+
+TOTAL_FIELDS = ('TotalCalories', 'TotalProtein', 'TotalCarb', 'TotalFat')
+DRIFT_TOLERANCE = 0.01
+
+
+def portion_nutrition(protein, carb, fat, amount):
+    """
+    Nutrition of `amount` grams of an item given per 100g macros
+
+    Returns:
+        tuple: (kcal, protein, carb, fat)
+    """
+    ratio = float(amount or 0) / 100.0
+    protein = float(protein or 0) * ratio
+    carb = float(carb or 0) * ratio
+    fat = float(fat or 0) * ratio
+    return (protein * 4 + carb * 4 + fat * 9, protein, carb, fat)
+
+
+def add_totals(totals, values):
+    return tuple(t + v for t, v in zip(totals, values))
+
+
+def empty_totals():
+    return (0.0, 0.0, 0.0, 0.0)
+
+
+def set_totals(row, totals):
+    """
+    Write (kcal, protein, carb, fat) to a Meal or DailyMealPlan object (no commit)
+    """
+    for field, value in zip(TOTAL_FIELDS, totals):
+        setattr(row, field, value)
+
+
+def get_stored_totals(row):
+    """
+    Stored totals of a Meal / DailyMealPlan (ORM object or column row)
+
+    Returns:
+        tuple: (kcal, protein, carb, fat) or None if not materialized yet
+    """
+    values = tuple(getattr(row, field, None) for field in TOTAL_FIELDS)
+    if any(v is None for v in values):
+        return None
+    return values
+
+
+def compute_meal_totals(meal_ids):
+    """
+    Totals of the given meals from MealItem x Item, one grouped query
+
+    Returns:
+        dict: {meal_id: (kcal, protein, carb, fat)}, meals without items are (0, 0, 0, 0)
+    """
+    if not meal_ids:
+        return {}
+
+    ratio = MealItem.ConsumeAmount / 100.0
+    protein = func.coalesce(Item.ItemProtein, 0) * ratio
+    carb = func.coalesce(Item.ItemCarb, 0) * ratio
+    fat = func.coalesce(Item.ItemFat, 0) * ratio
+
+    rows = db.session.query(
+        MealItem.MealID,
+        func.sum(protein * 4 + carb * 4 + fat * 9),
+        func.sum(protein),
+        func.sum(carb),
+        func.sum(fat),
+    ).join(Item, MealItem.ItemID == Item.ItemID)\
+        .filter(MealItem.MealID.in_(meal_ids))\
+        .group_by(MealItem.MealID).all()
+
+    totals = {meal_id: empty_totals() for meal_id in meal_ids}
+    for meal_id, kcal, p, c, f in rows:
+        totals[meal_id] = (float(kcal or 0), float(p or 0), float(c or 0), float(f or 0))
+    return totals
+
+
+def _drifted(stored, expected):
+    if stored is None:
+        return True
+    return any(abs(s - e) > DRIFT_TOLERANCE for s, e in zip(stored, expected))
+
+
+def check_nutrition_totals(fix=False, client_id=None, batch_size=500):
+    """
+    Compare stored totals with totals recomputed from MealItem x Item, plan by plan in batches.
+
+    Args:
+        fix (bool): store the recomputed totals for every drifted meal / plan
+        client_id (str, optional): only this client's plans
+
+    Returns:
+        dict: {'plansChecked', 'mealsChecked', 'driftedPlans', 'driftedMeals', 'fixed', 'samples'}
+    """
+    report = {
+        'plansChecked': 0,
+        'mealsChecked': 0,
+        'driftedPlans': 0,
+        'driftedMeals': 0,
+        'fixed': False,
+        'samples': [],  # first few drifted rows, for the CLI output
+    }
+
+    last_plan_id = 0
+    while True:
+        # Keyset over MealPlanID, one batch of plans at a time
+        plan_query = db.session.query(DailyMealPlan.MealPlanID, *[getattr(DailyMealPlan, f) for f in TOTAL_FIELDS])\
+            .filter(DailyMealPlan.MealPlanID > last_plan_id)
+        if client_id:
+            plan_query = plan_query.filter(DailyMealPlan.ClientID == client_id)
+        plans = plan_query.order_by(DailyMealPlan.MealPlanID.asc()).limit(batch_size).all()
+
+        if not plans:
+            break
+        last_plan_id = plans[-1].MealPlanID
+
+        plan_ids = [p.MealPlanID for p in plans]
+        meals = db.session.query(Meal.MealID, Meal.MealPlanID, *[getattr(Meal, f) for f in TOTAL_FIELDS])\
+            .filter(Meal.MealPlanID.in_(plan_ids)).all()
+        meal_totals = compute_meal_totals([m.MealID for m in meals])
+
+        expected_plan_totals = {plan_id: empty_totals() for plan_id in plan_ids}
+        meal_fixes = []
+        for m in meals:
+            expected = meal_totals[m.MealID]
+            expected_plan_totals[m.MealPlanID] = add_totals(expected_plan_totals[m.MealPlanID], expected)
+
+            stored = get_stored_totals(m)
+            if _drifted(stored, expected):
+                report['driftedMeals'] += 1
+                meal_fixes.append({'MealID': m.MealID, **dict(zip(TOTAL_FIELDS, expected))})
+                if len(report['samples']) < 20:
+                    report['samples'].append({'mealID': m.MealID, 'stored': stored, 'expected': expected})
+
+        plan_fixes = []
+        for p in plans:
+            expected = expected_plan_totals[p.MealPlanID]
+            stored = get_stored_totals(p)
+            if _drifted(stored, expected):
+                report['driftedPlans'] += 1
+                plan_fixes.append({'MealPlanID': p.MealPlanID, **dict(zip(TOTAL_FIELDS, expected))})
+                if len(report['samples']) < 20:
+                    report['samples'].append({'mealPlanID': p.MealPlanID, 'stored': stored, 'expected': expected})
+
+        report['plansChecked'] += len(plans)
+        report['mealsChecked'] += len(meals)
+
+        if fix and (meal_fixes or plan_fixes):
+            db.session.bulk_update_mappings(Meal, meal_fixes)
+            db.session.bulk_update_mappings(DailyMealPlan, plan_fixes)
+            db.session.commit()
+            report['fixed'] = True
+
+    return report
@@ -0,0 +1,111 @@
+from services.suggestion_store_service import normalize_food_name
+import os
+
+# Deterministic, local alternative recommender (no LLM, no network).
+# OpenAI hata verdiğinde / rate limit / timeout / API key yoksa get_alternative_mealitem bunu kullanır.
+# ALTERNATIVE_PROVIDER=offline ile her zaman bu kullanılır (load test, offline geliştirme).
+# Aday listesi _prefilter_candidates'ten gelir, her aday için porsiyon küçük bir least-squares ile bulunur:
+#   min_x  sum_i w_i * (target_i - x * per_100g_i)^2   i in (kcal, protein, carb, fat)
+#   => x = sum(w * a * t) / sum(w * a^2)   (tek değişken, kapalı form)
+
+ALTERNATIVE_PROVIDER = os.getenv('ALTERNATIVE_PROVIDER', 'openai').lower()
+
+MIN_PORTION_GRAMS = 10
+MAX_PORTION_GRAMS = 1000
+
+# Every dimension is weighted by 1 / target^2 (relative error), floors keep tiny targets from dominating
+CALORIE_WEIGHT_FLOOR = 10.0
+MACRO_WEIGHT_FLOOR = 1.0
+
+
+def is_offline_provider_forced():
+    return ALTERNATIVE_PROVIDER == 'offline'
+
+
+def _weights(target):
+    kcal, protein, carb, fat = target
+    return (
+        1 / max(kcal, CALORIE_WEIGHT_FLOOR) ** 2,
+        1 / max(protein, MACRO_WEIGHT_FLOOR) ** 2,
+        1 / max(carb, MACRO_WEIGHT_FLOOR) ** 2,
+        1 / max(fat, MACRO_WEIGHT_FLOOR) ** 2,
+    )
+
+
+def solve_portion(target, per_100g):
+    """
+    Portion (grams) of a food that best matches the target kcal and macros (weighted least squares).
+
+    Args:
+        target (tuple): (kcal, protein, carb, fat) of the original portion
+        per_100g (tuple): (kcal, protein, carb, fat) of the candidate per 100g
+
+    Returns:
+        tuple: (portion_grams: int, residual: float) or None if the candidate has no nutrients
+    """
+    weights = _weights(target)
+
+    numerator = sum(w * a * t for w, a, t in zip(weights, per_100g, target))
+    denominator = sum(w * a * a for w, a in zip(weights, per_100g))
+    if denominator <= 0:
+        return None
+
+    portion = round(numerator / denominator * 100)
+    portion = min(max(portion, MIN_PORTION_GRAMS), MAX_PORTION_GRAMS)
+
+    ratio = portion / 100
+    residual = sum(w * (t - a * ratio) ** 2 for w, a, t in zip(weights, per_100g, target))
+    return portion, residual
+
+
+def format_recommended_food(name, portion, per_100g):
+    """
+    Same format as the LLM's recommended_food: "Name - Portion - Calories - Protein - Carb - Fat"
+    """
+    ratio = portion / 100
+    kcal, protein, carb, fat = per_100g
+    return (
+        f"{name} - {portion} - {round(kcal * ratio)} - "
+        f"{round(protein * ratio, 1)} - {round(carb * ratio, 1)} - {round(fat * ratio, 1)}"
+    )
+
+
+def recommend_offline(inputs, previous_food_names=None):
+    """
+    Best prefiltered candidate (not suggested before) with the portion that matches the original item best.
+
+    Args:
+        inputs (dict): build_prompt_inputs output (portion_calories, protein, carb, fat, candidates)
+        previous_food_names (set): normalized names already suggested for this meal item
+
+    Returns:
+        str: recommended_food string, or None if no candidate is usable
+    """
+    previous_food_names = previous_food_names or set()
+    target = (
+        float(inputs['portion_calories'] or 0),
+        float(inputs['protein'] or 0),
+        float(inputs['carb'] or 0),
+        float(inputs['fat'] or 0),
+    )
+
+    best = None
+    for rank, candidate in enumerate(inputs['candidates']):
+        if normalize_food_name(candidate['name']) in previous_food_names:
+            continue
+
+        per_100g = (candidate['cal_per_100g'], candidate['protein'], candidate['carb'], candidate['fat'])
+        solved = solve_portion(target, per_100g)
+        if solved is None:
+            continue
+
+        portion, residual = solved
+        # Lowest residual wins, prefilter rank breaks ties (deterministic)
+        if best is None or (residual, rank) < (best[0], best[1]):
+            best = (residual, rank, candidate['name'], portion, per_100g)
+
+    if best is None:
+        return None
+
+    _, _, name, portion, per_100g = best
+    return format_recommended_food(name, portion, per_100g)
@@ -1,48 +1,71 @@
 from models.models import PhysicalDetails, ClientProgressSnapshot, Client
+from db_config import db
+from services.progress_snapshot_service import adherence_rate
+from services import report_vector_renderer
+from sqlalchemy import func, or_
 from collections import defaultdict
-from datetime import datetime
-import io
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_pdf import PdfPages
-import numpy as np
-from matplotlib.patches import FancyBboxPatch
+from datetime import datetime, timedelta
+import hashlib
+import os
+
+# Progress PDF renderer:
+#   'matplotlib' (varsayılan) modül sadece ilk raporda (lazy) import edilir
+#   'vector'     opt-in, SVG / PDF doğrudan üretilir, matplotlib hiç import edilmez. Gömülü font yok (Helvetica,
+#                WinAnsi): ğ / ş / ı / İ ASCII harfe düşer ("Şule Işık" -> "Sule Isik"), Türkçe isimler için uygun değil
+# matplotlib'in module load'da import edilmesi her worker'a yüzlerce ms ve onlarca MB ekliyordu, sadece PDF endpoint'i kullanıyor.
+REPORT_RENDERERS = ('matplotlib', 'vector')
+PROGRESS_REPORT_RENDERER = os.getenv('PROGRESS_REPORT_RENDERER', 'matplotlib')
+
+PROGRESS_METRICS = ('weight', 'bodyfat', 'adherence')
+PROGRESS_DURATIONS = ('weekly', 'monthly', 'raw')
+
+
+def _metric_source(metric, client_id, since=None):
+    """
+    Where a progress metric lives
+
+    Returns:
+        tuple: (date column, value expression, filters) or None for an unknown metric
+    """
+    if metric in ('weight', 'bodyfat'):
+        date_column = PhysicalDetails.MeasurementDate
+        value = PhysicalDetails.Weight if metric == 'weight' else PhysicalDetails.BodyFat
+        filters = [PhysicalDetails.ClientID == client_id, value.isnot(None), date_column.isnot(None)]
+    elif metric == 'adherence':
+        date_column = ClientProgressSnapshot.ProgressDate
+        # Same rounding as adherence_rate, so SQL averages match the Python ones
+        value = func.round(ClientProgressSnapshot.SuccessAmount * 100.0 / ClientProgressSnapshot.Total, 2)
+        filters = [ClientProgressSnapshot.ClientID == client_id, ClientProgressSnapshot.Total > 0]
+    else:
+        return None
+
+    if since is not None:
+        filters.append(date_column >= since)
+    return date_column, value, filters
+
+
+def _get_raw(client_id, metric, since=None):
+    date_column, value, filters = _metric_source(metric, client_id, since)
+    records = db.session.query(date_column, value).filter(*filters).order_by(date_column.asc()).all()
+    return [{'date': d.isoformat(), 'value': float(v)} for d, v in records] #Return the of all the raw data
 
 #Physical Details Table: Weight,  raw data => {'date': '2025-10-01', 'value': 72.4}
-def _get_weight_raw(client_id):  #Match the clientID and get all weight records for that client with their measurement dates
-    records = (
-        PhysicalDetails.query
-        .filter_by(ClientID=client_id)
-        .filter(PhysicalDetails.Weight.isnot(None))
-        .filter(PhysicalDetails.MeasurementDate.isnot(None))
-        .order_by(PhysicalDetails.MeasurementDate.asc())
-        .all()
-    )
-    return [{'date': r.MeasurementDate.isoformat(), 'value': float(r.Weight)} for r in records] #Return the of all the raw data
+def _get_weight_raw(client_id, since=None):  #Match the clientID and get all weight records for that client with their measurement dates
+    return _get_raw(client_id, 'weight', since)
 
 #Physical Details Table: BodyFat raw data => {'date': '2025-10-01', 'value': 18.8},
-def _get_bodyfat_raw(client_id): #Match the clientID and get all BodyFat records for that client with their measurement dates
-    records = (
-        PhysicalDetails.query
-        .filter_by(ClientID=client_id)
-        .filter(PhysicalDetails.BodyFat.isnot(None))
-        .filter(PhysicalDetails.MeasurementDate.isnot(None))
-        .order_by(PhysicalDetails.MeasurementDate.asc())
-        .all()
-    )
-    return [{'date': r.MeasurementDate.isoformat(), 'value': float(r.BodyFat)} for r in records]
+def _get_bodyfat_raw(client_id, since=None): #Match the clientID and get all BodyFat records for that client with their measurement dates
+    return _get_raw(client_id, 'bodyfat', since)
 
-#clientprogresssnapshot table: AdherenceRate raw data => {'date': '2025-11-01', 'value': 82.5}
-def _get_adherence_raw(client_id): #Match the clientID and get all AdherenceRate records for that client with their measurement dates
+#clientprogresssnapshot table: adherence raw data => {'date': '2025-11-01', 'value': 82.5}
+def _get_adherence_raw(client_id, since=None): #Match the clientID and get all snapshots, the rate is derived from the cumulative SuccessAmount / Total
     records = (
-        ClientProgressSnapshot.query
-        .filter_by(ClientID=client_id)
-        .filter(ClientProgressSnapshot.AdherenceRate.isnot(None))
+        db.session.query(ClientProgressSnapshot.ProgressDate, ClientProgressSnapshot.SuccessAmount, ClientProgressSnapshot.Total)
+        .filter(*_metric_source('adherence', client_id, since)[2])
         .order_by(ClientProgressSnapshot.ProgressDate.asc())
         .all()
     )
-    return [{'date': r.ProgressDate.isoformat(), 'value': float(r.AdherenceRate)} for r in records]
+    return [{'date': r.ProgressDate.isoformat(), 'value': adherence_rate(r.SuccessAmount, r.Total)} for r in records]
 
 #data => {'date': '2025-10-01', 'value': 72.4},
 #return => [{"date": "2026-W12", "value": 81.0}, ...] "year-week"
@@ -66,29 +89,234 @@ def _group_monthly(data):
     return [{'date': k, 'value': round(sum(v) / len(v), 2)} for k, v in sorted(groups.items())]
 
 
+# Haftalık / aylık gruplama SQL'de (GROUP BY bucket + AVG), key'ler Python'daki ile aynı: '%G-W%V' (ISO hafta), '%Y-%m'.
+# MySQL: DATE_FORMAT('%x-W%v' | '%Y-%m'), PostgreSQL: to_char, SQLite: strftime ('%G' / '%V' SQLite 3.46+).
+# Desteklenmeyen dialect'te satırlar çekilip _group_weekly / _group_monthly ile Python'da gruplanır.
+def _bucket_expression(date_column, duration):
+    """
+    Returns:
+        SQL expression of the week / month key of the date, None if the dialect can't build it
+    """
+    dialect = db.session.get_bind().dialect
+    dialect_name = dialect.name
+    weekly = duration == 'weekly'
+    if dialect_name in ('mysql', 'mariadb'):
+        return func.date_format(date_column, '%x-W%v' if weekly else '%Y-%m')
+    if dialect_name == 'postgresql':
+        return func.to_char(date_column, 'IYYY-"W"IW' if weekly else 'YYYY-MM')
+    if dialect_name == 'sqlite' and (not weekly or (dialect.server_version_info or ()) >= (3, 46)):
+        return func.strftime('%G-W%V' if weekly else '%Y-%m', date_column)
+    return None
+
+
+def _bucket_start(since, duration):
+    # `since` is moved back to the start of its week / month, so the first bucket is not a partial average
+    if duration == 'weekly':
+        return since - timedelta(days=since.weekday())
+    if duration == 'monthly':
+        return since.replace(day=1)
+    return since
+
+
+def _get_grouped(client_id, metric, duration, since=None):
+    """
+    Weekly / monthly averages of a metric, bucketed and averaged in SQL
+
+    Returns:
+        list: [{'date': '2026-W12' | '2026-03', 'value': 81.0}, ...] ordered by bucket
+    """
+    date_column, value, filters = _metric_source(metric, client_id, since)
+    bucket = _bucket_expression(date_column, duration)
+    if bucket is None:
+        raw = _get_raw(client_id, metric, since)
+        return _group_weekly(raw) if duration == 'weekly' else _group_monthly(raw)
+
+    bucket = bucket.label('bucket')
+    rows = (
+        db.session.query(bucket, func.avg(value))
+        .filter(*filters)
+        .group_by(bucket)
+        .order_by(bucket.asc())
+        .all()
+    )
+    return [{'date': key, 'value': round(float(avg), 2)} for key, avg in rows]
+
 
 #Main function for deciding which function should be called based on metric and duration parameters
-def get_progress_data(client_id, metric, duration):
-    if metric == 'weight':
-        raw = _get_weight_raw(client_id)
-    elif metric == 'bodyfat':
-        raw = _get_bodyfat_raw(client_id)
+def get_progress_data(client_id, metric, duration, since=None):
+    """
+    Progress points of one metric for the mobile progress tab.
+
+    Args:
+        metric (str): 'weight' | 'bodyfat' | 'adherence'
+        duration (str): 'weekly' | 'monthly' (averages per bucket), anything else returns every record
+        since (date, optional): only points from this date on (for weekly / monthly from the start of its week / month)
+
+    Returns:
+        tuple: (success: bool, message: str, data: list [{'date', 'value'}, ...])
+    """
+    if metric not in ('weight', 'bodyfat', 'adherence'):
+        return False, 'Invalid metric', None
+
+    if since is not None:
+        since = _bucket_start(since, duration)
+
+    if duration in ('weekly', 'monthly'):
+        data = _get_grouped(client_id, metric, duration, since)
     elif metric == 'adherence':
-        raw = _get_adherence_raw(client_id)
+        data = _get_adherence_raw(client_id, since)
     else:
-        return False, 'Invalid metric', None
+        data = _get_raw(client_id, metric, since)
 
-    if not raw:
+    if not data:
         return True, 'No data', []
-    print(f"Raw data for {metric}: {raw}")
-    if duration == 'weekly':
-        data = _group_weekly(raw)
-    elif duration == 'monthly':
-        data = _group_monthly(raw)
+    return True, 'Success', data
+
+
+# Progress tab tek istekte: GET /progress-data/combined, istenen metrik x süre kombinasyonları tek response'ta.
+# Weight + BodyFat tek PhysicalDetails taraması, adherence tek ClientProgressSnapshot taraması:
+#   GROUP BY (hafta key, ay key) + SUM / COUNT, haftalık ve aylık ortalamalar aynı satırlardan Python'da toplanır.
+#   'raw' istendiyse (ya da dialect hafta key'i üretemiyorsa) satırlar bir kez çekilir, gruplama Python'da.
+# ETag = progress verisinin özeti (get_progress_data_version), veri değişmediyse 304, hiç tarama yapılmaz.
+def get_progress_data_version(client_id, metrics=PROGRESS_METRICS):
+    """
+    Aggregates that change whenever a progress point of the client changes
+    (latest MeasurementDate / ProgressDate, plus counts and sums: snapshots are incremented in place)
+
+    Returns:
+        tuple: (physical aggregates or None, adherence aggregates or None)
+    """
+    physical = adherence = None
+    if 'weight' in metrics or 'bodyfat' in metrics:
+        physical = tuple(db.session.query(
+            func.count(PhysicalDetails.PhysicalDetailID),
+            func.max(PhysicalDetails.PhysicalDetailID),
+            func.max(PhysicalDetails.MeasurementDate),
+            func.sum(PhysicalDetails.Weight),
+            func.sum(PhysicalDetails.BodyFat),
+        ).filter(PhysicalDetails.ClientID == client_id).one())
+    if 'adherence' in metrics:
+        adherence = tuple(db.session.query(
+            func.count(ClientProgressSnapshot.SnapshotID),
+            func.max(ClientProgressSnapshot.ProgressDate),
+            func.sum(ClientProgressSnapshot.SuccessAmount),
+            func.sum(ClientProgressSnapshot.Total),
+        ).filter(ClientProgressSnapshot.ClientID == client_id).one())
+    return physical, adherence
+
+
+def progress_data_etag(client_id, metrics, durations, since=None):
+    """
+    Returns:
+        str: ETag of the combined progress response
+    """
+    raw = repr((client_id, tuple(metrics), tuple(durations), since.isoformat() if since else None,
+                get_progress_data_version(client_id, metrics)))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def _bucket_key(value, duration):
+    return value.strftime('%G-W%V' if duration == 'weekly' else '%Y-%m')
+
+
+def _scan_progress(date_column, values, filters, durations, since=None):
+    """
+    Every requested duration of one or more metrics from a single scan of their table
+
+    Args:
+        values (dict): {metric: value expression}, NULL values are skipped per metric
+
+    Returns:
+        dict: {metric: {duration: [{'date', 'value'}, ...]}}
+    """
+    starts = {duration: _bucket_start(since, duration) for duration in durations} if since else {}
+    if starts:
+        filters = filters + [date_column >= min(starts.values())]
+
+    buckets = {duration: _bucket_expression(date_column, duration) for duration in durations if duration != 'raw'}
+    result = {metric: {} for metric in values}
+
+    if 'raw' in durations or any(bucket is None for bucket in buckets.values()):
+        rows = db.session.query(date_column, *values.values()).filter(*filters).order_by(date_column.asc()).all()
+        for i, metric in enumerate(values, start=1):
+            raw = [{'date': row[0].isoformat(), 'value': float(row[i])} for row in rows if row[i] is not None]
+            for duration in durations:
+                if duration == 'weekly':
+                    result[metric][duration] = _group_weekly(raw)
+                elif duration == 'monthly':
+                    result[metric][duration] = _group_monthly(raw)
+                else:
+                    result[metric][duration] = raw
     else:
-        data = raw
+        # One row per (week, month) pair, a week crossing a month boundary is split in two rows
+        labeled = [bucket.label(f'{duration}_key') for duration, bucket in buckets.items()]
+        aggregates = []
+        for value in values.values():
+            aggregates += [func.sum(value), func.count(value)]
+        rows = db.session.query(*labeled, *aggregates).filter(*filters).group_by(*labeled).all()
+
+        totals = {metric: {duration: {} for duration in buckets} for metric in values}
+        for row in rows:
+            keys, sums = row[:len(buckets)], row[len(buckets):]
+            for i, metric in enumerate(values):
+                total, count = sums[2 * i], sums[2 * i + 1]
+                if not count:
+                    continue
+                for duration, key in zip(buckets, keys):
+                    bucket_total = totals[metric][duration].setdefault(key, [0.0, 0])
+                    bucket_total[0] += float(total)
+                    bucket_total[1] += count
+        for metric, by_duration in totals.items():
+            for duration, groups in by_duration.items():
+                result[metric][duration] = [
+                    {'date': key, 'value': round(total / count, 2)} for key, (total, count) in sorted(groups.items())
+                ]
+
+    # The scan started at the earliest bucket start, trim each duration to its own
+    for by_duration in result.values():
+        for duration, start in starts.items():
+            first = start.isoformat() if duration == 'raw' else _bucket_key(start, duration)
+            by_duration[duration] = [point for point in by_duration[duration] if point['date'] >= first]
+    return result
+
+
+def get_progress_metrics(client_id, metrics, durations, since=None):
+    """
+    Several progress metrics and durations in one call (mobile progress tab).
 
-    return True, 'Success', data
+    Args:
+        metrics (list): subset of PROGRESS_METRICS
+        durations (list): subset of PROGRESS_DURATIONS ('raw' = every record)
+        since (date, optional): same as get_progress_data
+
+    Returns:
+        tuple: (success: bool, message: str, data: dict {metric: {duration: [{'date', 'value'}, ...]}})
+    """
+    if not metrics or any(m not in PROGRESS_METRICS for m in metrics):
+        return False, 'Invalid metric', None
+    if not durations or any(d not in PROGRESS_DURATIONS for d in durations):
+        return False, 'Invalid duration', None
+
+    data = {}
+    physical = {m: PhysicalDetails.Weight if m == 'weight' else PhysicalDetails.BodyFat
+                for m in metrics if m in ('weight', 'bodyfat')}
+    if physical:
+        data.update(_scan_progress(
+            PhysicalDetails.MeasurementDate,
+            physical,
+            [
+                PhysicalDetails.ClientID == client_id,
+                PhysicalDetails.MeasurementDate.isnot(None),
+                or_(*[value.isnot(None) for value in physical.values()]),
+            ],
+            durations,
+            since
+        ))
+    if 'adherence' in metrics:
+        date_column, value, filters = _metric_source('adherence', client_id)
+        data.update(_scan_progress(date_column, {'adherence': value}, filters, durations, since))
+
+    return True, 'Success', {metric: data[metric] for metric in metrics}
 
 
 def create_pdf_report(client_id, option='all'): #If option is corrupted in the json format, default is all.
@@ -104,105 +332,47 @@ def create_pdf_report(client_id, option='all'): #If option is corrupted in the j
     bodyfat_raw = _get_bodyfat_raw(client_id)
     adherence_raw = _get_adherence_raw(client_id)
 
-    weight_weekly = _group_weekly(weight_raw) if weight_raw else []
-    weight_monthly = _group_monthly(weight_raw) if weight_raw else []
-    bodyfat_weekly = _group_weekly(bodyfat_raw) if bodyfat_raw else []
-    bodyfat_monthly = _group_monthly(bodyfat_raw) if bodyfat_raw else []
-    adherence_weekly = _group_weekly(adherence_raw) if adherence_raw else []
-    adherence_monthly = _group_monthly(adherence_raw) if adherence_raw else []
+    client_info = {'Name': client.Name, 'Sex': client.Sex, 'DOB': client.DOB}
+    pages = build_report_pages(client_info, option, weight_raw, bodyfat_raw, adherence_raw)
+    return render_report_pdf(pages), None
 
-    # Decide which grouped datasets to include based on option
-    show_weekly = option in ('weekly', 'all')  # If option is 'weekly' or 'all', Include weekly data
-    show_monthly = option in ('monthly', 'all') # If option is 'monthly' or 'all', Include monthly data
 
-    buf = io.BytesIO()
-    with PdfPages(buf) as pdf:
-        # ── Page 1: Cover + Summary ──
-        fig = _create_cover_page(client, option, weight_raw, bodyfat_raw, adherence_raw)
-        pdf.savefig(fig)
-        plt.close(fig)
-
-        # ── Metric chart pages ──
-        metric_configs = [
-            {
-                'raw': weight_raw,
-                'weekly': weight_weekly,
-                'monthly': weight_monthly,
-                'title': 'Weight Progress',
-                'ylabel': 'Weight (kg)',
-                'color': '#007AFF',
-                'secondary_label': 'lbs',
-                'secondary_factor': 2.20462,
-            },
-            {
-                'raw': bodyfat_raw,
-                'weekly': bodyfat_weekly,
-                'monthly': bodyfat_monthly,
-                'title': 'Body Fat Progress',
-                'ylabel': 'Body Fat (%)',
-                'color': '#FF6B35',
-            },
-            {
-                'raw': adherence_raw,
-                'weekly': adherence_weekly,
-                'monthly': adherence_monthly,
-                'title': 'Adherence Rate Progress',
-                'ylabel': 'Adherence (%)',
-                'color': '#34C759',
-            },
-        ]
-
-        for cfg in metric_configs:
-            if not cfg['raw']:
-                continue
-            fig = _create_chart_page(
-                weekly_data=cfg['weekly'] if show_weekly else [],
-                monthly_data=cfg['monthly'] if show_monthly else [],
-                title=cfg['title'],
-                ylabel=cfg['ylabel'],
-                color=cfg['color'],
-                option=option,
-                secondary_label=cfg.get('secondary_label'),
-                secondary_factor=cfg.get('secondary_factor'),
-            )
-            pdf.savefig(fig)
-            plt.close(fig)
-
-    buf.seek(0)
-    return buf, None
-
-
-def _create_cover_page(client, option, weight_raw, bodyfat_raw, adherence_raw):
-
-    option_label = {'weekly': 'Weekly', 'monthly': 'Monthly', 'all': 'Weekly & Monthly'}
-    fig = plt.figure(figsize=(8.27, 11.69))  # A4
-    fig.patch.set_facecolor('white')
-    ax = fig.add_axes([0, 0, 1, 1])
-    ax.axis('off')
-
-    # Header bar
-    ax.axhspan(0.88, 1.0, color="#FFFFFF")
-    ax.text(0.5, 0.94, "Client Progress Report", fontsize=22, fontweight='bold',
-            color="#1A1A2E", ha='center', va='center', transform=ax.transAxes)
-
-    # Client info
-    y = 0.84
-    info_lines = [
-        f"Client: {client.Name}",
-        f"Gender: {client.Sex}    |    DOB: {client.DOB or 'N/A'}",
-        f"Report Type: {option_label.get(option, 'All')}",
-        f"Report Generated: {datetime.now().strftime('%B %d, %Y')}",
-    ]
-    for line in info_lines:
-        ax.text(0.08, y, line, fontsize=11, color='#374151', transform=ax.transAxes)
-        y -= 0.035
+def get_report_renderer(renderer=None):
+    """
+    Returns:
+        str: 'matplotlib' | 'vector' (unknown values fall back to 'matplotlib')
+    """
+    renderer = renderer or PROGRESS_REPORT_RENDERER
+    if renderer not in REPORT_RENDERERS:
+        print(f"Unknown PROGRESS_REPORT_RENDERER '{renderer}', using 'matplotlib'")
+        return 'matplotlib'
+    return renderer
 
-    # Summary statistics boxes
-    y = 0.68
-    ax.text(0.08, y, "Summary Statistics", fontsize=14, fontweight='bold',
-            color='#1A1A2E', transform=ax.transAxes)
-    y -= 0.05 
 
+def render_report_pdf(pages, renderer=None, processes=None):
+    """
+    Render the page specs of build_report_pages into one PDF.
+
+    Args:
+        renderer (str, optional): override PROGRESS_REPORT_RENDERER
+        processes (int, optional): render processes of the matplotlib renderer (REPORT_RENDER_PROCESSES)
+
+    Returns:
+        BytesIO positioned at 0
+    """
+    if get_report_renderer(renderer) == 'vector':
+        return report_vector_renderer.render_report_pdf(pages)
+    from services import report_matplotlib_renderer  # lazy, matplotlib is loaded on the first report only
+    return report_matplotlib_renderer.render_report_pdf(pages, processes=processes)
+
+
+def _summary_metrics(weight_raw, bodyfat_raw, adherence_raw):
+    """
+    Cover page summary boxes (same for every renderer)
+
+    Returns:
+        list: [{'title', 'current', 'min', 'max', 'avg', 'change', 'change_color', 'records', 'color'}, ...]
+    """
     metrics_summary = []
     if weight_raw:
         vals = [r['value'] for r in weight_raw]
@@ -248,164 +418,69 @@ def _create_cover_page(client, option, weight_raw, bodyfat_raw, adherence_raw):
             'color': '#34C759',
         })
 
-    for i, m in enumerate(metrics_summary):
-        box_y = y - 0.04 - i * 0.14
-        box = FancyBboxPatch((0.06, box_y - 0.08), 0.88, 0.12,
-                              boxstyle="round,pad=0.01", facecolor='#F9FAFB',
-                              edgecolor=m['color'], linewidth=1.5, transform=ax.transAxes)
-        ax.add_patch(box)
-        ax.text(0.10, box_y, m['title'], fontsize=12, fontweight='bold',
-                color=m['color'], transform=ax.transAxes)
-        ax.text(0.10, box_y - 0.035,
-                f"Current: {m['current']}    Min: {m['min']}    Max: {m['max']}    Avg: {m['avg']}",
-                fontsize=9, color='#374151', transform=ax.transAxes)
-        ax.text(0.10, box_y - 0.06,
-                f"Records: {m['records']}",
-                fontsize=9, color='#6B7280', transform=ax.transAxes)
-        if m['change']:
-            ax.text(0.80, box_y, m['change'], fontsize=12, fontweight='bold',
-                    color=m['change_color'], ha='center', transform=ax.transAxes)
-
-    # Footer
-    ax.text(0.5, 0.04, "Dietitian's Assistant — Confidential", fontsize=8,
-            color='#9CA3AF', ha='center', transform=ax.transAxes)
-
-    return fig
-
-
-def _create_chart_page(weekly_data, monthly_data, title, ylabel, color, option,
-                       secondary_label=None, secondary_factor=None):
+    return metrics_summary
+
+
+def build_report_pages(client_info, option, weight_raw, bodyfat_raw, adherence_raw):
     """
-    Creates a chart page with 1 or 2 sub-charts depending on option:
-    - 'weekly':  weekly line chart only (full page)
-    - 'monthly': monthly bar chart only (full page)
-    - 'all':     weekly line (top) + monthly bar (bottom)
+    Page specs of the report in order (plain data, picklable for the render processes)
+
+    Returns:
+        list: [{'kind': 'cover' | 'chart', 'args': {...}}, ...]
     """
-    show_weekly = option in ('weekly', 'all')
-    show_monthly = option in ('monthly', 'all')
-    num_charts = int(show_weekly) + int(show_monthly)
+    # Decide which grouped datasets to include based on option
+    show_weekly = option in ('weekly', 'all')  # If option is 'weekly' or 'all', Include weekly data
+    show_monthly = option in ('monthly', 'all') # If option is 'monthly' or 'all', Include monthly data
 
-    if num_charts == 2:
-        fig, axes = plt.subplots(2, 1, figsize=(8.27, 11.69), gridspec_kw={'height_ratios': [1, 1]})
-    else:
-        fig, ax_single = plt.subplots(1, 1, figsize=(8.27, 11.69))
-        axes = [ax_single]
-
-    fig.patch.set_facecolor('white')
-    fig.text(0.5, 0.96, title, fontsize=18, fontweight='bold', color='#1A1A2E', ha='center')
-
-    chart_idx = 0
-
-    # ── Weekly line chart ──
-    if show_weekly and weekly_data:
-        ax = axes[chart_idx]
-        chart_idx += 1
-
-        week_labels = [r['date'] for r in weekly_data]
-        week_values = [r['value'] for r in weekly_data]
-        x_pos = range(len(week_labels))
-
-        ax.set_title('Weekly Averages', fontsize=12, fontweight='bold', color='#374151', pad=12)
-        ax.plot(list(x_pos), week_values, '-o', color=color, markersize=5, linewidth=2, alpha=0.9)
-        ax.fill_between(list(x_pos), week_values, alpha=0.08, color=color)
-
-        # Trend line
-        if len(week_values) >= 3:
-            x_num = np.array(list(x_pos), dtype=float)
-            z = np.polyfit(x_num, week_values, 1)
-            p = np.poly1d(z)
-            ax.plot(list(x_pos), p(x_num), '--', color='#EF4444', linewidth=1, alpha=0.7, label='Trend')
-            ax.legend(fontsize=8, loc='upper right')
-
-        # Min/max annotations
-        min_idx = week_values.index(min(week_values))
-        max_idx = week_values.index(max(week_values))
-        ax.annotate(f'{week_values[min_idx]:.1f}', xy=(min_idx, week_values[min_idx]),
-                    fontsize=7, color='#22C55E', fontweight='bold', ha='center',
-                    xytext=(0, -14), textcoords='offset points')
-        ax.annotate(f'{week_values[max_idx]:.1f}', xy=(max_idx, week_values[max_idx]),
-                    fontsize=7, color='#EF4444', fontweight='bold', ha='center',
-                    xytext=(0, 10), textcoords='offset points')
-
-        # Average line
-        avg = sum(week_values) / len(week_values)
-        ax.axhline(y=avg, color='#9CA3AF', linestyle=':', linewidth=0.8, alpha=0.7)
-        ax.text(len(week_values) - 1, avg, f' avg: {avg:.1f}', fontsize=7, color='#9CA3AF', va='bottom')
-
-        # Format x labels as W01, W02...
-        display_labels = [f"W{lbl.split('-W')[1]}" if '-W' in lbl else lbl for lbl in week_labels]
-        step = max(1, len(display_labels) // 12)
-        ax.set_xticks([i for i in x_pos if i % step == 0 or i == len(display_labels) - 1])
-        ax.set_xticklabels([display_labels[i] for i in x_pos if i % step == 0 or i == len(display_labels) - 1])
-
-        ax.set_ylabel(ylabel, fontsize=10, color='#374151')
-        ax.tick_params(axis='x', rotation=45, labelsize=8)
-        ax.tick_params(axis='y', labelsize=8)
-        ax.grid(axis='y', alpha=0.3)
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-
-        # Secondary y-axis for lbs
-        if secondary_label and secondary_factor:
-            ax2 = ax.twinx()
-            ax2.set_ylabel(f'{ylabel.split("(")[0]}({secondary_label})', fontsize=10, color='#9CA3AF')
-            y_min, y_max = ax.get_ylim()
-            ax2.set_ylim(y_min * secondary_factor, y_max * secondary_factor)
-            ax2.tick_params(axis='y', labelsize=8, labelcolor='#9CA3AF')
-            ax2.spines['top'].set_visible(False)
-
-    elif show_weekly:
-        ax = axes[chart_idx]
-        chart_idx += 1
-        ax.text(0.5, 0.5, 'No weekly data available', ha='center', va='center',
-                fontsize=12, color='#9CA3AF', transform=ax.transAxes)
-        ax.axis('off')
-
-    # ── Monthly bar chart ──
-    if show_monthly and monthly_data:
-        ax = axes[chart_idx]
-
-        month_labels = []
-        month_values = []
-        for m in monthly_data:
-            parts = m['date'].split('-')
-            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            month_idx = int(parts[1]) - 1
-            label = f"{month_names[month_idx]} {parts[0][2:]}"
-            month_labels.append(label)
-            month_values.append(m['value'])
-
-        ax.set_title('Monthly Averages', fontsize=12, fontweight='bold', color='#374151', pad=12)
-        bars = ax.bar(month_labels, month_values, color=color, alpha=0.75, width=0.6,
-                      edgecolor=color, linewidth=0.8)
-
-        # Value labels on bars
-        for bar, val in zip(bars, month_values):
-            ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.2,
-                    f'{val:.1f}', ha='center', va='bottom', fontsize=7, color='#374151')
-
-        # Average line
-        avg = sum(month_values) / len(month_values)
-        ax.axhline(y=avg, color='#9CA3AF', linestyle=':', linewidth=0.8, alpha=0.7)
-        ax.text(len(month_values) - 0.5, avg, f' avg: {avg:.1f}', fontsize=7, color='#9CA3AF', va='bottom')
-
-        ax.set_ylabel(ylabel, fontsize=10, color='#374151')
-        ax.tick_params(axis='x', rotation=45, labelsize=8)
-        ax.tick_params(axis='y', labelsize=8)
-        ax.grid(axis='y', alpha=0.3)
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-
-    elif show_monthly:
-        ax = axes[chart_idx]
-        ax.text(0.5, 0.5, 'No monthly data available', ha='center', va='center',
-                fontsize=12, color='#9CA3AF', transform=ax.transAxes)
-        ax.axis('off')
-
-    # Footer
-    fig.text(0.5, 0.02, "Dietitian's Assistant — Confidential", fontsize=8,
-             color='#9CA3AF', ha='center')
-
-    fig.tight_layout(rect=[0.02, 0.04, 0.98, 0.94])
-    return fig
\ No newline at end of file
+    # ── Page 1: Cover + Summary ──
+    pages = [{
+        'kind': 'cover',
+        'args': {
+            'client_info': client_info,
+            'option': option,
+            'summary': _summary_metrics(weight_raw, bodyfat_raw, adherence_raw),
+            'generated_at': datetime.now().strftime('%B %d, %Y'),
+        }
+    }]
+
+    # ── Metric chart pages ──
+    metric_configs = [
+        {
+            'raw': weight_raw,
+            'title': 'Weight Progress',
+            'ylabel': 'Weight (kg)',
+            'color': '#007AFF',
+            'secondary_label': 'lbs',
+            'secondary_factor': 2.20462,
+        },
+        {
+            'raw': bodyfat_raw,
+            'title': 'Body Fat Progress',
+            'ylabel': 'Body Fat (%)',
+            'color': '#FF6B35',
+        },
+        {
+            'raw': adherence_raw,
+            'title': 'Adherence Rate Progress',
+            'ylabel': 'Adherence (%)',
+            'color': '#34C759',
+        },
+    ]
+
+    for cfg in metric_configs:
+        if not cfg['raw']:
+            continue
+        pages.append({
+            'kind': 'chart',
+            'args': {
+                'weekly_data': _group_weekly(cfg['raw']) if show_weekly else [],
+                'monthly_data': _group_monthly(cfg['raw']) if show_monthly else [],
+                'title': cfg['title'],
+                'ylabel': cfg['ylabel'],
+                'color': cfg['color'],
+                'option': option,
+                'secondary_label': cfg.get('secondary_label'),
+                'secondary_factor': cfg.get('secondary_factor'),
+            }
+        })
+    return pages
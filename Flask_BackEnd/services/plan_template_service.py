@@ -0,0 +1,208 @@
+from models.models import PlanTemplate, DailyMealPlan, Meal, MealItem, Item, Client
+from db_config import db
+from datetime import timedelta
+from services.item_catalog_service import invalidate_item_catalog
+from services.data_version_service import bump_data_version
+from services.meal_plan_writer_service import write_meal_plans_for_clients, parse_plan_date
+
+# Plan templates: bir planı şablon olarak kaydet, sonra tek istekte N danışan x tarih aralığına uygula.
+# Eskiden her gün ve her danışan için ayrı POST /meal-plans (ayrı commit) gerekiyordu.
+# Uygulama tek transaction: bütün hedefler meal_plan_writer_service ile tablo başına bir batch yazılır,
+# sonuç hedef (danışan) bazında raporlanır.
+
+MAX_TEMPLATE_DAYS = 93  # ~3 months per apply request
+
+
+def _validate_meals(meals):
+    """
+    Returns:
+        str: error message or None if the meals are in the POST /meal-plans format
+    """
+    if not isinstance(meals, list) or not meals:
+        return "meals must be a non-empty list"
+    for m in meals:
+        if not isinstance(m, dict) or not m.get('title'):
+            return "Every meal needs a title"
+        for i in m.get('items', []):
+            if not isinstance(i, dict) or not i.get('name') or i.get('amount') is None:
+                return f"Every item of '{m.get('title')}' needs a name and an amount"
+    return None
+
+
+def _plan_to_template_meals(client_id, plan_date):
+    """
+    Meals of an existing daily plan in the template format (original items, ChangedItem is ignored)
+
+    Returns:
+        list or None if the plan does not exist
+    """
+    plan_id = db.session.query(DailyMealPlan.MealPlanID)\
+        .filter(DailyMealPlan.ClientID == client_id, DailyMealPlan.PlanDate == plan_date).scalar()
+    if plan_id is None:
+        return None
+
+    rows = db.session.query(
+        Meal.MealID, Meal.MealName, Meal.MealStart, Meal.MealEnd,
+        Item.ItemName, MealItem.ConsumeAmount, MealItem.canChange
+    ).outerjoin(MealItem, MealItem.MealID == Meal.MealID)\
+        .outerjoin(Item, Item.ItemID == MealItem.ItemID)\
+        .filter(Meal.MealPlanID == plan_id)\
+        .order_by(Meal.MealID.asc()).all()
+
+    meals = {}
+    for r in rows:
+        meal = meals.setdefault(r.MealID, {
+            'title': r.MealName,
+            'time': f"{r.MealStart.strftime('%H:%M')} - {r.MealEnd.strftime('%H:%M')}" if r.MealStart and r.MealEnd else None,
+            'items': []
+        })
+        if r.ItemName:
+            meal['items'].append({'name': r.ItemName, 'amount': r.ConsumeAmount, 'allowChange': bool(r.canChange)})
+    return list(meals.values())
+
+
+def save_plan_template(dietitian_id, name, meals=None, source_client_id=None, source_date=None):
+    """
+    Save a plan template, either from the given meals or from an existing daily plan of a client.
+
+    Returns:
+        tuple: (success: bool, message: str, template: dict or None)
+    """
+    try:
+        if not dietitian_id or not name:
+            return False, "dietitian_id and name are required", None
+
+        if meals is None:
+            if not source_client_id or not source_date:
+                return False, "Either meals or client_id + date are required", None
+            try:
+                plan_date = parse_plan_date(source_date)
+            except ValueError:
+                return False, f"Invalid date: {source_date}", None
+            meals = _plan_to_template_meals(source_client_id, plan_date)
+            if meals is None:
+                return False, "Source meal plan not found", None
+
+        error = _validate_meals(meals)
+        if error:
+            return False, error, None
+
+        template = PlanTemplate(DietitianID=dietitian_id, TemplateName=name, Meals=meals)
+        db.session.add(template)
+        db.session.commit()
+        return True, "Template saved", template.to_dict()
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error saving plan template: {e}")
+        return False, str(e), None
+
+
+def get_plan_templates(dietitian_id):
+    """
+    Returns:
+        list: templates of the dietitian, newest first
+    """
+    templates = PlanTemplate.query.filter_by(DietitianID=dietitian_id)\
+        .order_by(PlanTemplate.CreatedAt.desc(), PlanTemplate.TemplateID.desc()).all()
+    return [t.to_dict() for t in templates]
+
+
+def _template_dates(start_date, end_date=None, duration_days=None):
+    """
+    Returns:
+        list: dates of the range (end inclusive)
+
+    Raises:
+        ValueError: invalid / too long range
+    """
+    start = parse_plan_date(start_date)
+    if end_date:
+        days = (parse_plan_date(end_date) - start).days + 1
+    else:
+        days = int(duration_days or 1)
+
+    if days < 1:
+        raise ValueError("end_date must not be before start_date")
+    if days > MAX_TEMPLATE_DAYS:
+        raise ValueError(f"A template can be applied to at most {MAX_TEMPLATE_DAYS} days at once")
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def apply_plan_template(template_id, client_ids, start_date, end_date=None, duration_days=None, overwrite=True):
+    """
+    Apply a template to every client x date of the range in one transaction.
+
+    Args:
+        overwrite (bool): replace existing plans of the range, otherwise those dates are skipped
+
+    Returns:
+        tuple: (success: bool, message: str, results: list of per-client dicts
+                {'clientId', 'status': 'applied' | 'skipped' | 'error', 'created', 'overwritten', 'skipped', 'error'})
+    """
+    try:
+        template = db.session.get(PlanTemplate, template_id)
+        if not template:
+            return False, "Template not found", []
+
+        client_ids = list(dict.fromkeys(c for c in (client_ids or []) if c))
+        if not client_ids:
+            return False, "client_ids are required", []
+
+        try:
+            dates = _template_dates(start_date, end_date, duration_days)
+        except (TypeError, ValueError) as e:
+            return False, str(e), []
+
+        # Only the template owner's clients
+        assigned = {
+            c for (c,) in db.session.query(Client.ClientID)
+            .filter(Client.ClientID.in_(client_ids), Client.AssignedDietitianID == template.DietitianID).all()
+        }
+
+        skipped = {}
+        if not overwrite:
+            for client_id, plan_date in db.session.query(DailyMealPlan.ClientID, DailyMealPlan.PlanDate)\
+                    .filter(DailyMealPlan.ClientID.in_(list(assigned)), DailyMealPlan.PlanDate.in_(dates)).all():
+                skipped.setdefault(client_id, set()).add(plan_date)
+
+        targets = {}
+        for client_id in client_ids:
+            if client_id in assigned:
+                targets[client_id] = [d for d in dates if d not in skipped.get(client_id, set())]
+
+        written = write_meal_plans_for_clients(targets, template.Meals)
+        db.session.commit()
+        written_clients = [client_id for client_id, plan_dates in targets.items() if plan_dates]
+        if written_clients:
+            bump_data_version('meals', *written_clients)
+
+        if written['insertedItems']:
+            invalidate_item_catalog()
+
+        overwritten = {}
+        for client_id, plan_date in written['overwritten']:
+            overwritten.setdefault(client_id, set()).add(plan_date)
+
+        results = []
+        for client_id in client_ids:
+            if client_id not in assigned:
+                results.append({'clientId': client_id, 'status': 'error', 'error': 'Client not found for this dietitian'})
+                continue
+
+            client_overwritten = overwritten.get(client_id, set())
+            results.append({
+                'clientId': client_id,
+                'status': 'applied' if targets[client_id] else 'skipped',
+                'created': [d.isoformat() for d in targets[client_id] if d not in client_overwritten],
+                'overwritten': sorted(d.isoformat() for d in client_overwritten),
+                'skipped': sorted(d.isoformat() for d in skipped.get(client_id, set())),
+            })
+
+        applied = sum(len(dates_) for dates_ in targets.values())
+        return True, f"Template applied to {applied} plans", results
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error applying plan template: {e}")
+        return False, str(e), []
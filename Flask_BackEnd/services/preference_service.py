@@ -1,22 +1,57 @@
 from models.models import ClientMealPreference, Meal, Item
 from db_config import db
+from services.item_catalog_service import get_catalog_item, get_item_catalog_version
+from services.upsert_service import build_upsert, has_unique_key
+from services.data_version_service import bump_data_version
+from sqlalchemy import and_, case, cast, func, Integer
+from collections import OrderedDict
+import heapq
+import threading
+import time
+import os
 
 DEFAULT_SCORE = 50
 MIN_SCORE = 0
 MAX_SCORE = 100
 SCORE_DELTA = 5
+# Every update first pulls the stored score towards DEFAULT_SCORE: 1.0 = no decay, 0.9 = old behaviour fades by 10% per update
+PREFERENCE_DECAY = min(max(float(os.getenv('PREFERENCE_DECAY', 1.0)), 0.0), 1.0)
 VALID_MEAL_NAMES = {"Breakfast", "Lunch", "Dinner", "Snack"}
+PREFERENCE_KEY = ('ClientID', 'MealName', 'ItemID')  # uq_client_meal_item
+
+# /fruit-recommendations sonuç cache'i, (client, meal) başına kısa ömürlü.
+# update_preference_after_manual_replacement skorları değiştirince ilgili key silinir,
+# yeni fruit item eklenirse catalog version değişir ve entry geçersiz olur.
+FRUIT_RECOMMENDATION_TTL_SECONDS = float(os.getenv('FRUIT_RECOMMENDATION_TTL_SECONDS', 60))
+FRUIT_RECOMMENDATION_CACHE_MAX_KEYS = int(os.getenv('FRUIT_RECOMMENDATION_CACHE_MAX_KEYS', 10000))
+
+_recommendation_cache = OrderedDict()  # (client_id, meal_name) -> (expires_at, catalog_version, limit, recommendations)
+_recommendation_lock = threading.Lock()
+_recommendation_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
 
 
 def clamp_score(score: int) -> int:
     return max(MIN_SCORE, min(MAX_SCORE, score))
 
 
-def is_fruit_item(item_id: str) -> bool:
-    item = Item.query.filter_by(ItemID=item_id).first()
-    if not item:
-        return False
-    return (item.ItemCategory or "").strip().lower() == "fruit"
+def _normalize_category(category):
+    return (category or "").strip().lower()
+
+
+def _normalize_item_ids(item_ids):
+    # Single id (int / str) or a list of ids (multi-item replacement)
+    if item_ids is None:
+        return []
+    if not isinstance(item_ids, (list, tuple, set)):
+        item_ids = [item_ids]
+
+    normalized = []
+    for item_id in item_ids:
+        try:
+            normalized.append(int(item_id))
+        except (TypeError, ValueError):
+            continue
+    return list(dict.fromkeys(normalized))
 
 
 def get_preference(client_id: str, meal_name: str, item_id: str):
@@ -27,67 +62,141 @@ def get_preference(client_id: str, meal_name: str, item_id: str):
     ).first()
 
 
-def get_or_create_preference(client_id: str, meal_name: str, item_id: str):
-    pref = get_preference(client_id, meal_name, item_id)
+def _clamped_score(expression):
+    return case(
+        (expression > MAX_SCORE, MAX_SCORE),
+        (expression < MIN_SCORE, MIN_SCORE),
+        else_=expression
+    )
 
-    if pref:
-        return pref
 
-    item = Item.query.filter_by(ItemID=item_id).first()
+def apply_preference_deltas(client_id: str, meal_name: str, deltas: dict):
+    """
+    Apply selection / rejection counts of many items with ONE upsert statement (caller commits).
+    Existing scores first decay towards DEFAULT_SCORE (PREFERENCE_DECAY), then move SCORE_DELTA per selection / rejection.
 
-    pref = ClientMealPreference(
-        ClientID=client_id,
-        MealName=meal_name,
-        ItemID=item_id,
-        ItemName=item.ItemName if item else None,
-        Score=DEFAULT_SCORE,
-        SelectionCount=0,
-        RejectionCount=0
-    )
-    db.session.add(pref)
-    db.session.flush()
-    return pref
+    Args:
+        deltas (dict): {item_id: (selections, rejections)}
+    """
+    rows = []
+    for item_id, (selections, rejections) in deltas.items():
+        item = get_catalog_item(item_id)
+        rows.append({
+            'ClientID': client_id,
+            'MealName': meal_name,
+            'ItemID': item_id,
+            'ItemName': item['ItemName'] if item else None,
+            'Score': clamp_score(DEFAULT_SCORE + SCORE_DELTA * (selections - rejections)),
+            'SelectionCount': selections,
+            'RejectionCount': rejections,
+        })
+    if not rows:
+        return
+
+    # Old database without uq_client_meal_item: the upsert would insert a new row per swap
+    if not has_unique_key(ClientMealPreference, PREFERENCE_KEY):
+        _apply_preference_rows_by_update(rows)
+        return
+
+    def update_values(table, inserted):
+        # Score delta is derived from the inserted counts, so every row gets its own delta in the same statement
+        new_score = func.round(
+            DEFAULT_SCORE
+            + (table.Score - DEFAULT_SCORE) * PREFERENCE_DECAY
+            + SCORE_DELTA * (inserted.SelectionCount - inserted.RejectionCount)
+        )
+        return {
+            'Score': cast(_clamped_score(new_score), Integer),
+            'SelectionCount': table.SelectionCount + inserted.SelectionCount,
+            'RejectionCount': table.RejectionCount + inserted.RejectionCount,
+            'ItemName': func.coalesce(inserted.ItemName, table.ItemName),
+        }
 
+    db.session.execute(build_upsert(
+        ClientMealPreference, rows, list(PREFERENCE_KEY), update_values
+    ))
 
-def update_preference_after_manual_replacement(client_id: str, meal_id: str, original_item_id: str, selected_item_id: str):
+
+def _apply_preference_rows_by_update(rows):
+    """
+    Same result as the upsert of apply_preference_deltas with read-modify-write (fallback, caller commits).
+    Existing duplicates: the first row is updated, like get_preference().first()
     """
-    Learn only from manual fruit-to-fruit replacement.
+    client_id, meal_name = rows[0]['ClientID'], rows[0]['MealName']
+    existing = {}
+    for pref in ClientMealPreference.query.filter(
+        ClientMealPreference.ClientID == client_id,
+        ClientMealPreference.MealName == meal_name,
+        ClientMealPreference.ItemID.in_([row['ItemID'] for row in rows])
+    ).order_by(ClientMealPreference.PreferenceID.asc()).all():
+        existing.setdefault(pref.ItemID, pref)
+
+    for row in rows:
+        pref = existing.get(row['ItemID'])
+        if pref is None:
+            db.session.add(ClientMealPreference(**row))
+            continue
+
+        delta = SCORE_DELTA * (row['SelectionCount'] - row['RejectionCount'])
+        pref.Score = clamp_score(int(round(DEFAULT_SCORE + (pref.Score - DEFAULT_SCORE) * PREFERENCE_DECAY + delta)))
+        pref.SelectionCount += row['SelectionCount']
+        pref.RejectionCount += row['RejectionCount']
+        pref.ItemName = row['ItemName'] or pref.ItemName
+
+
+def update_preference_after_manual_replacement(client_id: str, meal_id: str, original_item_id: str, selected_item_id):
+    """
+    Learn from a manual replacement: the original item is rejected once, every selected item
+    of the SAME ItemCategory is selected once (any category, not only fruit).
+    selected_item_id can be a single id or a list (multi-item replacement).
     No auto replacement. No history table.
     """
     try:
-        if not selected_item_id:
+        selected_item_ids = _normalize_item_ids(selected_item_id)
+        if not selected_item_ids:
             return False, "selected_item_id is required"
 
-        if original_item_id == selected_item_id:
+        original_ids = _normalize_item_ids(original_item_id)
+        if not original_ids:
+            return False, "original_item_id is required"
+        original_id = original_ids[0]
+
+        selected_item_ids = [i for i in selected_item_ids if i != original_id]
+        if not selected_item_ids:
             return True, "Same item selected, no preference change needed"
 
-        meal = Meal.query.filter_by(MealID=meal_id).first()
-        if not meal:
+        meal_name = db.session.query(Meal.MealName).filter(Meal.MealID == meal_id).scalar()
+        if not meal_name:
             return False, "Meal not found"
 
-        meal_name = meal.MealName
-
         if meal_name not in VALID_MEAL_NAMES:
             return False, f"Invalid meal name: {meal_name}"
 
-        if not is_fruit_item(original_item_id):
-            return True, "Original item is not a fruit, preference learning skipped"
-
-        if not is_fruit_item(selected_item_id):
-            return True, "Selected item is not a fruit, preference learning skipped"
+        # Categories come from the in-process catalog, no query per item
+        original_item = get_catalog_item(original_id)
+        category = _normalize_category(original_item['ItemCategory'] if original_item else None)
+        if not category:
+            return True, "Original item has no category, preference learning skipped"
 
-        original_pref = get_or_create_preference(client_id, meal_name, original_item_id)
-        selected_pref = get_or_create_preference(client_id, meal_name, selected_item_id)
+        same_category = []
+        for item_id in selected_item_ids:
+            item = get_catalog_item(item_id)
+            if item and _normalize_category(item['ItemCategory']) == category:
+                same_category.append(item_id)
 
-        original_pref.Score = clamp_score(original_pref.Score - SCORE_DELTA)
-        original_pref.RejectionCount += 1
+        if not same_category:
+            return True, "Selected items are from another category, preference learning skipped"
 
-        selected_pref.Score = clamp_score(selected_pref.Score + SCORE_DELTA)
-        selected_pref.SelectionCount += 1
+        deltas = {original_id: (0, 1)}
+        for item_id in same_category:
+            deltas[item_id] = (1, 0)
 
+        apply_preference_deltas(client_id, meal_name, deltas)
         db.session.commit()
+        invalidate_fruit_recommendations(client_id, meal_name)
+        bump_data_version('preferences', client_id)
 
-        return True, "Fruit preference scores updated successfully"
+        return True, f"Preference scores updated successfully ({len(deltas)} items)"
 
     except Exception as e:
         db.session.rollback()
@@ -95,51 +204,116 @@ def update_preference_after_manual_replacement(client_id: str, meal_id: str, ori
         return False, f"Server error: {str(e)}"
 
 
+def invalidate_fruit_recommendations(client_id: str, meal_name: str = None):
+    """
+    Drop cached recommendations of a client (one meal, or every meal if meal_name is None)
+    """
+    with _recommendation_lock:
+        _recommendation_stats['invalidations'] += 1
+        if meal_name is not None:
+            _recommendation_cache.pop((str(client_id), meal_name), None)
+            return
+        for key in [k for k in _recommendation_cache if k[0] == str(client_id)]:
+            del _recommendation_cache[key]
+
+
+def _get_cached_recommendations(key, limit, catalog_version):
+    with _recommendation_lock:
+        entry = _recommendation_cache.get(key)
+        if entry is None:
+            _recommendation_stats['misses'] += 1
+            return None
+
+        expires_at, version, cached_limit, recommendations = entry
+        if expires_at <= time.time() or version != catalog_version:
+            del _recommendation_cache[key]
+            _recommendation_stats['misses'] += 1
+            return None
+
+        # A larger top-k contains every smaller one
+        if cached_limit < limit:
+            _recommendation_stats['misses'] += 1
+            return None
+        _recommendation_cache.move_to_end(key)
+        _recommendation_stats['hits'] += 1
+        return recommendations[:limit]
+
+
+def _store_recommendations(key, limit, catalog_version, recommendations):
+    with _recommendation_lock:
+        _recommendation_cache[key] = (time.time() + FRUIT_RECOMMENDATION_TTL_SECONDS, catalog_version, limit, recommendations)
+        _recommendation_cache.move_to_end(key)
+        while len(_recommendation_cache) > FRUIT_RECOMMENDATION_CACHE_MAX_KEYS:
+            _recommendation_cache.popitem(last=False)
+
+
+def get_fruit_recommendation_cache_stats():
+    with _recommendation_lock:
+        return {**_recommendation_stats, 'size': len(_recommendation_cache), 'ttlSeconds': FRUIT_RECOMMENDATION_TTL_SECONDS}
+
+
+def _recommendation_reason(selection_count, rejection_count):
+    if selection_count > 0:
+        return "Frequently selected in this meal"
+    if rejection_count > 0:
+        return "Previously changed in this meal"
+    return "Default preference score"
+
+
 def get_meal_fruit_recommendations(client_id: str, meal_name: str, limit: int = 3):
     """
     Return fruit recommendations for a client and meal.
     If no learned data exists, return fruits with default score 50.
+    Fruits and the client's preferences come from one LEFT JOIN, only the top `limit` are ranked (heap).
     """
     try:
         if meal_name not in VALID_MEAL_NAMES:
             return False, f"Invalid meal name: {meal_name}", []
 
-        fruit_items = Item.query.filter_by(ItemCategory='Fruit').all()
-
-        if not fruit_items:
+        limit = max(int(limit), 0)
+        key = (str(client_id), meal_name)
+        catalog_version = get_item_catalog_version()
+
+        cached = _get_cached_recommendations(key, limit, catalog_version)
+        if cached is not None:
+            return True, "Recommendations fetched successfully", cached
+
+        rows = db.session.query(
+            Item.ItemID,
+            Item.ItemName,
+            Item.ItemCategory,
+            ClientMealPreference.Score,
+            ClientMealPreference.SelectionCount,
+            ClientMealPreference.RejectionCount,
+        ).outerjoin(ClientMealPreference, and_(
+            ClientMealPreference.ItemID == Item.ItemID,
+            ClientMealPreference.ClientID == client_id,
+            ClientMealPreference.MealName == meal_name
+        )).filter(Item.ItemCategory == 'Fruit').all()
+
+        if not rows:
             return True, "No fruit items found", []
 
-        recommendations = []
-
-        for fruit in fruit_items:
-            pref = get_preference(client_id, meal_name, fruit.ItemID)
-
-            score = pref.Score if pref else DEFAULT_SCORE
-            selection_count = pref.SelectionCount if pref else 0
-            rejection_count = pref.RejectionCount if pref else 0
-
-            if selection_count > 0:
-                reason = "Frequently selected in this meal"
-            elif rejection_count > 0:
-                reason = "Previously changed in this meal"
-            else:
-                reason = "Default preference score"
+        def rank(row):
+            score = row.Score if row.Score is not None else DEFAULT_SCORE
+            return (-score, -(row.SelectionCount or 0), row.RejectionCount or 0, row.ItemName)
 
+        recommendations = []
+        for row in heapq.nsmallest(limit, rows, key=rank):
+            selection_count = row.SelectionCount or 0
+            rejection_count = row.RejectionCount or 0
             recommendations.append({
-                "item_id": fruit.ItemID,
-                "item_name": fruit.ItemName,
-                "category": fruit.ItemCategory,
-                "score": score,
+                "item_id": row.ItemID,
+                "item_name": row.ItemName,
+                "category": row.ItemCategory,
+                "score": row.Score if row.Score is not None else DEFAULT_SCORE,
                 "selection_count": selection_count,
                 "rejection_count": rejection_count,
-                "reason": reason
+                "reason": _recommendation_reason(selection_count, rejection_count)
             })
 
-        recommendations.sort(
-            key=lambda x: (-x["score"], -x["selection_count"], x["rejection_count"], x["item_name"])
-        )
-
-        return True, "Recommendations fetched successfully", recommendations[:limit]
+        _store_recommendations(key, limit, catalog_version, recommendations)
+        return True, "Recommendations fetched successfully", recommendations
 
     except Exception as e:
         print(f"Error in get_meal_fruit_recommendations: {str(e)}")
@@ -1,47 +1,194 @@
 from db_config import db
 from models.models import ClientProgressSnapshot
+from services.upsert_service import build_upsert, has_unique_key
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
 from datetime import date
+import threading
+import atexit
+import os
 
+# Adherence snapshot: (ClientID, ProgressDate) başına KÜMÜLATİF SuccessAmount / Total.
+# Eskiden her feedback'te read-modify-write + commit vardı, eşzamanlı tap'ler birbirinin artışını ezebiliyordu.
+# Şimdi:
+#   - Günün satırı varsa tek atomik UPDATE (SuccessAmount = SuccessAmount + :s, Total = Total + :t)
+#   - Yoksa (günün ilk feedback'i) önceki kümülatif değer okunur ve upsert edilir, aynı anda gelen ilk iki tap
+#     unique key (ClientID, ProgressDate) sayesinde ON DUPLICATE KEY UPDATE ile toplanır
+#   - AdherenceRate artık yazılmaz, okuma tarafında SuccessAmount / Total'dan hesaplanır (adherence_rate)
+# ADHERENCE_WRITE_BEHIND=1: feedback'ler process içinde client başına toplanır,
+# ADHERENCE_FLUSH_INTERVAL_SECONDS'ta bir tek transaction ile yazılır, kapanışta (atexit) flush edilir.
+# Write-behind açıkken progress ekranları birkaç saniye geriden gelebilir.
 
-def update_adherence_rate(client_id, is_followed):
-    today = date.today()
+ADHERENCE_WRITE_BEHIND = os.getenv('ADHERENCE_WRITE_BEHIND', '0') in ('1', 'true', 'True')
+ADHERENCE_FLUSH_INTERVAL_SECONDS = float(os.getenv('ADHERENCE_FLUSH_INTERVAL_SECONDS', 5))
+
+_buffer = {}  # (client_id, date) -> [success, total]
+_buffer_lock = threading.Lock()
+_flush_timer = None
+_app = None
+
+
+def adherence_rate(success_amount, total):
+    """
+    Returns:
+        float: adherence percentage (2 decimals) or None if there is no feedback yet
+    """
+    if not total:
+        return None
+    return round(float(success_amount or 0) / float(total) * 100, 2)
+
+
+def increment_adherence(client_id, progress_date, success, total):
+    """
+    Atomically add `success` / `total` feedbacks to the client's cumulative snapshot of `progress_date` (caller commits)
+    """
+    result = db.session.execute(
+        update(ClientProgressSnapshot)
+        .where(ClientProgressSnapshot.ClientID == client_id, ClientProgressSnapshot.ProgressDate == progress_date)
+        .values(
+            SuccessAmount=ClientProgressSnapshot.SuccessAmount + success,
+            Total=ClientProgressSnapshot.Total + total
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        return
 
-    # Check if a snapshot already exists for today
-    snapshot = (
-        ClientProgressSnapshot.query
-        .filter_by(ClientID=client_id, ProgressDate=today)
+    # First feedback of the day: carry over the cumulative totals of the latest earlier snapshot
+    latest = (
+        db.session.query(ClientProgressSnapshot.SuccessAmount, ClientProgressSnapshot.Total)
+        .filter(ClientProgressSnapshot.ClientID == client_id, ClientProgressSnapshot.ProgressDate < progress_date)
+        .order_by(ClientProgressSnapshot.ProgressDate.desc())
         .first()
     )
+    prev_success = int(latest.SuccessAmount or 0) if latest else 0
+    prev_total = int(latest.Total or 0) if latest else 0
 
-    if snapshot:
-        # Update today's existing snapshot (If any mistake happened, we can update it here)
-        if is_followed:
-            snapshot.SuccessAmount = float(snapshot.SuccessAmount or 0) + 1
-        snapshot.Total = float(snapshot.Total or 0) + 1
-        snapshot.AdherenceRate = (float(snapshot.SuccessAmount) / float(snapshot.Total)) * 100
-    else:
-        # Get the latest snapshot to carry over cumulative totals
-        latest = (
-            ClientProgressSnapshot.query
-            .filter_by(ClientID=client_id)
-            .order_by(ClientProgressSnapshot.ProgressDate.desc())
-            .first()
-        )
+    row = {
+        'ClientID': client_id,
+        'ProgressDate': progress_date,
+        'SuccessAmount': prev_success + success,
+        'Total': prev_total + total,
+    }
 
-        prev_success = float(latest.SuccessAmount or 0) if latest else 0
-        prev_total = float(latest.Total or 0) if latest else 0
+    # Old database without uq_client_progressdate (flask db upgrade): plain insert like before
+    if not has_unique_key(ClientProgressSnapshot, ('ClientID', 'ProgressDate')):
+        db.session.add(ClientProgressSnapshot(**row))
+        return
 
-        new_success = prev_success + (1 if is_followed else 0)
-        new_total = prev_total + 1
-        new_rate = (new_success / new_total) * 100
+    db.session.execute(build_upsert(
+        ClientProgressSnapshot,
+        [row],
+        ['ClientID', 'ProgressDate'],
+        # Another request created the row in the meantime: only add this call's increment
+        lambda table, inserted: {
+            'SuccessAmount': table.SuccessAmount + success,
+            'Total': table.Total + total,
+        }
+    ))
+
+
+def flush_adherence_buffer():
+    """
+    Write every buffered feedback, one increment per (client, date), one transaction.
+    Each key is written in its own savepoint so a failing key doesn't hold back the others:
+    integrity errors (e.g. unknown client) are dropped, other failures are kept for the next flush.
+
+    Returns:
+        int: number of snapshots written
+    """
+    with _buffer_lock:
+        pending = dict(_buffer)
+        _buffer.clear()
+
+    if not pending:
+        return 0
+
+    def write():
+        retry = {}
+        written = 0
+        try:
+            for key, (success, total) in pending.items():
+                client_id, progress_date = key
+                try:
+                    with db.session.begin_nested():
+                        increment_adherence(client_id, progress_date, success, total)
+                    written += 1
+                except IntegrityError as e:
+                    # Would fail on every retry: drop it instead of blocking the buffer
+                    print(f"Dropping adherence for client {client_id} on {progress_date}: {e}")
+                except Exception as e:
+                    print(f"Error flushing adherence for client {client_id} on {progress_date}: {e}")
+                    retry[key] = (success, total)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error flushing adherence buffer: {e}")
+            retry = pending
+            written = 0
+
+        if retry:
+            # Keep the counts for the next flush, and make sure there is one even if no new feedback comes
+            with _buffer_lock:
+                for key, (success, total) in retry.items():
+                    counts = _buffer.setdefault(key, [0, 0])
+                    counts[0] += success
+                    counts[1] += total
+                _schedule_flush()
+        return written
+
+    # Timer thread / atexit run outside of a request
+    if _app is not None:
+        with _app.app_context():
+            return write()
+    return write()
+
+
+def _flush_from_timer():
+    global _flush_timer
+    with _buffer_lock:
+        _flush_timer = None
+    flush_adherence_buffer()
+
+
+def _schedule_flush():
+    # Caller holds _buffer_lock
+    global _flush_timer
+    if _flush_timer is None:
+        _flush_timer = threading.Timer(ADHERENCE_FLUSH_INTERVAL_SECONDS, _flush_from_timer)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+
+def _buffer_adherence(client_id, progress_date, success):
+    global _app
+    if _app is None:
+        _app = current_app._get_current_object()
+
+    with _buffer_lock:
+        counts = _buffer.setdefault((client_id, progress_date), [0, 0])
+        counts[0] += success
+        counts[1] += 1
+
+        # One timer per burst, the first feedback after a flush schedules the next one
+        _schedule_flush()
+
+
+def update_adherence_rate(client_id, is_followed):
+    today = date.today()
+    success = 1 if is_followed else 0
+
+    if ADHERENCE_WRITE_BEHIND:
+        _buffer_adherence(client_id, today, success)
+        return
+
+    try:
+        increment_adherence(client_id, today, success, 1)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error updating adherence rate: {e}")
 
-        snapshot = ClientProgressSnapshot(
-            ClientID=client_id,
-            SuccessAmount=new_success,
-            Total=new_total,
-            AdherenceRate=round(new_rate, 2),
-            ProgressDate=today,
-        )
-        db.session.add(snapshot)
 
-    db.session.commit()
\ No newline at end of file
+atexit.register(flush_adherence_buffer)
@@ -0,0 +1,244 @@
+from models.models import MealItem, Meal, DailyMealPlan, Item, Client, PhysicalDetails, MedicalDetails
+from db_config import db
+from sqlalchemy import func, and_
+from sqlalchemy.orm import aliased
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional
+
+# Everything the /alternative prompt needs, loaded with ONE joined query.
+# Eskiden build_dynamic_prompt ~8 ayrı sorgu + günlük plan kalorisi için her meal item'a get_item_by_id yapıyordu.
+# Günün toplam kalorisi DailyMealPlan.TotalCalories'ten gelir, yoksa SQL tarafında SUM ile hesaplanır (correlated subquery).
+# PromptContext hem prompt'u, hem LLM cache key'ini, hem de loglamayı besler.
+
+DEFAULT_MEDICAL_INFO = "Bilinen hastalık yok"
+
+
+@dataclass
+class PromptContext:
+    client_id: str
+    meal_id: int
+    item_id: int
+
+    # Item being replaced (per 100g) and its portion
+    item_name: str
+    item_category: Optional[str]
+    item_protein: float
+    item_carb: float
+    item_fat: float
+    portion: int
+
+    # Client
+    sex: Optional[str]
+    dob: Optional[date]
+    medical_info: str
+
+    # Latest physical details (None if there is no measurement)
+    weight: Optional[float]
+    height: Optional[float]
+    body_fat: Optional[float]
+    activity_status: Optional[str]
+
+    # Daily plan of the meal
+    meal_plan_id: int
+    plan_date: Optional[date]
+    plan_calories: float
+
+    # Derived by the caller (TDEE needs the calculation helpers of mealitem_service)
+    tdee: Optional[float] = None
+    plan_goal: Optional[str] = None
+    candidates: list = field(default_factory=list)
+
+    @property
+    def item_calories_per_100g(self):
+        return self.item_protein * 4 + self.item_carb * 4 + self.item_fat * 9
+
+    @property
+    def portion_calories(self):
+        return round(self.item_calories_per_100g * (self.portion / 100), 0)
+
+    @property
+    def portion_macros(self):
+        """
+        Returns:
+            tuple: (protein, carb, fat) of the portion, 1 decimal
+        """
+        ratio = self.portion / 100
+        return (
+            round(self.item_protein * ratio, 1),
+            round(self.item_carb * ratio, 1),
+            round(self.item_fat * ratio, 1),
+        )
+
+    @property
+    def original_item(self):
+        # Same shape as an item_catalog_service entry (used by _prefilter_candidates)
+        return {
+            'ItemID': self.item_id,
+            'ItemName': self.item_name,
+            'ItemCategory': self.item_category,
+            'ItemProtein': self.item_protein,
+            'ItemCarb': self.item_carb,
+            'ItemFat': self.item_fat,
+            'ItemCalories': self.item_calories_per_100g,
+        }
+
+    def age(self, today=None):
+        today = today or date.today()
+        if not self.dob:
+            return 0
+        return today.year - self.dob.year - ((today.month, today.day) < (self.dob.month, self.dob.day))
+
+    def cache_fields(self):
+        """
+        Fields the rendered prompt depends on (LLM cache key)
+        """
+        return {
+            'item': self.item_name,
+            'portion': self.portion,
+            'medical_info': self.medical_info,
+            'plan_goal': self.plan_goal,
+            'candidates': [c['name'] for c in self.candidates],
+        }
+
+    def log_summary(self):
+        # Only ids and counts: medical text, DOB and body measurements never go to the logs
+        return {
+            'client_id': self.client_id,
+            'meal_id': self.meal_id,
+            'item_id': self.item_id,
+            'meal_plan_id': self.meal_plan_id,
+            'item_category': self.item_category,
+            'candidates': len(self.candidates),
+        }
+
+
+def _parse_dob(value):
+    # Client.DOB is a string column, both formats exist in the DB
+    if value is None or isinstance(value, date):
+        return value
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    print(f"❌ Invalid DOB format: {value}")
+    return date.today()  # Fallback, age 0
+
+
+def load_prompt_context(client_id, meal_id, item_id):
+    """
+    Load the prompt context of a meal item with a single query
+    (MealItem + Item + Meal + DailyMealPlan + Client + latest PhysicalDetails,
+    medical text and the plan's total kcal as correlated subqueries).
+
+    Returns:
+        PromptContext or None if the meal item / client / physical details are missing
+    """
+    try:
+        # Latest measurement of the client
+        latest_physical_id = (
+            db.session.query(PhysicalDetails.PhysicalDetailID)
+            .filter(PhysicalDetails.ClientID == client_id)
+            .order_by(PhysicalDetails.MeasurementDate.desc(), PhysicalDetails.PhysicalDetailID.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        medical_data = (
+            db.session.query(MedicalDetails.MedicalData)
+            .filter(MedicalDetails.ClientID == client_id)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        # Total kcal of every item in the daily plan of this meal
+        plan_meal = aliased(Meal)
+        plan_meal_item = aliased(MealItem)
+        plan_item = aliased(Item)
+        item_kcal = (
+            func.coalesce(plan_item.ItemProtein, 0) * 4
+            + func.coalesce(plan_item.ItemCarb, 0) * 4
+            + func.coalesce(plan_item.ItemFat, 0) * 9
+        )
+        plan_calories = (
+            db.session.query(func.coalesce(func.sum(item_kcal * plan_meal_item.ConsumeAmount / 100), 0))
+            .select_from(plan_meal)
+            .join(plan_meal_item, plan_meal_item.MealID == plan_meal.MealID)
+            .join(plan_item, plan_item.ItemID == plan_meal_item.ItemID)
+            .filter(plan_meal.MealPlanID == DailyMealPlan.MealPlanID)
+            .correlate(DailyMealPlan)
+            .scalar_subquery()
+        )
+
+        row = (
+            db.session.query(
+                MealItem.ConsumeAmount,
+                Item.ItemName,
+                Item.ItemCategory,
+                Item.ItemProtein,
+                Item.ItemCarb,
+                Item.ItemFat,
+                DailyMealPlan.MealPlanID,
+                DailyMealPlan.PlanDate,
+                Client.ClientID,
+                Client.Sex,
+                Client.DOB,
+                PhysicalDetails.Weight,
+                PhysicalDetails.Height,
+                PhysicalDetails.BodyFat,
+                PhysicalDetails.ActivityStatus,
+                medical_data.label('MedicalData'),
+                # Stored daily total if materialized, SQL aggregate otherwise
+                func.coalesce(DailyMealPlan.TotalCalories, plan_calories).label('PlanCalories'),
+            )
+            .select_from(MealItem)
+            .join(Item, Item.ItemID == MealItem.ItemID)
+            .join(Meal, Meal.MealID == MealItem.MealID)
+            .join(DailyMealPlan, DailyMealPlan.MealPlanID == Meal.MealPlanID)
+            .outerjoin(Client, Client.ClientID == client_id)
+            .outerjoin(PhysicalDetails, and_(
+                PhysicalDetails.ClientID == client_id,
+                PhysicalDetails.PhysicalDetailID == latest_physical_id
+            ))
+            .filter(MealItem.MealID == meal_id, MealItem.ItemID == item_id)
+            .first()
+        )
+
+        if not row:
+            print(f"Meal item not found: MealID={meal_id}, ItemID={item_id}")
+            return None
+
+        if row.ClientID is None:
+            print(f"Client not found: {client_id}")
+            return None
+
+        if row.Weight is None or row.Height is None:
+            print(f"Physical details not found for client: {client_id}")
+            return None
+
+        return PromptContext(
+            client_id=client_id,
+            meal_id=int(meal_id),
+            item_id=int(item_id),
+            item_name=row.ItemName,
+            item_category=row.ItemCategory,
+            item_protein=float(row.ItemProtein or 0),
+            item_carb=float(row.ItemCarb or 0),
+            item_fat=float(row.ItemFat or 0),
+            portion=row.ConsumeAmount,
+            sex=row.Sex,
+            dob=_parse_dob(row.DOB),
+            medical_info=row.MedicalData or DEFAULT_MEDICAL_INFO,
+            weight=float(row.Weight),
+            height=float(row.Height),
+            body_fat=float(row.BodyFat) if row.BodyFat else None,
+            activity_status=row.ActivityStatus,
+            meal_plan_id=row.MealPlanID,
+            plan_date=row.PlanDate,
+            plan_calories=float(row.PlanCalories or 0),
+        )
+
+    except Exception as e:
+        print(f"Error in load_prompt_context: {str(e)}")
+        return None
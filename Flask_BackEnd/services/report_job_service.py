@@ -0,0 +1,259 @@
+from models.models import Client
+from db_config import db
+from services.physical_details_service import create_pdf_report, get_report_renderer, get_progress_data_version
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import hashlib
+import threading
+import time
+import glob
+import uuid
+import re
+import os
+
+# Progress PDF report'ları request thread'i dışında üretilir ve diskte cache'lenir.
+# Eskiden create_pdf_report bütün PDF'i BytesIO'da, request içinde üretiyordu (büyük geçmişte worker saniyelerce meşgul).
+# Dosya adı = job id = <client>_<option>_<fingerprint>; fingerprint raporu etkileyen verinin özeti
+# (client bilgisi, PhysicalDetails ve ClientProgressSnapshot aggregate'leri, bugünün tarihi - kapakta yazıyor,
+# PROGRESS_REPORT_RENDERER - renderer değişince eski PDF'ler kullanılmaz).
+# Veri değişmediyse aynı dosya tekrar kullanılır, indirme bedava. Dosya diskte olduğu için
+# bitmiş job'lar her gunicorn worker'ından indirilebilir, bekleyen job durumu ise işi alan worker'dadır.
+
+REPORT_DIR = os.getenv('REPORT_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'reports'
+)
+# Reports run one at a time per process (matplotlib renderer: the pages of a report are rendered in parallel, REPORT_RENDER_PROCESSES)
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 1))
+REPORT_JOB_RETENTION_SECONDS = int(os.getenv('REPORT_JOB_RETENTION_SECONDS', 3600))
+# GET /clients/progress-report waits this long for its job, then answers 202 with the job URLs
+REPORT_SYNC_TIMEOUT_SECONDS = float(os.getenv('REPORT_SYNC_TIMEOUT_SECONDS', 20))
+VALID_REPORT_OPTIONS = ('weekly', 'monthly', 'all')
+
+_JOB_ID = re.compile(r'^[A-Za-z0-9\-]+_(weekly|monthly|all)_[0-9a-f]{16}$')
+
+_executor = None
+_jobs = {}  # job_id -> {'status', 'clientId', 'option', 'error', 'createdAt', 'finished': Event}
+_jobs_lock = threading.Lock()
+_render_locks = {}  # job_id -> [Lock, number of threads using it], only the same report waits
+
+
+def _get_executor():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix='report')
+        return _executor
+
+
+def _safe_client_id(client_id):
+    return re.sub(r'[^A-Za-z0-9\-]', '-', str(client_id))
+
+
+def report_fingerprint(client_id):
+    """
+    Summary of every value the report depends on (changes whenever the report would change).
+
+    Returns:
+        str: 16 hex chars, or None if the client does not exist
+    """
+    client = db.session.query(Client.Name, Client.Sex, Client.DOB).filter(Client.ClientID == client_id).first()
+    if not client:
+        return None
+
+    # Snapshots are incremented in place, the version includes their sums
+    physical, adherence = get_progress_data_version(client_id)
+
+    raw = repr((tuple(client), physical, adherence, date.today().isoformat(), get_report_renderer()))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def report_job_id(client_id, option, fingerprint):
+    return f"{_safe_client_id(client_id)}_{option}_{fingerprint}"
+
+
+def report_path(job_id):
+    """
+    Returns:
+        str: path of the cached PDF, None if the job id is malformed
+    """
+    if not _JOB_ID.match(job_id or ''):
+        return None
+    return os.path.join(REPORT_DIR, f"{job_id}.pdf")
+
+
+def _remove_older_reports(job_id):
+    # Same client + option with an older fingerprint is outdated
+    prefix = job_id.rsplit('_', 1)[0]
+    for path in glob.glob(os.path.join(REPORT_DIR, f"{prefix}_*.pdf")):
+        if os.path.basename(path) != f"{job_id}.pdf":
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def render_report_file(client_id, option, job_id):
+    """
+    Render the PDF into a temporary file and move it to the cache path (atomic, readers never see half a file).
+
+    Returns:
+        tuple: (path: str or None, error: str or None)
+    """
+    path = report_path(job_id)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+
+    with _jobs_lock:
+        entry = _render_locks.setdefault(job_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            if os.path.exists(path):
+                return path, None
+
+            buf, error = create_pdf_report(client_id, option)
+            if error:
+                return None, error
+
+            tmp_path = os.path.join(REPORT_DIR, f".{job_id}.{uuid.uuid4().hex}.tmp")
+            try:
+                with open(tmp_path, 'wb') as f:
+                    f.write(buf.getbuffer())
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    finally:
+        with _jobs_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _render_locks[job_id]
+
+    _remove_older_reports(job_id)
+    return path, None
+
+
+def _run_job(app, job_id, client_id, option):
+    with app.app_context():
+        _set_job(job_id, status='running')
+        try:
+            path, error = render_report_file(client_id, option, job_id)
+            if error:
+                _set_job(job_id, status='failed', error=error)
+            else:
+                _set_job(job_id, status='done')
+        except Exception as e:
+            print(f"Error rendering progress report {job_id}: {e}")
+            _set_job(job_id, status='failed', error=str(e))
+        finally:
+            db.session.remove()
+
+
+def _set_job(job_id, **fields):
+    with _jobs_lock:
+        if job_id in _jobs:
+            _jobs[job_id].update(fields)
+            if fields.get('status') in ('done', 'failed'):
+                _jobs[job_id]['finished'].set()
+
+
+def _prune_jobs():
+    cutoff = time.time() - REPORT_JOB_RETENTION_SECONDS
+    with _jobs_lock:
+        for job_id in [j for j, job in _jobs.items() if job['status'] in ('done', 'failed') and job['createdAt'] < cutoff]:
+            del _jobs[job_id]
+
+
+def _job_dict(job_id, status, error=None):
+    return {'jobId': job_id, 'status': status, 'error': error}
+
+
+def submit_report_job(client_id, option='all'):
+    """
+    Start rendering a progress report in the background (or reuse the cached / running one).
+
+    Returns:
+        tuple: (success: bool, message: str, job: dict {'jobId', 'status', 'error'} or None)
+    """
+    if option not in VALID_REPORT_OPTIONS:
+        option = 'all'
+
+    fingerprint = report_fingerprint(client_id)
+    if fingerprint is None:
+        return False, 'Client not found', None
+
+    job_id = report_job_id(client_id, option, fingerprint)
+    if os.path.exists(report_path(job_id)):
+        return True, 'Report ready', _job_dict(job_id, 'done')
+
+    _prune_jobs()
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job and job['status'] in ('queued', 'running'):
+            return True, 'Report is being generated', _job_dict(job_id, job['status'])
+        _jobs[job_id] = {
+            'status': 'queued', 'clientId': client_id, 'option': option, 'error': None, 'createdAt': time.time(),
+            'finished': threading.Event(),
+        }
+
+    _get_executor().submit(_run_job, current_app._get_current_object(), job_id, client_id, option)
+    return True, 'Report queued', _job_dict(job_id, 'queued')
+
+
+def get_report_job(job_id):
+    """
+    Returns:
+        dict: {'jobId', 'status': 'queued' | 'running' | 'done' | 'failed', 'error'} or None if unknown
+    """
+    path = report_path(job_id)
+    if path is None:
+        return None
+
+    with _jobs_lock:
+        job = dict(_jobs[job_id]) if job_id in _jobs else None
+
+    if job and job['status'] != 'done':
+        return _job_dict(job_id, job['status'], job['error'])
+    # Finished here or by another worker process
+    if os.path.exists(path):
+        return _job_dict(job_id, 'done')
+    return None
+
+
+def wait_report_job(job_id, timeout):
+    """
+    Wait up to timeout seconds for a job submitted by this process.
+
+    Returns:
+        dict: same as get_report_job (still 'queued' / 'running' if the timeout passed)
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        finished = job['finished'] if job else None
+
+    if finished is not None:
+        finished.wait(timeout)
+    return get_report_job(job_id)
+
+
+def get_or_wait_report(client_id, option='all', timeout=None):
+    """
+    Synchronous path (GET /clients/progress-report): the same background job as POST .../jobs,
+    waited for in the request thread at most timeout seconds (REPORT_SYNC_TIMEOUT_SECONDS).
+    Rendering never happens in the request thread and a slow report doesn't hold the request forever.
+
+    Returns:
+        tuple: (success: bool, message: str, job: dict {'jobId', 'status', 'error'} or None)
+    """
+    success, message, job = submit_report_job(client_id, option)
+    if not success or job['status'] == 'done':
+        return success, message, job
+
+    job = wait_report_job(job['jobId'], REPORT_SYNC_TIMEOUT_SECONDS if timeout is None else timeout)
+    if job is None:
+        return False, 'Report job not found', None
+    if job['status'] == 'done':
+        return True, 'Report ready', job
+    if job['status'] == 'failed':
+        return False, job['error'] or 'Report generation failed', job
+    return True, 'Report is being generated', job
@@ -0,0 +1,287 @@
+# Default progress report renderer (matplotlib), PROGRESS_REPORT_RENDERER=matplotlib.
+# İlk rapor üretilirken (lazy) import edilir (matplotlib ~yüzlerce ms import + onlarca MB RSS), worker açılışında değil.
+# Render process'leri (spawn) bu modülü import eder, DB / Flask bağımlılığı yok.
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+import io
+import os
+# Object-oriented Figure API only (no pyplot global state), pages can be rendered in any thread / process
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_pdf import PdfPages
+import numpy as np
+from matplotlib.patches import FancyBboxPatch
+
+try:
+    from pypdf import PdfWriter, PdfReader  # pip install pypdf (optional, needed to merge pages rendered in parallel)
+except ImportError:
+    PdfWriter = PdfReader = None
+
+# Chart pages are rendered in a process pool when > 1 and pypdf is installed, otherwise one after another.
+REPORT_RENDER_PROCESSES = int(os.getenv('REPORT_RENDER_PROCESSES', min(4, os.cpu_count() or 1)))
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def _build_page(page):
+    if page['kind'] == 'cover':
+        return _create_cover_page(**page['args'])
+    return _create_chart_page(**page['args'])
+
+
+def render_page_pdf(page):
+    """
+    Render one page spec into a single-page PDF (runs in the render processes)
+
+    Returns:
+        bytes
+    """
+    buf = io.BytesIO()
+    _build_page(page).savefig(buf, format='pdf')
+    return buf.getvalue()
+
+
+def _get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: the web process has threads (report jobs), forking it is not safe
+            _render_pool = ProcessPoolExecutor(
+                max_workers=REPORT_RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _render_pool
+
+
+def _render_sequential(pages):
+    buf = io.BytesIO()
+    with PdfPages(buf) as pdf:
+        for page in pages:
+            pdf.savefig(_build_page(page))
+    buf.seek(0)
+    return buf
+
+
+def _render_parallel(pages):
+    # Pages come back in submission order, merged into one document
+    writer = PdfWriter()
+    for page_pdf in _get_render_pool().map(render_page_pdf, pages):
+        writer.append(PdfReader(io.BytesIO(page_pdf)))
+
+    buf = io.BytesIO()
+    writer.write(buf)
+    buf.seek(0)
+    return buf
+
+
+def render_report_pdf(pages, processes=None):
+    """
+    Render the page specs into one PDF, in parallel when possible.
+
+    Args:
+        processes (int, optional): override REPORT_RENDER_PROCESSES (1 = sequential)
+
+    Returns:
+        BytesIO positioned at 0
+    """
+    processes = REPORT_RENDER_PROCESSES if processes is None else processes
+    if processes > 1 and PdfWriter is not None and len(pages) > 1:
+        try:
+            return _render_parallel(pages)
+        except Exception as e:
+            print(f"Parallel report rendering failed, rendering sequentially: {e}")
+    return _render_sequential(pages)
+
+
+def _create_cover_page(client_info, option, summary, generated_at):
+
+    option_label = {'weekly': 'Weekly', 'monthly': 'Monthly', 'all': 'Weekly & Monthly'}
+    fig = Figure(figsize=(8.27, 11.69))  # A4
+    fig.patch.set_facecolor('white')
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.axis('off')
+
+    # Header bar
+    ax.axhspan(0.88, 1.0, color="#FFFFFF")
+    ax.text(0.5, 0.94, "Client Progress Report", fontsize=22, fontweight='bold',
+            color="#1A1A2E", ha='center', va='center', transform=ax.transAxes)
+
+    # Client info
+    y = 0.84
+    info_lines = [
+        f"Client: {client_info['Name']}",
+        f"Gender: {client_info['Sex']}    |    DOB: {client_info['DOB'] or 'N/A'}",
+        f"Report Type: {option_label.get(option, 'All')}",
+        f"Report Generated: {generated_at}",
+    ]
+    for line in info_lines:
+        ax.text(0.08, y, line, fontsize=11, color='#374151', transform=ax.transAxes)
+        y -= 0.035
+
+    # Summary statistics boxes
+    y = 0.68
+    ax.text(0.08, y, "Summary Statistics", fontsize=14, fontweight='bold',
+            color='#1A1A2E', transform=ax.transAxes)
+    y -= 0.05
+
+    for i, m in enumerate(summary):
+        box_y = y - 0.04 - i * 0.14
+        box = FancyBboxPatch((0.06, box_y - 0.08), 0.88, 0.12,
+                              boxstyle="round,pad=0.01", facecolor='#F9FAFB',
+                              edgecolor=m['color'], linewidth=1.5, transform=ax.transAxes)
+        ax.add_patch(box)
+        ax.text(0.10, box_y, m['title'], fontsize=12, fontweight='bold',
+                color=m['color'], transform=ax.transAxes)
+        ax.text(0.10, box_y - 0.035,
+                f"Current: {m['current']}    Min: {m['min']}    Max: {m['max']}    Avg: {m['avg']}",
+                fontsize=9, color='#374151', transform=ax.transAxes)
+        ax.text(0.10, box_y - 0.06,
+                f"Records: {m['records']}",
+                fontsize=9, color='#6B7280', transform=ax.transAxes)
+        if m['change']:
+            ax.text(0.80, box_y, m['change'], fontsize=12, fontweight='bold',
+                    color=m['change_color'], ha='center', transform=ax.transAxes)
+
+    # Footer
+    ax.text(0.5, 0.04, "Dietitian's Assistant — Confidential", fontsize=8,
+            color='#9CA3AF', ha='center', transform=ax.transAxes)
+
+    return fig
+
+
+def _create_chart_page(weekly_data, monthly_data, title, ylabel, color, option,
+                       secondary_label=None, secondary_factor=None):
+    """
+    Creates a chart page with 1 or 2 sub-charts depending on option:
+    - 'weekly':  weekly line chart only (full page)
+    - 'monthly': monthly bar chart only (full page)
+    - 'all':     weekly line (top) + monthly bar (bottom)
+    """
+    show_weekly = option in ('weekly', 'all')
+    show_monthly = option in ('monthly', 'all')
+    num_charts = int(show_weekly) + int(show_monthly)
+
+    fig = Figure(figsize=(8.27, 11.69))
+    if num_charts == 2:
+        axes = fig.subplots(2, 1, gridspec_kw={'height_ratios': [1, 1]})
+    else:
+        axes = [fig.subplots(1, 1)]
+
+    fig.patch.set_facecolor('white')
+    fig.text(0.5, 0.96, title, fontsize=18, fontweight='bold', color='#1A1A2E', ha='center')
+
+    chart_idx = 0
+
+    # ── Weekly line chart ──
+    if show_weekly and weekly_data:
+        ax = axes[chart_idx]
+        chart_idx += 1
+
+        week_labels = [r['date'] for r in weekly_data]
+        week_values = [r['value'] for r in weekly_data]
+        x_pos = range(len(week_labels))
+
+        ax.set_title('Weekly Averages', fontsize=12, fontweight='bold', color='#374151', pad=12)
+        ax.plot(list(x_pos), week_values, '-o', color=color, markersize=5, linewidth=2, alpha=0.9)
+        ax.fill_between(list(x_pos), week_values, alpha=0.08, color=color)
+
+        # Trend line
+        if len(week_values) >= 3:
+            x_num = np.array(list(x_pos), dtype=float)
+            z = np.polyfit(x_num, week_values, 1)
+            p = np.poly1d(z)
+            ax.plot(list(x_pos), p(x_num), '--', color='#EF4444', linewidth=1, alpha=0.7, label='Trend')
+            ax.legend(fontsize=8, loc='upper right')
+
+        # Min/max annotations
+        min_idx = week_values.index(min(week_values))
+        max_idx = week_values.index(max(week_values))
+        ax.annotate(f'{week_values[min_idx]:.1f}', xy=(min_idx, week_values[min_idx]),
+                    fontsize=7, color='#22C55E', fontweight='bold', ha='center',
+                    xytext=(0, -14), textcoords='offset points')
+        ax.annotate(f'{week_values[max_idx]:.1f}', xy=(max_idx, week_values[max_idx]),
+                    fontsize=7, color='#EF4444', fontweight='bold', ha='center',
+                    xytext=(0, 10), textcoords='offset points')
+
+        # Average line
+        avg = sum(week_values) / len(week_values)
+        ax.axhline(y=avg, color='#9CA3AF', linestyle=':', linewidth=0.8, alpha=0.7)
+        ax.text(len(week_values) - 1, avg, f' avg: {avg:.1f}', fontsize=7, color='#9CA3AF', va='bottom')
+
+        # Format x labels as W01, W02...
+        display_labels = [f"W{lbl.split('-W')[1]}" if '-W' in lbl else lbl for lbl in week_labels]
+        step = max(1, len(display_labels) // 12)
+        ax.set_xticks([i for i in x_pos if i % step == 0 or i == len(display_labels) - 1])
+        ax.set_xticklabels([display_labels[i] for i in x_pos if i % step == 0 or i == len(display_labels) - 1])
+
+        ax.set_ylabel(ylabel, fontsize=10, color='#374151')
+        ax.tick_params(axis='x', rotation=45, labelsize=8)
+        ax.tick_params(axis='y', labelsize=8)
+        ax.grid(axis='y', alpha=0.3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+        # Secondary y-axis for lbs
+        if secondary_label and secondary_factor:
+            ax2 = ax.twinx()
+            ax2.set_ylabel(f'{ylabel.split("(")[0]}({secondary_label})', fontsize=10, color='#9CA3AF')
+            y_min, y_max = ax.get_ylim()
+            ax2.set_ylim(y_min * secondary_factor, y_max * secondary_factor)
+            ax2.tick_params(axis='y', labelsize=8, labelcolor='#9CA3AF')
+            ax2.spines['top'].set_visible(False)
+
+    elif show_weekly:
+        ax = axes[chart_idx]
+        chart_idx += 1
+        ax.text(0.5, 0.5, 'No weekly data available', ha='center', va='center',
+                fontsize=12, color='#9CA3AF', transform=ax.transAxes)
+        ax.axis('off')
+
+    # ── Monthly bar chart ──
+    if show_monthly and monthly_data:
+        ax = axes[chart_idx]
+
+        month_labels = []
+        month_values = []
+        for m in monthly_data:
+            parts = m['date'].split('-')
+            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+                           'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+            month_idx = int(parts[1]) - 1
+            label = f"{month_names[month_idx]} {parts[0][2:]}"
+            month_labels.append(label)
+            month_values.append(m['value'])
+
+        ax.set_title('Monthly Averages', fontsize=12, fontweight='bold', color='#374151', pad=12)
+        bars = ax.bar(month_labels, month_values, color=color, alpha=0.75, width=0.6,
+                      edgecolor=color, linewidth=0.8)
+
+        # Value labels on bars
+        for bar, val in zip(bars, month_values):
+            ax.text(bar.get_x() + bar.get_width() / 2, bar.get_height() + 0.2,
+                    f'{val:.1f}', ha='center', va='bottom', fontsize=7, color='#374151')
+
+        # Average line
+        avg = sum(month_values) / len(month_values)
+        ax.axhline(y=avg, color='#9CA3AF', linestyle=':', linewidth=0.8, alpha=0.7)
+        ax.text(len(month_values) - 0.5, avg, f' avg: {avg:.1f}', fontsize=7, color='#9CA3AF', va='bottom')
+
+        ax.set_ylabel(ylabel, fontsize=10, color='#374151')
+        ax.tick_params(axis='x', rotation=45, labelsize=8)
+        ax.tick_params(axis='y', labelsize=8)
+        ax.grid(axis='y', alpha=0.3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+    elif show_monthly:
+        ax = axes[chart_idx]
+        ax.text(0.5, 0.5, 'No monthly data available', ha='center', va='center',
+                fontsize=12, color='#9CA3AF', transform=ax.transAxes)
+        ax.axis('off')
+
+    # Footer
+    fig.text(0.5, 0.02, "Dietitian's Assistant — Confidential", fontsize=8,
+             color='#9CA3AF', ha='center')
+
+    fig.tight_layout(rect=[0.02, 0.04, 0.98, 0.94])
+    return fig
\ No newline at end of file
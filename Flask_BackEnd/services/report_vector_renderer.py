@@ -0,0 +1,589 @@
+# Matplotlib'siz progress report renderer (opt-in: PROGRESS_REPORT_RENDERER=vector, varsayılan matplotlib).
+# Sayfalar build_report_pages'in ürettiği spec'lerden küçük bir vektör canvas'a çizilir
+# (line / polyline / polygon / rect / circle / text), canvas hem SVG'ye hem PDF content stream'ine yazılır.
+# PDF elle üretilir: standart 14 fonttan Helvetica / Helvetica-Bold (gömülü font yok), WinAnsiEncoding
+# (ğ / ş / ı / İ yok, en yakın ASCII harfe düşer - Türkçe isimler bozulur, bu yüzden varsayılan değil),
+# FlateDecode (zlib) content stream, şeffaflık için ExtGState. Sadece stdlib kullanır.
+# Yerleşim eski matplotlib sayfalarıyla aynı: kapak + özet kutuları, metrik başına haftalık çizgi / aylık bar grafiği.
+import io
+import math
+import zlib
+
+PAGE_WIDTH = 8.27 * 72  # A4, points
+PAGE_HEIGHT = 11.69 * 72
+
+FOOTER_TEXT = "Dietitian's Assistant — Confidential"
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Helvetica AFM advance widths (1/1000 em) for chars 32..126, text anchoring (center / right) needs them
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD_WIDTHS = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+
+# WinAnsi (cp1252) has ç, ö, ü but not ğ, ş, ı, İ: closest ASCII letter instead of '?'
+_WINANSI_FALLBACK = str.maketrans({'ğ': 'g', 'Ğ': 'G', 'ş': 's', 'Ş': 'S', 'ı': 'i', 'İ': 'I'})
+
+
+def _winansi(text):
+    return str(text).translate(_WINANSI_FALLBACK).encode('cp1252', errors='replace')
+
+
+def text_width(text, size, bold=False):
+    """
+    Returns:
+        float: advance width of the text in points
+    """
+    widths = _HELVETICA_BOLD_WIDTHS if bold else _HELVETICA_WIDTHS
+    total = 0
+    for byte in _winansi(text):
+        if 32 <= byte <= 126:
+            total += widths[byte - 32]
+        elif byte == 0x97:  # em dash
+            total += 1000
+        else:
+            total += 556
+    return total * size / 1000.0
+
+
+def _rgb(color):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) / 255.0 for i in (0, 2, 4))
+
+
+def _num(value):
+    return f'{value:.2f}'.rstrip('0').rstrip('.') or '0'
+
+
+def _xml_escape(text):
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def _pdf_string(text):
+    out = []
+    for byte in _winansi(text):
+        char = chr(byte)
+        if char in '\\()':
+            out.append('\\' + char)
+        elif 32 <= byte <= 126:
+            out.append(char)
+        else:
+            out.append(f'\\{byte:03o}')
+    return '(' + ''.join(out) + ')'
+
+
+def _rect_path(x, y, w, h, radius=0):
+    # PDF coordinates (x, y = bottom-left corner)
+    if not radius:
+        return f'{_num(x)} {_num(y)} {_num(w)} {_num(h)} re'
+    x1, y1, r = x + w, y + h, radius
+    k = r * 0.5523  # bezier approximation of a quarter circle
+    return (
+        f'{_num(x + r)} {_num(y)} m {_num(x1 - r)} {_num(y)} l '
+        f'{_num(x1 - r + k)} {_num(y)} {_num(x1)} {_num(y + r - k)} {_num(x1)} {_num(y + r)} c '
+        f'{_num(x1)} {_num(y1 - r)} l '
+        f'{_num(x1)} {_num(y1 - r + k)} {_num(x1 - r + k)} {_num(y1)} {_num(x1 - r)} {_num(y1)} c '
+        f'{_num(x + r)} {_num(y1)} l '
+        f'{_num(x + r - k)} {_num(y1)} {_num(x)} {_num(y1 - r + k)} {_num(x)} {_num(y1 - r)} c '
+        f'{_num(x)} {_num(y + r)} l '
+        f'{_num(x)} {_num(y + r - k)} {_num(x + r - k)} {_num(y)} {_num(x + r)} {_num(y)} c h'
+    )
+
+
+class Canvas:
+    """
+    Recorded drawing operations of one page, top-left origin, y grows downwards, units are points
+    """
+
+    def __init__(self, width=PAGE_WIDTH, height=PAGE_HEIGHT):
+        self.width = width
+        self.height = height
+        self.ops = []
+
+    def line(self, x1, y1, x2, y2, color, width=1.0, alpha=1.0, dash=None):
+        self.polyline([(x1, y1), (x2, y2)], color, width, alpha, dash)
+
+    def polyline(self, points, color, width=1.0, alpha=1.0, dash=None):
+        self.ops.append(('polyline', list(points), color, width, alpha, dash))
+
+    def polygon(self, points, fill, alpha=1.0):
+        self.ops.append(('polygon', list(points), fill, alpha))
+
+    def rect(self, x, y, w, h, fill=None, stroke=None, width=1.0, alpha=1.0, radius=0):
+        self.ops.append(('rect', x, y, w, h, fill, stroke, width, alpha, radius))
+
+    def circle(self, cx, cy, r, fill, alpha=1.0):
+        self.ops.append(('circle', cx, cy, r, fill, alpha))
+
+    def text(self, x, y, text, size, color, bold=False, anchor='start', rotate=0):
+        """
+        `y` is the baseline, `anchor` start | middle | end along the (rotated) baseline,
+        `rotate` degrees counter-clockwise around (x, y)
+        """
+        self.ops.append(('text', x, y, str(text), size, color, bold, anchor, rotate))
+
+    # ── SVG ──
+
+    def to_svg(self):
+        """
+        Returns:
+            str: standalone SVG document
+        """
+        parts = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{_num(self.width)}pt" height="{_num(self.height)}pt" '
+            f'viewBox="0 0 {_num(self.width)} {_num(self.height)}" font-family="Helvetica, Arial, sans-serif">',
+            f'<rect width="{_num(self.width)}" height="{_num(self.height)}" fill="#FFFFFF"/>',
+        ]
+        for op in self.ops:
+            kind = op[0]
+            if kind == 'polyline':
+                _, points, color, width, alpha, dash = op
+                dash_attr = f' stroke-dasharray="{" ".join(_num(d) for d in dash)}"' if dash else ''
+                parts.append(
+                    f'<polyline points="{" ".join(f"{_num(x)},{_num(y)}" for x, y in points)}" fill="none" '
+                    f'stroke="{color}" stroke-width="{_num(width)}" stroke-opacity="{_num(alpha)}"{dash_attr}/>'
+                )
+            elif kind == 'polygon':
+                _, points, fill, alpha = op
+                parts.append(
+                    f'<polygon points="{" ".join(f"{_num(x)},{_num(y)}" for x, y in points)}" '
+                    f'fill="{fill}" fill-opacity="{_num(alpha)}"/>'
+                )
+            elif kind == 'rect':
+                _, x, y, w, h, fill, stroke, width, alpha, radius = op
+                stroke_attr = f' stroke="{stroke}" stroke-width="{_num(width)}"' if stroke else ''
+                parts.append(
+                    f'<rect x="{_num(x)}" y="{_num(y)}" width="{_num(w)}" height="{_num(h)}" rx="{_num(radius)}" '
+                    f'fill="{fill or "none"}" fill-opacity="{_num(alpha)}"{stroke_attr}/>'
+                )
+            elif kind == 'circle':
+                _, cx, cy, r, fill, alpha = op
+                parts.append(f'<circle cx="{_num(cx)}" cy="{_num(cy)}" r="{_num(r)}" fill="{fill}" fill-opacity="{_num(alpha)}"/>')
+            elif kind == 'text':
+                _, x, y, text, size, color, bold, anchor, rotate = op
+                weight_attr = ' font-weight="bold"' if bold else ''
+                rotate_attr = f' transform="rotate({_num(-rotate)} {_num(x)} {_num(y)})"' if rotate else ''
+                parts.append(
+                    f'<text x="{_num(x)}" y="{_num(y)}" font-size="{_num(size)}" fill="{color}" '
+                    f'text-anchor="{anchor}"{weight_attr}{rotate_attr}>{_xml_escape(text)}</text>'
+                )
+        parts.append('</svg>')
+        return '\n'.join(parts)
+
+    # ── PDF ──
+
+    def to_pdf_stream(self, alpha_states):
+        """
+        Content stream of the page (PDF origin is bottom-left, y is flipped here).
+        `alpha_states` collects {alpha: ExtGState name} shared by the document.
+
+        Returns:
+            bytes
+        """
+        h = self.height
+        out = []
+
+        def set_alpha(alpha):
+            if alpha >= 1:
+                return
+            name = alpha_states.setdefault(round(alpha, 3), f'GS{len(alpha_states)}')
+            out.append(f'/{name} gs')
+
+        def path(points):
+            (x0, y0), rest = points[0], points[1:]
+            out.append(f'{_num(x0)} {_num(h - y0)} m')
+            out.extend(f'{_num(x)} {_num(h - y)} l' for x, y in rest)
+
+        for op in self.ops:
+            kind = op[0]
+            out.append('q')
+            if kind == 'polyline':
+                _, points, color, width, alpha, dash = op
+                set_alpha(alpha)
+                out.append('%s %s %s RG %s w 1 J 1 j' % (*(_num(c) for c in _rgb(color)), _num(width)))
+                if dash:
+                    out.append(f'[{" ".join(_num(d) for d in dash)}] 0 d')
+                path(points)
+                out.append('S')
+            elif kind == 'polygon':
+                _, points, fill, alpha = op
+                set_alpha(alpha)
+                out.append('%s %s %s rg' % tuple(_num(c) for c in _rgb(fill)))
+                path(points)
+                out.append('h f')
+            elif kind == 'rect':
+                _, x, y, w, hh, fill, stroke, width, alpha, radius = op
+                shape = _rect_path(x, h - y - hh, w, hh, radius)
+                if fill:
+                    # alpha only applies to the fill, the border stays opaque (matplotlib bars)
+                    out.append('q')
+                    set_alpha(alpha)
+                    out.append('%s %s %s rg' % tuple(_num(c) for c in _rgb(fill)))
+                    out.append(shape + ' f Q')
+                if stroke:
+                    out.append('%s %s %s RG %s w' % (*(_num(c) for c in _rgb(stroke)), _num(width)))
+                    out.append(shape + ' S')
+            elif kind == 'circle':
+                _, cx, cy, r, fill, alpha = op
+                set_alpha(alpha)
+                out.append('%s %s %s rg' % tuple(_num(c) for c in _rgb(fill)))
+                k = r * 0.5523
+                x, y = cx, h - cy
+                out.append(
+                    f'{_num(x + r)} {_num(y)} m '
+                    f'{_num(x + r)} {_num(y + k)} {_num(x + k)} {_num(y + r)} {_num(x)} {_num(y + r)} c '
+                    f'{_num(x - k)} {_num(y + r)} {_num(x - r)} {_num(y + k)} {_num(x - r)} {_num(y)} c '
+                    f'{_num(x - r)} {_num(y - k)} {_num(x - k)} {_num(y - r)} {_num(x)} {_num(y - r)} c '
+                    f'{_num(x + k)} {_num(y - r)} {_num(x + r)} {_num(y - k)} {_num(x + r)} {_num(y)} c f'
+                )
+            elif kind == 'text':
+                _, x, y, text, size, color, bold, anchor, rotate = op
+                shift = {'start': 0, 'middle': 0.5, 'end': 1}.get(anchor, 0) * text_width(text, size, bold)
+                angle = math.radians(rotate)
+                cos_a, sin_a = math.cos(angle), math.sin(angle)
+                tx, ty = x - shift * cos_a, (h - y) - shift * sin_a
+                out.append('%s %s %s rg' % tuple(_num(c) for c in _rgb(color)))
+                out.append(
+                    f'BT /{"F2" if bold else "F1"} {_num(size)} Tf '
+                    f'{cos_a:.4f} {sin_a:.4f} {-sin_a:.4f} {cos_a:.4f} {_num(tx)} {_num(ty)} Tm '
+                    f'{_pdf_string(text)} Tj ET'
+                )
+            out.append('Q')
+        return '\n'.join(out).encode('latin-1')
+
+
+def write_pdf(canvases):
+    """
+    One PDF document, one page per canvas.
+
+    Returns:
+        BytesIO positioned at 0
+    """
+    alpha_states = {}
+    streams = [zlib.compress(canvas.to_pdf_stream(alpha_states)) for canvas in canvases]
+
+    # Object numbers: 1 catalog, 2 pages, 3-4 fonts, 5 ExtGState resources, then (page, content) pairs
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        4: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        5: ('<< ' + ' '.join(
+            f'/{name} << /Type /ExtGState /ca {alpha} /CA {alpha} >>' for alpha, name in alpha_states.items()
+        ) + ' >>').encode('latin-1'),
+    }
+    page_ids = []
+    for i, (canvas, stream) in enumerate(zip(canvases, streams)):
+        page_id, content_id = 6 + 2 * i, 7 + 2 * i
+        page_ids.append(page_id)
+        objects[page_id] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_num(canvas.width)} {_num(canvas.height)}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> /ExtGState 5 0 R >> /Contents {content_id} 0 R >>'
+        ).encode('latin-1')
+        objects[content_id] = f'<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n'.encode('latin-1') + stream + b'\nendstream'
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(f"{p} 0 R" for p in page_ids)}] /Count {len(page_ids)} >>'.encode('latin-1')
+
+    buf = io.BytesIO()
+    buf.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = buf.tell()
+        buf.write(f'{obj_id} 0 obj\n'.encode('latin-1') + objects[obj_id] + b'\nendobj\n')
+
+    xref_offset = buf.tell()
+    size = max(objects) + 1
+    buf.write(f'xref\n0 {size}\n0000000000 65535 f \n'.encode('latin-1'))
+    for obj_id in range(1, size):
+        buf.write(f'{offsets[obj_id]:010d} 00000 n \n'.encode('latin-1'))
+    buf.write(f'trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'.encode('latin-1'))
+    buf.seek(0)
+    return buf
+
+
+# ── Chart helpers ──
+
+def _nice_ticks(lo, hi, target=6):
+    """
+    Returns:
+        tuple: (ticks: list of float, decimals: int)
+    """
+    span = hi - lo
+    if span <= 0:
+        span = abs(hi) or 1.0
+    raw_step = span / target
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    decimals = max(0, -int(math.floor(math.log10(step)))) + (1 if step / magnitude == 2.5 and step < 10 else 0)
+
+    ticks = []
+    tick = math.ceil(lo / step - 1e-9) * step
+    while tick <= hi + step * 1e-9:
+        ticks.append(round(tick, 10))
+        tick += step
+    return ticks, decimals
+
+
+def _linear_fit(values):
+    # Least squares y = a * x + b over x = 0..n-1 (same line as numpy.polyfit(x, y, 1))
+    n = len(values)
+    mean_x = (n - 1) / 2.0
+    mean_y = sum(values) / n
+    var_x = sum((i - mean_x) ** 2 for i in range(n))
+    a = sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values)) / var_x if var_x else 0.0
+    return a, mean_y - a * mean_x
+
+
+def _week_label(label):
+    return f"W{label.split('-W')[1]}" if '-W' in label else label
+
+
+def _month_label(label):
+    year, month = label.split('-')[:2]
+    return f"{MONTH_NAMES[int(month) - 1]} {year[2:]}"
+
+
+class _Axes:
+    """Data -> page coordinates of one plot area"""
+
+    def __init__(self, left, top, right, bottom, x_range, y_range):
+        self.left, self.top, self.right, self.bottom = left, top, right, bottom
+        self.x_min, self.x_max = x_range
+        self.y_min, self.y_max = y_range
+
+    def x(self, value):
+        return self.left + (value - self.x_min) / ((self.x_max - self.x_min) or 1) * (self.right - self.left)
+
+    def y(self, value):
+        return self.bottom - (value - self.y_min) / ((self.y_max - self.y_min) or 1) * (self.bottom - self.top)
+
+
+def _value_range(values, margin=0.05):
+    # Like matplotlib autoscale: the fill / bars start at 0, 5% margin on top
+    lo, hi = min(min(values), 0.0), max(max(values), 0.0)
+    span = (hi - lo) or 1.0
+    return (lo - (margin * span if lo < 0 else 0), hi + margin * span)
+
+
+def _draw_frame(canvas, ax, ylabel, x_ticks, y_ticks, decimals):
+    # Horizontal grid + y tick labels, left / bottom spines, x tick labels rotated 45°
+    for tick in y_ticks:
+        y = ax.y(tick)
+        canvas.line(ax.left, y, ax.right, y, '#B0B0B0', 0.8, alpha=0.3)
+        canvas.line(ax.left - 3.5, y, ax.left, y, '#000000', 0.8)
+        canvas.text(ax.left - 5.5, y + 2.8, f'{tick:.{decimals}f}', 8, '#000000', anchor='end')
+    canvas.line(ax.left, ax.top, ax.left, ax.bottom, '#000000', 0.8)
+    canvas.line(ax.left, ax.bottom, ax.right, ax.bottom, '#000000', 0.8)
+
+    for position, label in x_ticks:
+        x = ax.x(position)
+        canvas.line(x, ax.bottom, x, ax.bottom + 3.5, '#000000', 0.8)
+        canvas.text(x + 2.8, ax.bottom + 10, label, 8, '#000000', anchor='end', rotate=45)
+
+    canvas.text(ax.left - 38, (ax.top + ax.bottom) / 2, ylabel, 10, '#374151', anchor='middle', rotate=90)
+
+
+def _draw_avg_line(canvas, ax, values, label_x):
+    avg = sum(values) / len(values)
+    y = ax.y(avg)
+    canvas.line(ax.left, y, ax.right, y, '#9CA3AF', 0.8, alpha=0.7, dash=(0.8, 1.3))
+    canvas.text(ax.x(label_x), y - 2, f' avg: {avg:.1f}', 7, '#9CA3AF')
+
+
+def _draw_weekly_chart(canvas, area, weekly_data, ylabel, color, secondary_label, secondary_factor):
+    left, top, right, bottom = area
+    labels = [_week_label(r['date']) for r in weekly_data]
+    values = [r['value'] for r in weekly_data]
+    n = len(values)
+
+    canvas.text((left + right) / 2, top - 12, 'Weekly Averages', 12, '#374151', bold=True, anchor='middle')
+    x_pad = 0.05 * (n - 1) if n > 1 else 0.5
+    y_range = _value_range(values)
+    y_ticks, decimals = _nice_ticks(*y_range)
+    ax = _Axes(left, top, right, bottom, (-x_pad, n - 1 + x_pad), y_range)
+
+    step = max(1, n // 12)
+    x_ticks = [(i, labels[i]) for i in range(n) if i % step == 0 or i == n - 1]
+    _draw_frame(canvas, ax, ylabel, x_ticks, y_ticks, decimals)
+
+    points = [(ax.x(i), ax.y(v)) for i, v in enumerate(values)]
+    canvas.polygon([(points[0][0], ax.y(0))] + points + [(points[-1][0], ax.y(0))], color, alpha=0.08)
+    canvas.polyline(points, color, 2, alpha=0.9)
+    for x, y in points:
+        canvas.circle(x, y, 2.5, color, alpha=0.9)
+
+    # Trend line + legend
+    if n >= 3:
+        a, b = _linear_fit(values)
+        canvas.line(ax.x(0), ax.y(b), ax.x(n - 1), ax.y(a * (n - 1) + b), '#EF4444', 1, alpha=0.7, dash=(3.7, 1.6))
+        legend_w = 20 + text_width('Trend', 8) + 14
+        canvas.rect(right - legend_w - 4, top + 4, legend_w, 18, fill='#FFFFFF', stroke='#D0D0D0', width=0.8, radius=2)
+        canvas.line(right - legend_w + 2, top + 13, right - legend_w + 18, top + 13, '#EF4444', 1, alpha=0.7, dash=(3.7, 1.6))
+        canvas.text(right - legend_w + 24, top + 16, 'Trend', 8, '#000000')
+
+    # Min / max annotations
+    min_idx = values.index(min(values))
+    max_idx = values.index(max(values))
+    canvas.text(ax.x(min_idx), ax.y(values[min_idx]) + 14, f'{values[min_idx]:.1f}', 7, '#22C55E', bold=True, anchor='middle')
+    canvas.text(ax.x(max_idx), ax.y(values[max_idx]) - 10, f'{values[max_idx]:.1f}', 7, '#EF4444', bold=True, anchor='middle')
+
+    _draw_avg_line(canvas, ax, values, n - 1)
+
+    # Secondary y-axis (lbs), same range scaled
+    if secondary_label and secondary_factor:
+        canvas.line(right, top, right, bottom, '#000000', 0.8)
+        sec_ticks, sec_decimals = _nice_ticks(ax.y_min * secondary_factor, ax.y_max * secondary_factor)
+        for tick in sec_ticks:
+            y = ax.y(tick / secondary_factor)
+            canvas.line(right, y, right + 3.5, y, '#000000', 0.8)
+            canvas.text(right + 5.5, y + 2.8, f'{tick:.{sec_decimals}f}', 8, '#9CA3AF')
+        canvas.text(right + 44, (top + bottom) / 2, f'{ylabel.split("(")[0]}({secondary_label})', 10, '#9CA3AF',
+                    anchor='middle', rotate=90)
+
+
+def _draw_monthly_chart(canvas, area, monthly_data, ylabel, color):
+    left, top, right, bottom = area
+    labels = [_month_label(m['date']) for m in monthly_data]
+    values = [m['value'] for m in monthly_data]
+    n = len(values)
+
+    canvas.text((left + right) / 2, top - 12, 'Monthly Averages', 12, '#374151', bold=True, anchor='middle')
+    x_pad = 0.05 * (n - 1 + 0.6)
+    y_range = _value_range(values)
+    y_ticks, decimals = _nice_ticks(*y_range)
+    ax = _Axes(left, top, right, bottom, (-0.3 - x_pad, n - 1 + 0.3 + x_pad), y_range)
+    _draw_frame(canvas, ax, ylabel, list(enumerate(labels)), y_ticks, decimals)
+
+    for i, value in enumerate(values):
+        x0, x1 = ax.x(i - 0.3), ax.x(i + 0.3)
+        y0, y1 = ax.y(max(value, 0)), ax.y(min(value, 0))
+        canvas.rect(x0, y0, x1 - x0, y1 - y0, fill=color, stroke=color, width=0.8, alpha=0.75)
+        canvas.text((x0 + x1) / 2, ax.y(value + 0.2) - 2, f'{value:.1f}', 7, '#374151', anchor='middle')
+
+    _draw_avg_line(canvas, ax, values, n - 0.5)
+
+
+def _draw_no_data(canvas, area, message):
+    left, top, right, bottom = area
+    canvas.text((left + right) / 2, (top + bottom) / 2 + 4, message, 12, '#9CA3AF', anchor='middle')
+
+
+def _draw_footer(canvas, y_fraction):
+    canvas.text(canvas.width / 2, canvas.height * (1 - y_fraction), FOOTER_TEXT, 8, '#9CA3AF', anchor='middle')
+
+
+def _draw_cover_page(client_info, option, summary, generated_at):
+    canvas = Canvas()
+    w, h = canvas.width, canvas.height
+
+    def at(fx, fy):  # matplotlib axes fractions (origin bottom-left) -> page points
+        return fx * w, (1 - fy) * h
+
+    option_label = {'weekly': 'Weekly', 'monthly': 'Monthly', 'all': 'Weekly & Monthly'}
+    x, y = at(0.5, 0.94)
+    canvas.text(x, y + 8, "Client Progress Report", 22, '#1A1A2E', bold=True, anchor='middle')
+
+    # Client info
+    info_lines = [
+        f"Client: {client_info['Name']}",
+        f"Gender: {client_info['Sex']}    |    DOB: {client_info['DOB'] or 'N/A'}",
+        f"Report Type: {option_label.get(option, 'All')}",
+        f"Report Generated: {generated_at}",
+    ]
+    for i, line in enumerate(info_lines):
+        canvas.text(*at(0.08, 0.84 - i * 0.035), line, 11, '#374151')
+
+    # Summary statistics boxes
+    canvas.text(*at(0.08, 0.68), "Summary Statistics", 14, '#1A1A2E', bold=True)
+    y = 0.63
+    for i, m in enumerate(summary):
+        box_y = y - 0.04 - i * 0.14
+        bx, by = at(0.05, box_y + 0.05)
+        canvas.rect(bx, by, 0.90 * w, 0.14 * h, fill='#F9FAFB', stroke=m['color'], width=1.5, radius=6)
+        canvas.text(*at(0.10, box_y), m['title'], 12, m['color'], bold=True)
+        canvas.text(*at(0.10, box_y - 0.035),
+                    f"Current: {m['current']}    Min: {m['min']}    Max: {m['max']}    Avg: {m['avg']}",
+                    9, '#374151')
+        canvas.text(*at(0.10, box_y - 0.06), f"Records: {m['records']}", 9, '#6B7280')
+        if m['change']:
+            canvas.text(*at(0.80, box_y), m['change'], 12, m['change_color'], bold=True, anchor='middle')
+
+    _draw_footer(canvas, 0.04)
+    return canvas
+
+
+def _draw_chart_page(weekly_data, monthly_data, title, ylabel, color, option,
+                     secondary_label=None, secondary_factor=None):
+    """
+    Same layout as the matplotlib chart page:
+    - 'weekly':  weekly line chart only (full page)
+    - 'monthly': monthly bar chart only (full page)
+    - 'all':     weekly line (top) + monthly bar (bottom)
+    """
+    canvas = Canvas()
+    show_weekly = option in ('weekly', 'all')
+    show_monthly = option in ('monthly', 'all')
+
+    canvas.text(canvas.width / 2, canvas.height * 0.04 + 6, title, 18, '#1A1A2E', bold=True, anchor='middle')
+
+    # Plot areas between the title and the footer, room for the rotated x labels under each one
+    left, right = 72, canvas.width - 72
+    top, bottom = canvas.height * 0.06 + 40, canvas.height * 0.96 - 50
+    if show_weekly and show_monthly:
+        middle = (top + bottom) / 2
+        areas = [(left, top, right, middle - 45), (left, middle + 45, right, bottom)]
+    else:
+        areas = [(left, top, right, bottom)]
+
+    chart_idx = 0
+    if show_weekly:
+        if weekly_data:
+            _draw_weekly_chart(canvas, areas[chart_idx], weekly_data, ylabel, color, secondary_label, secondary_factor)
+        else:
+            _draw_no_data(canvas, areas[chart_idx], 'No weekly data available')
+        chart_idx += 1
+
+    if show_monthly:
+        if monthly_data:
+            _draw_monthly_chart(canvas, areas[chart_idx], monthly_data, ylabel, color)
+        else:
+            _draw_no_data(canvas, areas[chart_idx], 'No monthly data available')
+
+    _draw_footer(canvas, 0.02)
+    return canvas
+
+
+def _draw_page(page):
+    if page['kind'] == 'cover':
+        return _draw_cover_page(**page['args'])
+    return _draw_chart_page(**page['args'])
+
+
+def render_page_svg(page):
+    """
+    Render one page spec (build_report_pages) as an SVG document
+
+    Returns:
+        str
+    """
+    return _draw_page(page).to_svg()
+
+
+def render_report_pdf(pages):
+    """
+    Render the page specs into one PDF (no matplotlib, single thread, a few ms per page)
+
+    Returns:
+        BytesIO positioned at 0
+    """
+    return write_pdf([_draw_page(page) for page in pages])
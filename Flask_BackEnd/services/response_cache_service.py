@@ -0,0 +1,149 @@
+from services.data_version_service import get_data_versions, data_version_name
+from flask import request, make_response, Response
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+import os
+
+# Mobil uygulamanın sürekli yokladığı GET endpoint'leri için HTTP conditional cache (@conditional_cache).
+# ETag (strong) = endpoint + query parametreleri + response'un bağlı olduğu veri versiyonları (data_version_service)
+# + ekstra değerler (ör. /meals için bugünün tarihi, plan 'current' / 'past' olarak işaretleniyor).
+#   - If-None-Match eşleşirse view hiç çalışmaz, 304 döner
+#   - Eşleşmezse JSON body process içi LRU'dan (aynı ETag ile) ya da view'dan gelir, 200 + ETag
+#   - İstekte Cache-Control: no-cache / max-age=0 => server cache atlanır, no-store => body saklanmaz
+# Versiyonlar view çalışmadan ÖNCE okunur: arada yazılan veri body'de olsa bile bir sonraki istek yeni ETag alır.
+# Sadece 200 + JSON response'lar cache'lenir, hata / 404 her seferinde hesaplanır.
+
+RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', '1') not in ('0', 'false', 'False')
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 2000))
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BODY_BYTES', 1024 * 1024))
+
+_bodies = OrderedDict()  # (endpoint, args) -> (etag, body bytes)
+_lock = threading.Lock()
+_stats = {
+    'notModified': 0,
+    'hits': 0,
+    'misses': 0,
+    'stores': 0,
+    'evictions': 0,
+    'bypassed': 0,
+    'errors': 0,
+}
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def _request_etag(versions, extra):
+    args = tuple(sorted(request.args.items(multi=True)))
+    names = [data_version_name(scope, key) for scope, key in versions(request.args)]
+    epoch, values = get_data_versions(names)
+    raw = repr((request.endpoint, args, epoch, tuple(zip(names, values)), extra(request.args) if extra else None))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def _get_body(key, etag):
+    with _lock:
+        entry = _bodies.get(key)
+        if entry is None or entry[0] != etag:
+            _stats['misses'] += 1
+            return None
+        _bodies.move_to_end(key)
+        _stats['hits'] += 1
+        return entry[1]
+
+
+def _store_body(key, etag, body):
+    if len(body) > RESPONSE_CACHE_MAX_BODY_BYTES:
+        return
+    with _lock:
+        _bodies[key] = (etag, body)
+        _bodies.move_to_end(key)
+        _stats['stores'] += 1
+        while len(_bodies) > RESPONSE_CACHE_MAX_ENTRIES:
+            _bodies.popitem(last=False)
+            _stats['evictions'] += 1
+
+
+def _finish(response, etag, max_age):
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+    return response
+
+
+def conditional_cache(versions, extra=None, max_age=0):
+    """
+    ETag / If-None-Match + server-side JSON body cache for a GET view.
+
+    Args:
+        versions (callable): versions(request.args) -> [(scope, key or None), ...] data versions the response depends on
+        extra (callable, optional): extra(request.args) -> hashable, other inputs of the response (e.g. today's date)
+        max_age (int): Cache-Control max-age for the client, 0 = always revalidate (no-cache)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not RESPONSE_CACHE_ENABLED:
+                return view(*args, **kwargs)
+
+            try:
+                etag = _request_etag(versions, extra)
+            except Exception as e:
+                # Version store unavailable: serve uncached rather than fail the request
+                print(f"Error in conditional_cache ({request.endpoint}): {str(e)}")
+                _count('errors')
+                return view(*args, **kwargs)
+
+            if request.if_none_match.contains(etag):
+                _count('notModified')
+                return _finish(Response(status=304), etag, max_age)
+
+            cache_control = request.cache_control
+            use_cache = not (cache_control.no_cache or cache_control.max_age == 0 or cache_control.no_store)
+            key = (request.endpoint, tuple(sorted(request.args.items(multi=True))))
+
+            if use_cache:
+                body = _get_body(key, etag)
+                if body is not None:
+                    return _finish(Response(body, status=200, mimetype='application/json'), etag, max_age)
+            else:
+                _count('bypassed')
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or not response.is_json:
+                return response
+
+            if not cache_control.no_store:
+                _store_body(key, etag, response.get_data())
+            return _finish(response, etag, max_age)
+        return wrapper
+    return decorator
+
+
+def clear_response_cache():
+    with _lock:
+        _bodies.clear()
+
+
+def get_response_cache_stats():
+    """
+    Conditional cache counters (this worker)
+    """
+    with _lock:
+        lookups = _stats['hits'] + _stats['misses']
+        return {
+            'enabled': RESPONSE_CACHE_ENABLED,
+            'entries': len(_bodies),
+            'bytes': sum(len(body) for _, body in _bodies.values()),
+            'notModified': _stats['notModified'],
+            'hits': _stats['hits'],
+            'misses': _stats['misses'],
+            'hitRatio': round(_stats['hits'] / lookups, 4) if lookups else None,
+            'stores': _stats['stores'],
+            'evictions': _stats['evictions'],
+            'bypassed': _stats['bypassed'],
+            'errors': _stats['errors'],
+        }
@@ -0,0 +1,186 @@
+from collections import OrderedDict
+import sqlite3
+import threading
+import time
+import os
+
+# "Already suggested" store for LLM alternatives, per (client, meal, item).
+# Eskiden modül seviyesinde sonsuza kadar büyüyen tek bir liste vardı (tüm client'lar ve worker'lar için ortak).
+# Backend seçimi SUGGESTION_STORE_BACKEND ile:
+#   - 'memory' (default): process içi LRU, tek worker için
+#   - 'sqlite': paylaşılan SQLite dosyası, birden fazla gunicorn worker'ı için
+# Kayıtlar SUGGESTION_TTL_SECONDS sonra düşer, bellek sabit kalır.
+
+SUGGESTION_STORE_BACKEND = os.getenv('SUGGESTION_STORE_BACKEND', 'memory').lower()
+SUGGESTION_STORE_PATH = os.getenv('SUGGESTION_STORE_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'suggestions.sqlite3'
+)
+SUGGESTION_TTL_SECONDS = int(os.getenv('SUGGESTION_TTL_SECONDS', 24 * 3600))
+SUGGESTION_STORE_MAX_KEYS = int(os.getenv('SUGGESTION_STORE_MAX_KEYS', 50000))
+SUGGESTION_MAX_NAMES_PER_KEY = 50
+
+
+def normalize_food_name(name):
+    return ' '.join(str(name).split()).lower()
+
+
+def _store_key(client_id, meal_id, item_id):
+    return (str(client_id), str(meal_id), str(item_id))
+
+
+class MemorySuggestionStore:
+    """
+    In-process LRU: (client, meal, item) -> {food name: expires_at}
+    """
+
+    def __init__(self, ttl_seconds, max_keys):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_names(self, key):
+        now = time.time()
+        with self._lock:
+            names = self._data.get(key)
+            if names is None:
+                return set()
+            self._data.move_to_end(key)
+            return {name for name, expires_at in names.items() if expires_at > now}
+
+    def add(self, key, name):
+        now = time.time()
+        with self._lock:
+            names = self._data.get(key)
+            if names is None:
+                names = self._data[key] = {}
+            self._data.move_to_end(key)
+
+            # Drop expired names, then the oldest ones if this key grew too much
+            for expired in [n for n, expires_at in names.items() if expires_at <= now]:
+                del names[expired]
+            names.pop(name, None)
+            names[name] = now + self.ttl_seconds
+            while len(names) > SUGGESTION_MAX_NAMES_PER_KEY:
+                del names[next(iter(names))]
+
+            while len(self._data) > self.max_keys:
+                self._data.popitem(last=False)
+
+    def size(self):
+        return len(self._data)
+
+
+class SQLiteSuggestionStore:
+    """
+    Shared SQLite file, same data for every worker process
+    """
+
+    CLEANUP_EVERY = 500  # delete expired rows every N writes
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS suggested_item (
+                    client_id TEXT NOT NULL,
+                    meal_id TEXT NOT NULL,
+                    item_id TEXT NOT NULL,
+                    food_name TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (client_id, meal_id, item_id, food_name)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_suggested_item_expires ON suggested_item (expires_at)")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get_names(self, key):
+        rows = self._connection().execute(
+            """
+            SELECT food_name FROM suggested_item
+            WHERE client_id = ? AND meal_id = ? AND item_id = ? AND expires_at > ?
+            """,
+            (*key, time.time())
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def add(self, key, name):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            """
+            INSERT INTO suggested_item (client_id, meal_id, item_id, food_name, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(client_id, meal_id, item_id, food_name) DO UPDATE SET expires_at = excluded.expires_at
+            """,
+            (*key, name, now + self.ttl_seconds)
+        )
+
+        self._writes += 1
+        if self._writes % self.CLEANUP_EVERY == 0:
+            conn.execute("DELETE FROM suggested_item WHERE expires_at <= ?", (now,))
+        conn.commit()
+
+    def size(self):
+        return self._connection().execute(
+            "SELECT COUNT(DISTINCT client_id || '|' || meal_id || '|' || item_id) FROM suggested_item WHERE expires_at > ?",
+            (time.time(),)
+        ).fetchone()[0]
+
+
+def _create_store():
+    if SUGGESTION_STORE_BACKEND == 'sqlite':
+        return SQLiteSuggestionStore(SUGGESTION_STORE_PATH, SUGGESTION_TTL_SECONDS)
+    if SUGGESTION_STORE_BACKEND != 'memory':
+        print(f"Unknown SUGGESTION_STORE_BACKEND '{SUGGESTION_STORE_BACKEND}', using memory")
+    return MemorySuggestionStore(SUGGESTION_TTL_SECONDS, SUGGESTION_STORE_MAX_KEYS)
+
+
+_store = _create_store()
+
+
+def get_suggested_names(client_id, meal_id, item_id):
+    """
+    Normalized food names already suggested for this meal item (not expired)
+
+    Returns:
+        set: food names (lowercase), O(1) membership checks
+    """
+    try:
+        return _store.get_names(_store_key(client_id, meal_id, item_id))
+    except Exception as e:
+        print(f"Error in get_suggested_names: {str(e)}")
+        return set()
+
+
+def mark_suggested(client_id, meal_id, item_id, food_name):
+    """
+    Remember that food_name was suggested for this meal item (for SUGGESTION_TTL_SECONDS)
+    """
+    try:
+        _store.add(_store_key(client_id, meal_id, item_id), normalize_food_name(food_name))
+    except Exception as e:
+        print(f"Error in mark_suggested: {str(e)}")
+
+
+def get_suggestion_store_stats():
+    try:
+        size = _store.size()
+    except Exception:
+        size = None
+    return {
+        'backend': 'sqlite' if isinstance(_store, SQLiteSuggestionStore) else 'memory',
+        'keys': size,
+        'ttlSeconds': SUGGESTION_TTL_SECONDS,
+    }
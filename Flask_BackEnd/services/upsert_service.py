@@ -0,0 +1,69 @@
+from db_config import db
+from sqlalchemy import inspect
+
+# Dialect-aware INSERT .. ON DUPLICATE KEY UPDATE (MySQL) / ON CONFLICT DO UPDATE (SQLite, PostgreSQL).
+# Tek statement, satır başına SELECT + flush yok. Unique key'in tabloda tanımlı olması gerekir
+# (migrations/, flask db upgrade). Key henüz yoksa çağıran taraf has_unique_key ile eski yola düşer.
+
+_unique_keys = {}  # (table name, columns) -> bool, checked once per process
+
+
+def _dialect_insert(model):
+    dialect_name = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect_name in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert
+    elif dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported for dialect: {dialect_name}")
+    return dialect_name, insert
+
+
+def build_upsert(model, rows, conflict_columns, update_values):
+    """
+    Build one upsert statement for the given rows.
+
+    Args:
+        model: ORM model of the table
+        rows (list): dicts of column values to insert
+        conflict_columns (list): column names of the unique key (ON CONFLICT target, ignored by MySQL)
+        update_values (callable): update_values(table, inserted) -> {column name: expression},
+            `table` is the existing row, `inserted` the row that was about to be inserted
+
+    Returns:
+        Insert statement, execute it with db.session.execute (caller commits)
+    """
+    dialect_name, insert = _dialect_insert(model)
+    stmt = insert(model).values(rows)
+
+    if dialect_name in ('mysql', 'mariadb'):
+        return stmt.on_duplicate_key_update(update_values(model.__table__.c, stmt.inserted))
+    return stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_=update_values(model.__table__.c, stmt.excluded)
+    )
+
+
+def has_unique_key(model, columns):
+    """
+    Whether the live table has a unique constraint / unique index on exactly `columns` (checked once per process).
+    Without it ON DUPLICATE KEY never fires (MySQL inserts another row) and ON CONFLICT fails (SQLite, PostgreSQL).
+
+    Returns:
+        bool
+    """
+    key = (model.__tablename__, frozenset(columns))
+    if key not in _unique_keys:
+        try:
+            inspector = inspect(db.session.get_bind(mapper=model.__mapper__))
+            unique_keys = [c['column_names'] for c in inspector.get_unique_constraints(model.__tablename__)]
+            unique_keys += [i['column_names'] for i in inspector.get_indexes(model.__tablename__) if i.get('unique')]
+            _unique_keys[key] = any(frozenset(names) == key[1] for names in unique_keys)
+        except Exception as e:
+            print(f"Error in has_unique_key ({model.__tablename__}): {str(e)}")
+            return False
+        if not _unique_keys[key]:
+            print(f"⚠️ {model.__tablename__}: unique key {sorted(columns)} missing (run flask db upgrade), upsert disabled")
+    return _unique_keys[key]